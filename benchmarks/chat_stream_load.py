@@ -0,0 +1,117 @@
+"""
+Load benchmark for `/api/chat/stream` on a single uvicorn worker.
+
+The API runs in-process against the scripted fake OpenAI server, so the
+numbers only reflect how many workflows one event loop can drive at once.
+`--nodes sync` rebuilds the graph from the blocking node functions (the
+pre-async behaviour, where every LLM round-trip occupies a pool thread);
+`--nodes async` uses `build_graph()` as shipped.
+
+    python -m benchmarks.chat_stream_load --sessions 8 32 128 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+from benchmarks.fake_openai import create_app, serve
+
+
+def build_sync_graph():
+    """The graph as it was wired before nodes had async counterparts."""
+    from langgraph.graph import StateGraph, START
+
+    from src.graph import nodes
+    from src.graph.types import State
+
+    builder = StateGraph(State)
+    builder.add_edge(START, "coordinator")
+    builder.add_node("coordinator", nodes.coordinator_node)
+    builder.add_node("planner", nodes.planner_node)
+    builder.add_node("supervisor", nodes.supervisor_node)
+    builder.add_node("researcher", nodes.research_node)
+    builder.add_node("coder", nodes.code_node)
+    builder.add_node("browser", nodes.browser_node)
+    builder.add_node("reporter", nodes.reporter_node)
+    return builder.compile()
+
+
+async def run_session(client, url: str) -> float:
+    started = time.perf_counter()
+    payload = {"messages": [{"role": "user", "content": "Summarize LangGraph."}]}
+    async with client.stream("POST", url, json=payload) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_lines():
+            pass
+    return time.perf_counter() - started
+
+
+async def run_level(api_url: str, sessions: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(
+                run_session(client, f"{api_url}/api/chat/stream")
+                for _ in range(sessions)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "sessions": sessions,
+        "wall_s": elapsed,
+        "sessions_per_s": sessions / elapsed,
+        "p50_s": statistics.median(latencies),
+        "max_s": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--nodes", choices=["sync", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    with serve(create_app(latency=args.latency)) as llm_url:
+        for prefix in ("BASIC", "REASONING", "VL"):
+            os.environ[f"{prefix}_BASE_URL"] = llm_url
+            os.environ[f"{prefix}_API_KEY"] = "fake"
+        os.environ.setdefault("TAVILY_API_KEY", "fake")
+
+        from src.api.app import app
+        from src.graph import build_graph
+        from src.service import workflow_service
+
+        # Per-node INFO logging would dominate the profile at high concurrency.
+        logging.getLogger("src").setLevel(logging.WARNING)
+
+        modes = ["sync", "async"] if args.nodes == "both" else [args.nodes]
+        print(f"LLM latency {args.latency:.3f}s per call, one API worker")
+        print(
+            f"{'nodes':<6} {'sessions':>8} {'wall s':>8} {'sess/s':>8} {'p50 s':>8} {'max s':>8}"
+        )
+        # Measure the nodes themselves, without checkpoint writes.
+        workflow_service.checkpointer = None
+        with serve(app) as api_url:
+            api_url = api_url.removesuffix("/v1")
+            for mode in modes:
+                workflow_service.graph = (
+                    build_sync_graph() if mode == "sync" else build_graph()
+                )
+                for sessions in args.sessions:
+                    result = asyncio.run(run_level(api_url, sessions))
+                    print(
+                        f"{mode:<6} {result['sessions']:>8} {result['wall_s']:>8.2f} "
+                        f"{result['sessions_per_s']:>8.2f} {result['p50_s']:>8.2f} "
+                        f"{result['max_s']:>8.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Article extraction benchmark: in the event loop versus the extraction pool.
+
+Extracts a corpus of HTML pages concurrently from one event loop, the way
+`Crawler.crawl_many` does, first calling the extractor directly (as the
+crawler did before the pool) and then through `ExtractionPool`. Reports
+pages per second and the longest stall of the event loop, measured by a
+ticker that should wake every 10 ms.
+
+    python -m benchmarks.extraction --corpus saved_pages/ --workers 4
+
+Without --corpus, synthetic pages are used. Readability.js needs node;
+--pure-python uses readabilipy's pure-Python extractor for every page.
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import time
+
+from src.crawler.extraction import ExtractionPool, extract_html
+
+
+def load_corpus(directory: str | None, pages: int) -> list[str]:
+    if directory:
+        corpus = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                corpus.append(f.read())
+        return corpus
+    paragraph = "<p>" + "Crawled article text with <a href='/x'>a link</a>. " * 20
+    return [
+        f"<html><head><title>Page {i}</title></head><body><article>"
+        f"{(paragraph + '</p>') * (50 + 25 * (i % 8))}</article></body></html>"
+        for i in range(pages)
+    ]
+
+
+async def run(corpus: list[str], extract) -> tuple[float, float]:
+    """Seconds to extract `corpus`, and the longest event loop stall in ms."""
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stall = max(stall, time.perf_counter() - start - 0.01)
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(extract(html) for html in corpus))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticking
+    return elapsed, stall * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", help="directory of saved *.html pages")
+    parser.add_argument("--pages", type=int, default=32, help="synthetic pages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pure-python", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.pages)
+    use_readability = not args.pure_python
+    size = sum(map(len, corpus))
+    print(f"{len(corpus)} pages, {size / 1e6:.1f} MB of HTML")
+
+    async def in_loop(html: str):
+        return extract_html(html, use_readability)
+
+    pool = ExtractionPool(
+        max_workers=args.workers,
+        max_queue=len(corpus),
+        timeout=600,
+        inline_chars=0,
+        use_readability=use_readability,
+    )
+    # Start the workers outside the measurement.
+    pool.extract(corpus[0])
+
+    print(f"{'extraction':<12} {'pages/s':>8} {'max loop stall':>15}")
+    for label, extract in (("in loop", in_loop), ("pool", pool.aextract)):
+        elapsed, stall = asyncio.run(run(corpus, extract))
+        print(f"{label:<12} {len(corpus) / elapsed:>8.1f} {stall:>12.1f} ms")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
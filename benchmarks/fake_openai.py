@@ -0,0 +1,207 @@
+"""
+A scripted OpenAI-compatible chat completions server for offline benchmarks.
+
+The replies walk the agent workflow through one short research loop:
+coordinator hands off, planner emits a three-step plan (two independent
+steps and a report), supervisor routes to researcher, then reporter, then
+FINISH. Every response waits `latency` seconds before the first byte to
+stand in for provider round-trip time.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PLAN = {
+    "thought": "The user wants a short research summary.",
+    "title": "Benchmark plan",
+    "steps": [
+        {
+            "agent_name": "researcher",
+            "title": "Gather information",
+            "description": "Search the web and summarize the findings.",
+            "depends_on": [],
+        },
+        {
+            "agent_name": "coder",
+            "title": "Compute statistics",
+            "description": "Compute the figures needed for the report.",
+            "depends_on": [],
+        },
+        {
+            "agent_name": "reporter",
+            "title": "Write report",
+            "description": "Write the final report.",
+            "depends_on": [1, 2],
+        },
+    ],
+}
+
+
+def _text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") for part in content)
+    return content
+
+
+def scripted_reply(body: dict) -> dict:
+    """Return `{"content": ...}` or `{"tool_call": (name, args)}` for a request."""
+    messages = body.get("messages", [])
+    system = _text(messages[0]) if messages else ""
+    last = _text(messages[-1]) if messages else ""
+
+    if "You are Langmanus" in system:
+        return {"content": "handoff_to_planner()"}
+    if "professional Deep Researcher" in system:
+        return {"content": json.dumps(PLAN)}
+    if "You are a supervisor" in system:
+        if "Response from reporter" in last:
+            route = {"next": "FINISH"}
+        elif "Response from researcher" in last:
+            route = {"next": "reporter"}
+        else:
+            route = {"next": "researcher"}
+        if body.get("tools"):
+            return {"tool_call": (body["tools"][0]["function"]["name"], route)}
+        return {"content": json.dumps(route)}
+    return {"content": "Here is a concise summary of the requested topic."}
+
+
+def create_app(
+    latency: float = 0.0, token_delay: float = 0.0, rate_limited: int = 0
+) -> FastAPI:
+    """Build the fake server.
+
+    The first `rate_limited` requests are answered with a 429 carrying a
+    short `retry-after`. `app.state.max_in_flight` records the highest number
+    of requests the server was handling at once.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        if app.state.requests <= rate_limited:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status_code=429,
+                headers={"retry-after": "0.2"},
+            )
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            app.state.in_flight -= 1
+        reply = scripted_reply(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "fake")
+
+        if reply.get("tool_call"):
+            name, args = reply["tool_call"]
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{uuid.uuid4().hex[:8]}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(args)},
+                    }
+                ],
+            }
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": reply["content"]}
+            finish_reason = "stop"
+
+        usage = {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": finish_reason}
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        def chunk(delta: dict, finish: str | None = None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            if message.get("tool_calls"):
+                call = message["tool_calls"][0]
+                yield chunk({"tool_calls": [{"index": 0, **call}]})
+            else:
+                text = message["content"]
+                for start in range(0, len(text), 8):
+                    if token_delay:
+                        await asyncio.sleep(token_delay)
+                    yield chunk({"content": text[start : start + 8]})
+            yield chunk({}, finish_reason)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+@contextmanager
+def serve(app: FastAPI):
+    """Run `app` on a free localhost port in a background thread.
+
+    Yields the OpenAI-style base URL (ending in `/v1`).
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
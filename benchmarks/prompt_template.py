@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of `apply_prompt_template` throughput.
+
+Compares the compiled-template registry with the previous behaviour of
+reading, escaping and parsing the markdown prompt on every call, for every
+prompt used by the agents.
+
+    python -m benchmarks.prompt_template --calls 2000
+"""
+
+import argparse
+import os
+import re
+import time
+from datetime import datetime
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import PromptTemplate
+
+from src.config import TEAM_MEMBERS
+from src.config.agents import AGENT_CONTEXT_BUDGET
+from src.prompts.compaction import compact_messages
+from src.prompts.template import PROMPTS_DIR, apply_prompt_template, prompt_registry
+
+PROMPTS = ["coordinator", "planner", "supervisor", "researcher", "coder", "reporter"]
+
+
+def apply_uncompiled(prompt_name: str, state: dict) -> list:
+    """`apply_prompt_template` as it was before the registry."""
+    template = open(os.path.join(PROMPTS_DIR, f"{prompt_name}.md")).read()
+    template = template.replace("{", "{{").replace("}", "}}")
+    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    system_prompt = PromptTemplate(
+        input_variables=["CURRENT_TIME"], template=template
+    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
+    messages = compact_messages(
+        state["messages"], AGENT_CONTEXT_BUDGET.get(prompt_name)
+    )
+    return [{"role": "system", "content": system_prompt}] + messages
+
+
+def measure(func, calls: int, state: dict) -> float:
+    start = time.perf_counter()
+    for index in range(calls):
+        func(PROMPTS[index % len(PROMPTS)], state)
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--reload", action="store_true", help="check mtimes too")
+    args = parser.parse_args()
+
+    prompt_registry.reload = args.reload
+    state = {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [HumanMessage(content="What is LangGraph?")],
+        "deep_thinking_mode": False,
+        "search_before_planning": False,
+    }
+    # Warm up both paths (imports, registry load, OS file cache).
+    measure(apply_uncompiled, 50, state)
+    measure(apply_prompt_template, 50, state)
+
+    before = measure(apply_uncompiled, args.calls, state)
+    after = measure(apply_prompt_template, args.calls, state)
+    print(f"{'implementation':<16} {'calls/s':>10} {'us/call':>10}")
+    print(f"{'uncompiled':<16} {before:>10.0f} {1e6 / before:>10.1f}")
+    print(f"{'registry':<16} {after:>10.0f} {1e6 / after:>10.1f}")
+    print(f"speed-up x{after / before:.1f}")
+
+
+if __name__ == "__main__":
+    main()
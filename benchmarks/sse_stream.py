@@ -0,0 +1,104 @@
+"""
+Throughput benchmark of the `/api/chat/stream` event encoding.
+
+Runs concurrent synthetic workflow streams on one event loop. Each stream
+is mostly LLM token deltas, arriving at `--rate` tokens per second, with a
+tool call every 100 tokens. Every event is framed as `chat_endpoint` does.
+The per-token mode is compared with the coalesced mode (`coalesce_deltas`
+plus `dumps`, which uses orjson when installed). Reports the events per
+second, the SSE frames and bytes sent, and the CPU time per stream.
+
+    python -m benchmarks.sse_stream --streams 50 --tokens 1000 --rate 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from sse_starlette.sse import ServerSentEvent
+
+from src.service.sse import coalesce_deltas, dumps, orjson
+
+TOKENS = ["The", " answer", " is", " 42", ",", " 因为", "数据", "\n", " see", " [1]"]
+
+
+async def workflow_events(stream: int, tokens: int, rate: float):
+    yield {"event": "start_of_agent", "data": {"agent_name": "reporter"}}
+    for i in range(tokens):
+        if i and i % 100 == 0:
+            yield {
+                "event": "tool_call",
+                "data": {"tool_name": "crawl_tool", "tool_input": {"url": "x"}},
+            }
+        yield {
+            "event": "message",
+            "data": {
+                "message_id": f"run-{stream}",
+                "delta": {"content": TOKENS[i % len(TOKENS)]},
+            },
+        }
+        if rate:
+            await asyncio.sleep(1 / rate)
+    yield {"event": "end_of_agent", "data": {"agent_name": "reporter"}}
+
+
+async def consume(events, encode) -> tuple[int, int]:
+    frames = size = 0
+    async for event in events:
+        frame = ServerSentEvent(
+            data=encode(event["data"]), event=event["event"], sep="\n"
+        ).encode()
+        frames += 1
+        size += len(frame)
+    return frames, size
+
+
+async def run(args, coalesced: bool) -> dict:
+    def events(stream):
+        source = workflow_events(stream, args.tokens, args.rate)
+        if not coalesced:
+            return source
+        return coalesce_deltas(source, args.window_ms / 1000, args.max_chars)
+
+    encode = dumps if coalesced else lambda data: json.dumps(data, ensure_ascii=False)
+    cpu, wall = time.process_time(), time.perf_counter()
+    results = await asyncio.gather(
+        *(consume(events(stream), encode) for stream in range(args.streams))
+    )
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    events_in = args.streams * (args.tokens + 2 + (args.tokens - 1) // 100)
+    return {
+        "events_per_s": events_in / wall,
+        "frames": sum(frames for frames, _ in results),
+        "bytes": sum(size for _, size in results),
+        "cpu_ms_per_stream": cpu / args.streams * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200, help="0: unthrottled")
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--max-chars", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(
+        f"{args.streams} streams of {args.tokens} tokens at {args.rate:g} tokens/s, "
+        f"orjson {'on' if orjson else 'not installed'}"
+    )
+    print(
+        f"{'mode':<10} {'events/s':>10} {'frames':>8} {'KiB':>8} {'CPU ms/stream':>14}"
+    )
+    for mode in ("per-token", "coalesced"):
+        result = asyncio.run(run(args, coalesced=mode == "coalesced"))
+        print(
+            f"{mode:<10} {result['events_per_s']:>10.0f} {result['frames']:>8} "
+            f"{result['bytes'] / 1024:>8.0f} {result['cpu_ms_per_stream']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup benchmark: cold import time of the main modules and latency of the
+first workflow run.
+
+Every measurement runs in a fresh interpreter so nothing is already imported
+or cached. The first request runs `run_agent_workflow` against the scripted
+fake OpenAI server and reports the import time of the workflow service, the
+time to the first streamed event and the time to the end of the workflow.
+
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "src.agents.llm",
+    "src.tools",
+    "src.agents",
+    "src.graph",
+    "src.service.workflow_service",
+    "src.api.app",
+]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "browser_use": "browser_use" in sys.modules}}))
+"""
+
+FIRST_REQUEST_SCRIPT = """
+import asyncio, json, os, time
+from benchmarks.fake_openai import create_app, serve
+
+with serve(create_app()) as llm_url:
+    for prefix in ("BASIC", "REASONING", "VL"):
+        os.environ[prefix + "_BASE_URL"] = llm_url
+    serve_ready = time.perf_counter()
+
+    from src.service.workflow_service import run_agent_workflow
+
+    imported = time.perf_counter()
+
+    async def first_request():
+        first = None
+        async for _ in run_agent_workflow(
+            [{"role": "user", "content": "Summarize LangGraph."}]
+        ):
+            first = first or time.perf_counter()
+        return first
+
+    first_event = asyncio.run(first_request())
+    done = time.perf_counter()
+
+# Times are counted from when the fake server is up; its own start-up is not
+# part of the application's cold start.
+print(json.dumps({
+    "import_s": imported - serve_ready,
+    "first_event_s": first_event - serve_ready,
+    "workflow_s": done - serve_ready,
+}))
+"""
+
+
+def _run(script: str) -> dict | None:
+    env = {
+        **os.environ,
+        "BASIC_API_KEY": "fake",
+        "REASONING_API_KEY": "fake",
+        "VL_API_KEY": "fake",
+        "TAVILY_API_KEY": "fake",
+        "CHECKPOINT_DB": "",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, env=env
+    )
+    if result.returncode:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<32} {'import s':>9} {'browser_use':>12}")
+    for module in MODULES:
+        runs = [_run(IMPORT_SCRIPT.format(module=module)) for _ in range(args.repeat)]
+        if None in runs:
+            # e.g. src.api.app needs MongoDB for the POC routers
+            print(f"{module:<32} {'failed':>9}")
+            continue
+        seconds = statistics.median(run["seconds"] for run in runs)
+        print(f"{module:<32} {seconds:>9.3f} {str(runs[0]['browser_use']):>12}")
+
+    runs = [_run(FIRST_REQUEST_SCRIPT) for _ in range(args.repeat)]
+    if None in runs:
+        print("first request failed")
+        return
+    print()
+    for key, label in (
+        ("import_s", "import workflow service"),
+        ("first_event_s", "first streamed event"),
+        ("workflow_s", "first workflow finished"),
+    ):
+        print(f"{label:<32} {statistics.median(run[key] for run in runs):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Allocation benchmark of the tool logging decorators on large tool outputs.
+
+Calls a `log_io` tool that returns a large markdown document, as
+`crawl_tool` and `python_repl_tool` do, through the previous decorator that
+formatted every argument and result eagerly and through the current one.
+Reports the bytes allocated per call (tracemalloc peak) and the call time,
+with DEBUG logging off (the default) and on.
+
+    python -m benchmarks.tool_logging --size 2000000 --calls 50
+"""
+
+import argparse
+import functools
+import logging
+import os
+import time
+import tracemalloc
+
+from src.tools import decorators
+from src.tools.decorators import log_io
+
+logger = logging.getLogger("src.tools.decorators")
+
+
+def log_io_eager(func):
+    """`log_io` as it was before the lazy formatting."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        func_name = func.__name__
+        params = ", ".join(
+            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
+        )
+        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        result = func(*args, **kwargs)
+        logger.debug(f"Tool {func_name} returned: {result}")
+        return result
+
+    return wrapper
+
+
+def measure(tool, document: str, calls: int) -> tuple[float, float]:
+    """Peak bytes allocated by one call, and milliseconds per call."""
+    tool(document)
+    tracemalloc.start()
+    tool(document)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(calls):
+        tool(document)
+    return peak, (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=2_000_000, help="output chars")
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    document = ("# Heading\n\n" + "Some crawled markdown text. " * 40 + "\n\n") * (
+        args.size // 1_100 + 1
+    )
+    document = document[: args.size]
+
+    def crawl(page: str) -> dict:
+        return {"role": "user", "content": page}
+
+    # Records are formatted as usual but written to /dev/null.
+    logging.basicConfig(stream=open(os.devnull, "w"), force=True)
+    print(f"{'decorator':<10} {'DEBUG':<6} {'peak alloc/call':>16} {'ms/call':>9}")
+    for debug in (False, True):
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        for label, decorator in (("eager", log_io_eager), ("lazy", log_io)):
+            peak, ms = measure(decorator(crawl), document, args.calls)
+            print(f"{label:<10} {str(debug):<6} {peak / 1e3:>13.1f} kB {ms:>9.3f}")
+    print()
+    print("tool metrics:", decorators.tool_metrics.stats()["crawl"])
+
+
+if __name__ == "__main__":
+    main()
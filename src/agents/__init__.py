@@ -1,3 +1,11 @@
-from .agents import research_agent, coder_agent, browser_agent
+from .agents import get_agent
 
-__all__ = ["research_agent", "coder_agent", "browser_agent"]
+
+def __getattr__(name: str):
+    # research_agent, coder_agent and browser_agent are built on first access.
+    from . import agents
+
+    return getattr(agents, name)
+
+
+__all__ = ["get_agent", "research_agent", "coder_agent", "browser_agent"]
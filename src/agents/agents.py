@@ -1,32 +1,55 @@
+import functools
+
 from langgraph.prebuilt import create_react_agent
 
-from src.prompts import apply_prompt_template
-from src.tools import (
-    bash_tool,
-    browser_tool,
-    crawl_tool,
-    python_repl_tool,
-    tavily_tool,
+from src import tools
+from src.config import (
+    DEFAULT_TOOL_CONCURRENCY,
+    DEFAULT_TOOL_TIMEOUT,
+    TOOL_CONCURRENCY,
+    TOOL_GROUPS,
+    TOOL_TIMEOUTS,
 )
+from src.prompts import apply_prompt_template
 
 from .llm import get_llm_by_type
+from .tool_node import BoundedToolNode
 from src.config.agents import AGENT_LLM_MAP
 
-# Create agents using configured LLM types
-research_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["researcher"]),
-    tools=[tavily_tool, crawl_tool],
-    prompt=lambda state: apply_prompt_template("researcher", state),
-)
+# Tools available to each react agent
+AGENT_TOOLS: dict[str, list[str]] = {
+    "researcher": ["multi_search_tool", "crawl_tool", "crawl_many_tool"],
+    "coder": ["python_repl_tool", "bash_tool"],
+    "browser": ["browser_tool"],
+}
 
-coder_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["coder"]),
-    tools=[python_repl_tool, bash_tool],
-    prompt=lambda state: apply_prompt_template("coder", state),
-)
+# Legacy module attributes for the agents
+_AGENT_ALIASES = {
+    "research_agent": "researcher",
+    "coder_agent": "coder",
+    "browser_agent": "browser",
+}
 
-browser_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["browser"]),
-    tools=[browser_tool],
-    prompt=lambda state: apply_prompt_template("browser", state),
-)
+
+@functools.cache
+def get_agent(agent_name: str):
+    """Create the react agent on first use, with its configured LLM type."""
+    return create_react_agent(
+        get_llm_by_type(AGENT_LLM_MAP[agent_name]),
+        # Tool calls from one turn run concurrently, within per-tool limits.
+        tools=BoundedToolNode(
+            [getattr(tools, tool_name) for tool_name in AGENT_TOOLS[agent_name]],
+            limits=TOOL_CONCURRENCY,
+            timeouts=TOOL_TIMEOUTS,
+            groups=TOOL_GROUPS,
+            default_limit=DEFAULT_TOOL_CONCURRENCY,
+            default_timeout=DEFAULT_TOOL_TIMEOUT,
+        ),
+        prompt=lambda state: apply_prompt_template(agent_name, state),
+    )
+
+
+def __getattr__(name: str):
+    if name in _AGENT_ALIASES:
+        return get_agent(_AGENT_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,301 @@
+"""
+Response cache for deterministic LLM calls.
+
+The caches plug into langchain's `BaseCache`, so every `invoke`/`ainvoke`
+of a chat model created by `src.agents.llm` is looked up before it reaches
+the provider. Keys combine the model and its call parameters (including
+bound tools and structured-output schemas) with a normalized form of the
+messages. Message ids, provider tool-call ids and the time of day in the
+`CURRENT_TIME` prompt variable are left out, so the same conversation
+replayed later maps to the same entry.
+
+Calls with a non-zero temperature are never cached. Wrap a call site in
+`no_llm_cache()` to bypass the cache for the calls made inside it.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from src.config import LLM_CACHE, LLM_CACHE_DB, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+# "Mon Mar 10 2025 14:03:59" as rendered for <<CURRENT_TIME>>; only the date
+# is kept in the key.
+_TIMESTAMP = re.compile(r"\b(\w{3} \w{3} \d{2} \d{4}) \d{2}:\d{2}:\d{2}\b")
+_TEMPERATURE = re.compile(r"['\"]temperature['\"]\s*[:,]\s*([0-9.]+)")
+_VOLATILE_KWARGS = ("id", "response_metadata", "usage_metadata")
+
+
+@contextmanager
+def no_llm_cache():
+    """Send the LLM calls made inside the block straight to the provider."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip the run-specific parts of a serialized message list."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return _TIMESTAMP.sub(r"\1", prompt)
+    call_ids: dict[str, str] = {}
+
+    def call_id(value: str) -> str:
+        return call_ids.setdefault(value, f"call_{len(call_ids)}")
+
+    normalized = []
+    for message in messages if isinstance(messages, list) else [messages]:
+        kwargs = dict(message.get("kwargs", {})) if isinstance(message, dict) else {}
+        for key in _VOLATILE_KWARGS:
+            kwargs.pop(key, None)
+        if isinstance(kwargs.get("content"), str):
+            kwargs["content"] = _TIMESTAMP.sub(r"\1", kwargs["content"])
+        if kwargs.get("tool_calls"):
+            kwargs["tool_calls"] = [
+                {**call, "id": call_id(call.get("id") or "")}
+                for call in kwargs["tool_calls"]
+            ]
+        # The raw provider payload duplicates tool_calls with the same ids.
+        kwargs.get("additional_kwargs", {}).pop("tool_calls", None)
+        if kwargs.get("tool_call_id"):
+            kwargs["tool_call_id"] = call_id(kwargs["tool_call_id"])
+        normalized.append(kwargs or message)
+    return json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    payload = f"{llm_string}\x00{normalize_prompt(prompt)}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_deterministic(llm_string: str) -> bool:
+    # Bound call parameters come after the model's own, so check them all.
+    return all(float(value) == 0.0 for value in _TEMPERATURE.findall(llm_string))
+
+
+class LLMResponseCache(BaseCache, ABC):
+    """Shared key handling, TTL, opt-out and metrics of the cache backends.
+
+    Backends store serialized generations under the normalized key through
+    `_get`, `_set`, `_clear` and `_size`. Generations come back without message ids
+    so that a replayed answer gets a fresh id in the graph state, and
+    without token usage, since the provider was not called.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass.get() or not is_deterministic(llm_string):
+            self._count("bypassed")
+            return None
+        value = self._get(cache_key(prompt, llm_string))
+        self._count("hits" if value is not None else "misses")
+        if value is None:
+            return None
+        generations = loads(value)
+        for generation in generations:
+            if hasattr(generation, "message"):
+                generation.message.id = None
+                generation.message.usage_metadata = None
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _bypass.get() or not is_deterministic(llm_string):
+            return
+        self._set(cache_key(prompt, llm_string), dumps(return_val))
+        self._count("writes")
+
+    def clear(self, **kwargs: Any) -> None:
+        self._clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size"] = self._size()
+        return stats
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """The value stored under `key`, or None if missing or expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value: str) -> None:
+        """Stores `value` under `key`, evicting entries beyond `max_entries`."""
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Removes every entry."""
+
+    @abstractmethod
+    def _size(self) -> int:
+        """The number of entries stored."""
+
+
+class InMemoryLLMCache(LLMResponseCache):
+    """Process-local LRU cache."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        super().__init__(max_entries, ttl)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[0]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteLLMCache(LLMResponseCache):
+    """On-disk cache that survives restarts; least recently used entries go first."""
+
+    def __init__(
+        self, path: str, max_entries: int = 10000, ttl: Optional[float] = 86400
+    ):
+        super().__init__(max_entries, ttl)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS llm_cache_accessed
+                    ON llm_cache (accessed);
+                """)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1]):
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            evicted = self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+        self._count("evictions", evicted)
+
+    def _clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def _size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def create_llm_cache(
+    backend: str | None,
+    path: str = "llm_cache.sqlite",
+    max_entries: int = 1024,
+    ttl: Optional[float] = 3600,
+) -> LLMResponseCache | None:
+    """Create the cache backend named by `backend` ("memory", "sqlite" or empty)."""
+    if not backend:
+        return None
+    if backend == "memory":
+        return InMemoryLLMCache(max_entries, ttl)
+    if backend == "sqlite":
+        logger.info(f"Caching LLM responses in {path}")
+        return SqliteLLMCache(path, max_entries, ttl)
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+
+@functools.cache
+def get_llm_cache() -> LLMResponseCache | None:
+    """The configured cache, shared by every LLM created in `src.agents.llm`."""
+    return create_llm_cache(
+        LLM_CACHE, LLM_CACHE_DB, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+    )
@@ -0,0 +1,184 @@
+"""
+Model cascade of the coordinator, supervisor and planner.
+
+With LLM_CASCADE enabled, an agent's call first goes to the cheaper
+configured models of its `AGENT_LLM_CASCADE` entry. A cheap answer is kept
+if it passes the agent's check (a valid `Router`, a complete plan, a clean
+handoff); otherwise, or if the call raises, the next model is asked. The
+model the agent would use without the cascade always answers last and is
+not checked, so the cascade never does worse than the plain call.
+
+Before escalating inside a graph run, the cascade dispatches an
+`llm_escalation` custom event, so stream consumers can drop the partial
+output of the rejected answer. `cascade_stats` counts, per agent, the
+calls, the escalations and the latency of every model tried.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from langchain_core.callbacks.manager import (
+    adispatch_custom_event,
+    dispatch_custom_event,
+)
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.config import LLM_CASCADE
+from src.config.agents import AGENT_LLM_CASCADE, AGENT_LLM_MAP, LLMType
+from .llm import get_llm_by_type, llm_model_name
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def cascade_tiers(agent: str, llm_type: LLMType) -> list[LLMType]:
+    """Models tried for `agent`, cheapest first and ending with `llm_type`."""
+    cascade = AGENT_LLM_CASCADE.get(agent, [])
+    if not LLM_CASCADE or llm_type not in cascade:
+        return [llm_type]
+    final_model = llm_model_name(llm_type)
+    tiers = []
+    for tier in cascade[: cascade.index(llm_type)]:
+        model = llm_model_name(tier)
+        # Unconfigured tiers, and tiers served by the final model, are skipped.
+        if model and model != final_model:
+            tiers.append(tier)
+    return [*tiers, llm_type]
+
+
+class CascadeStats:
+    """Calls, escalations and latency of the cascades, per agent."""
+
+    def __init__(self):
+        self._agents: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _agent(self, agent: str) -> dict:
+        return self._agents.setdefault(
+            agent,
+            {"calls": 0, "escalated_calls": 0, "latency_ms": 0.0, "tiers": {}},
+        )
+
+    def record_attempt(
+        self, agent: str, tier: LLMType, accepted: bool, seconds: float
+    ) -> None:
+        with self._lock:
+            tiers = self._agent(agent)["tiers"]
+            stats = tiers.setdefault(
+                tier, {"attempts": 0, "rejected": 0, "latency_ms": 0.0}
+            )
+            stats["attempts"] += 1
+            stats["rejected"] += not accepted
+            stats["latency_ms"] += seconds * 1000
+
+    def record_call(self, agent: str, escalations: int, seconds: float) -> None:
+        with self._lock:
+            stats = self._agent(agent)
+            stats["calls"] += 1
+            stats["escalated_calls"] += escalations > 0
+            stats["latency_ms"] += seconds * 1000
+
+    def stats(self) -> dict:
+        with self._lock:
+            agents = {
+                agent: {
+                    **stats,
+                    "tiers": {tier: dict(s) for tier, s in stats["tiers"].items()},
+                }
+                for agent, stats in self._agents.items()
+            }
+        for stats in agents.values():
+            calls = stats["calls"]
+            stats["escalation_rate"] = (
+                stats["escalated_calls"] / calls if calls else 0.0
+            )
+            stats["avg_latency_ms"] = stats.pop("latency_ms") / calls if calls else 0.0
+            for tier in stats["tiers"].values():
+                tier["avg_latency_ms"] = tier.pop("latency_ms") / tier["attempts"]
+        return agents
+
+
+cascade_stats = CascadeStats()
+
+
+def _in_graph_run() -> bool:
+    """Whether custom events of this call reach the run's callbacks."""
+    return var_child_runnable_config.get() is not None
+
+
+class ModelCascade:
+    """Asks the models of `tiers` in turn until one's result passes `check`."""
+
+    def __init__(self, agent: str, tiers: list[LLMType]):
+        self.agent = agent
+        self.tiers = tiers
+
+    def _escalation(self, tier: LLMType, reason: str) -> dict:
+        next_tier = self.tiers[self.tiers.index(tier) + 1]
+        logger.info(f"{self.agent} escalating from {tier} to {next_tier}: {reason}")
+        return {"agent_name": self.agent, "from": tier, "to": next_tier}
+
+    def invoke(self, call: Callable[[Any], T], check: Callable[[T], bool]) -> T:
+        """`call(llm)` with the cheapest model whose result passes `check`."""
+        started = time.perf_counter()
+        for escalations, tier in enumerate(self.tiers):
+            final = tier == self.tiers[-1]
+            attempt_started = time.perf_counter()
+            try:
+                result = call(get_llm_by_type(tier))
+            except Exception as e:
+                if final:
+                    raise
+                accepted, reason = False, f"{type(e).__name__}: {e}"
+            else:
+                accepted = final or check(result)
+                reason = "output rejected"
+            cascade_stats.record_attempt(
+                self.agent, tier, accepted, time.perf_counter() - attempt_started
+            )
+            if accepted:
+                cascade_stats.record_call(
+                    self.agent, escalations, time.perf_counter() - started
+                )
+                return result
+            event = self._escalation(tier, reason)
+            if _in_graph_run():
+                dispatch_custom_event("llm_escalation", event)
+
+    async def ainvoke(
+        self, call: Callable[[Any], Awaitable[T]], check: Callable[[T], bool]
+    ) -> T:
+        """Async counterpart of `invoke`; `call` returns an awaitable."""
+        started = time.perf_counter()
+        for escalations, tier in enumerate(self.tiers):
+            final = tier == self.tiers[-1]
+            attempt_started = time.perf_counter()
+            try:
+                result = await call(get_llm_by_type(tier))
+            except Exception as e:
+                if final:
+                    raise
+                accepted, reason = False, f"{type(e).__name__}: {e}"
+            else:
+                accepted = final or check(result)
+                reason = "output rejected"
+            cascade_stats.record_attempt(
+                self.agent, tier, accepted, time.perf_counter() - attempt_started
+            )
+            if accepted:
+                cascade_stats.record_call(
+                    self.agent, escalations, time.perf_counter() - started
+                )
+                return result
+            event = self._escalation(tier, reason)
+            if _in_graph_run():
+                await adispatch_custom_event("llm_escalation", event)
+
+
+def get_cascade(agent: str, llm_type: Optional[LLMType] = None) -> ModelCascade:
+    """The cascade of `agent`, ending with `llm_type` (its mapped type by default)."""
+    llm_type = llm_type or AGENT_LLM_MAP[agent]
+    return ModelCascade(agent, cascade_tiers(agent, llm_type))
@@ -0,0 +1,398 @@
+"""
+Client-side scheduling of LLM requests.
+
+Every chat model created by `src.agents.llm` talks to its provider through a
+`GatewayClient`/`AsyncGatewayClient`, so all calls to one model, whether
+sync or async, streamed or not, share a `ModelLimiter`. The limiter caps
+in-flight requests, meters requests and prompt tokens per minute with token
+buckets, serves the interactive lane before the background lane, and pauses
+the model for `retry-after` seconds whenever the provider answers 429.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+import httpx
+
+from src.config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# Pause applied after a 429 that carries no usable retry-after header.
+DEFAULT_RETRY_AFTER = 1.0
+
+_lane: ContextVar[str] = ContextVar("llm_lane", default=INTERACTIVE)
+
+# Called with the seconds each request admitted in this context spent
+# queued; set by the workflow tracer around an LLM call.
+queue_wait_observer: ContextVar[Callable[[float], None] | None] = ContextVar(
+    "llm_queue_wait_observer", default=None
+)
+
+
+@contextmanager
+def llm_priority(lane: str):
+    """Send the LLM requests made inside the block through `lane`."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane}")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, up to one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available."""
+        self._refill(now)
+        # A single request larger than the bucket must not wait forever.
+        deficit = min(amount, self.capacity) - self.level
+        return max(0.0, deficit / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class _Ticket:
+    __slots__ = ("lane", "cost", "wake", "enqueued", "waited")
+
+    def __init__(self, lane: str, cost: int, wake):
+        self.lane = lane
+        self.cost = cost
+        self.wake = wake
+        self.enqueued = time.monotonic()
+        self.waited = 0.0
+
+
+class Permit:
+    """Slot granted by a `ModelLimiter`; release it once the response is done."""
+
+    def __init__(self, limiter: "ModelLimiter", waited: float = 0.0):
+        self._limiter = limiter
+        self._released = False
+        self.waited = waited
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class ModelLimiter:
+    """Admission control for the requests sent to one model.
+
+    Waiters are served strictly by lane, then in arrival order. The head
+    waiter is admitted once a concurrency slot is free, both buckets hold
+    enough budget and no 429 back-off is in effect. Sync and async callers
+    share the same queue.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self._requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._waiting: list[tuple[int, int, _Ticket]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._stats = {
+            "requests": 0,
+            "throttled": 0,
+            "max_queue_depth": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def acquire(self, cost: int = 0) -> Permit:
+        """Block the calling thread until the request may be sent."""
+        event = threading.Event()
+        ticket = self._enqueue(cost, event.set)
+        try:
+            while True:
+                delay = self._try_grant(ticket)
+                if delay is None:
+                    return self._permit(ticket)
+                event.wait(None if math.isinf(delay) else delay)
+                event.clear()
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+
+    async def aacquire(self, cost: int = 0) -> Permit:
+        """Wait on the running loop until the request may be sent."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        ticket = self._enqueue(cost, lambda: loop.call_soon_threadsafe(event.set))
+        try:
+            while True:
+                delay = self._try_grant(ticket)
+                if delay is None:
+                    return self._permit(ticket)
+                try:
+                    await asyncio.wait_for(
+                        event.wait(), None if math.isinf(delay) else delay
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+
+    def throttle(self, retry_after: float) -> None:
+        """Hold every waiter back after the provider reported a rate limit."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats["throttled"] += 1
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            if self._requests:
+                self._requests.drain(now)
+        logger.warning(f"{self.model} rate limited, pausing for {retry_after:.1f}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = {lane: 0 for lane in LANES}
+            for _, _, ticket in self._waiting:
+                queued[ticket.lane] += 1
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "queued": queued,
+                "queue_depth": len(self._waiting),
+            }
+
+    def _permit(self, ticket: _Ticket) -> Permit:
+        observer = queue_wait_observer.get()
+        if observer is not None:
+            observer(ticket.waited)
+        return Permit(self, ticket.waited)
+
+    def _enqueue(self, cost: int, wake) -> _Ticket:
+        ticket = _Ticket(_lane.get(), cost, wake)
+        with self._lock:
+            entry = (LANES.index(ticket.lane), next(self._sequence), ticket)
+            heapq.heappush(self._waiting, entry)
+            depth = len(self._waiting)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+        return ticket
+
+    def _dequeue(self, ticket: _Ticket) -> None:
+        with self._lock:
+            self._waiting = [entry for entry in self._waiting if entry[2] is not ticket]
+            heapq.heapify(self._waiting)
+            self._wake_head()
+
+    def _try_grant(self, ticket: _Ticket) -> float | None:
+        """Admit `ticket` and return None, or return how long to wait.
+
+        An infinite wait means "until woken", i.e. until the ticket reaches
+        the head of the queue or a concurrency slot is released.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._waiting[0][2] is not ticket:
+                return math.inf
+            if self._in_flight >= self.max_concurrency:
+                return math.inf
+            delay = self._blocked_until - now
+            if self._requests:
+                delay = max(delay, self._requests.wait_time(1, now))
+            if self._tokens:
+                delay = max(delay, self._tokens.wait_time(ticket.cost, now))
+            if delay > 0:
+                return delay
+
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            if self._requests:
+                self._requests.take(1, now)
+            if self._tokens:
+                self._tokens.take(ticket.cost, now)
+            waited = ticket.waited = now - ticket.enqueued
+            self._stats["requests"] += 1
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(
+                self._stats["max_wait_seconds"], waited
+            )
+            self._wake_head()
+            return None
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_head()
+
+    def _wake_head(self) -> None:
+        if self._waiting:
+            self._waiting[0][2].wake()
+
+
+class LLMGateway:
+    """Registry of the per-model limiters sharing one set of limits."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._limiters: dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model: str) -> ModelLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = ModelLimiter(
+                    model,
+                    self.max_concurrency,
+                    self.requests_per_minute,
+                    self.tokens_per_minute,
+                )
+            return self._limiters[model]
+
+    def stats(self) -> dict:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.model: limiter.stats() for limiter in limiters}
+
+
+def _estimate_cost(request: httpx.Request) -> int:
+    # Roughly four bytes of JSON per prompt token.
+    return len(request.content) // 4
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("retry-after", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, permit: Permit):
+        self._stream = stream
+        self._permit = permit
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._permit.release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, permit: Permit):
+        self._stream = stream
+        self._permit = permit
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._permit.release()
+
+
+def _hold_until_closed(response: httpx.Response, permit: Permit, stream_cls):
+    if response.status_code == 429:
+        permit._limiter.throttle(_retry_after(response))
+    if response.is_closed:
+        permit.release()
+    else:
+        # Streaming responses keep their slot until the body is consumed.
+        response.stream = stream_cls(response.stream, permit)
+    return response
+
+
+class GatewayClient(httpx.Client):
+    """`httpx.Client` whose requests are admitted by a `ModelLimiter`."""
+
+    def __init__(self, limiter: ModelLimiter, **kwargs):
+        kwargs.setdefault("follow_redirects", True)
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        permit = self.limiter.acquire(_estimate_cost(request))
+        try:
+            response = super().send(request, **kwargs)
+        except BaseException:
+            permit.release()
+            raise
+        return _hold_until_closed(response, permit, _ReleasingStream)
+
+
+class AsyncGatewayClient(httpx.AsyncClient):
+    """`httpx.AsyncClient` whose requests are admitted by a `ModelLimiter`."""
+
+    def __init__(self, limiter: ModelLimiter, **kwargs):
+        kwargs.setdefault("follow_redirects", True)
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        permit = await self.limiter.aacquire(_estimate_cost(request))
+        try:
+            response = await super().send(request, **kwargs)
+        except BaseException:
+            permit.release()
+            raise
+        return _hold_until_closed(response, permit, _AsyncReleasingStream)
+
+
+llm_gateway = LLMGateway(
+    LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+)
@@ -1,6 +1,6 @@
-from langchain_openai import ChatOpenAI
-from langchain_deepseek import ChatDeepSeek
-from typing import Optional
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
 
 from src.config import (
     REASONING_MODEL,
@@ -9,11 +9,42 @@ from src.config import (
     BASIC_MODEL,
     BASIC_BASE_URL,
     BASIC_API_KEY,
+    SMALL_MODEL,
+    SMALL_BASE_URL,
+    SMALL_API_KEY,
     VL_MODEL,
     VL_BASE_URL,
     VL_API_KEY,
 )
 from src.config.agents import LLMType
+from .cache import get_llm_cache
+from .gateway import AsyncGatewayClient, GatewayClient, llm_gateway
+
+# The provider SDKs take about a second to import, so they are only loaded
+# once the first LLM is created.
+if TYPE_CHECKING:
+    from langchain_deepseek import ChatDeepSeek
+    from langchain_openai import ChatOpenAI
+
+
+def _gateway_clients(model: str) -> dict:
+    """HTTP clients that route the model's requests through the LLM gateway."""
+    limiter = llm_gateway.limiter(model)
+    return {
+        "http_client": GatewayClient(limiter),
+        "http_async_client": AsyncGatewayClient(limiter),
+    }
+
+
+def _shared_kwargs(model: str) -> dict:
+    """Client settings common to every provider."""
+    kwargs = _gateway_clients(model)
+    # Report token usage for streamed responses too (traces, metrics)
+    kwargs["stream_usage"] = True
+    cache = get_llm_cache()
+    if cache is not None:
+        kwargs["cache"] = cache
+    return kwargs
 
 
 def create_openai_llm(
@@ -26,8 +57,15 @@ def create_openai_llm(
     """
     Create a ChatOpenAI instance with the specified configuration
     """
+    from langchain_openai import ChatOpenAI
+
     # Only include base_url in the arguments if it's not None or empty
-    llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
+    llm_kwargs = {
+        "model": model,
+        "temperature": temperature,
+        **_shared_kwargs(model),
+        **kwargs,
+    }
 
     if base_url:  # This will handle None or empty string
         llm_kwargs["base_url"] = base_url
@@ -48,8 +86,15 @@ def create_deepseek_llm(
     """
     Create a ChatDeepSeek instance with the specified configuration
     """
+    from langchain_deepseek import ChatDeepSeek
+
     # Only include base_url in the arguments if it's not None or empty
-    llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
+    llm_kwargs = {
+        "model": model,
+        "temperature": temperature,
+        **_shared_kwargs(model),
+        **kwargs,
+    }
 
     if base_url:  # This will handle None or empty string
         llm_kwargs["api_base"] = base_url
@@ -83,6 +128,14 @@ def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
             base_url=BASIC_BASE_URL,
             api_key=BASIC_API_KEY,
         )
+    elif llm_type == "small":
+        if not SMALL_MODEL:
+            raise ValueError("SMALL_MODEL is not configured")
+        llm = create_openai_llm(
+            model=SMALL_MODEL,
+            base_url=SMALL_BASE_URL,
+            api_key=SMALL_API_KEY,
+        )
     elif llm_type == "vision":
         llm = create_openai_llm(
             model=VL_MODEL,
@@ -96,18 +149,36 @@ def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
     return llm
 
 
-# Initialize LLMs for different purposes - now these will be cached
-reasoning_llm = get_llm_by_type("reasoning")
-basic_llm = get_llm_by_type("basic")
-vl_llm = get_llm_by_type("vision")
+def llm_model_name(llm_type: LLMType) -> str:
+    """Model configured for `llm_type`; empty if there is none."""
+    return {
+        "small": SMALL_MODEL,
+        "basic": BASIC_MODEL,
+        "reasoning": REASONING_MODEL,
+        "vision": VL_MODEL,
+    }[llm_type]
+
+
+# Module-level aliases, created on first access instead of at import time
+_LLM_ALIASES: dict[str, LLMType] = {
+    "reasoning_llm": "reasoning",
+    "basic_llm": "basic",
+    "vl_llm": "vision",
+}
+
+
+def __getattr__(name: str):
+    if name in _LLM_ALIASES:
+        return get_llm_by_type(_LLM_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    stream = reasoning_llm.stream("what is mcp?")
+    stream = get_llm_by_type("reasoning").stream("what is mcp?")
     full_response = ""
     for chunk in stream:
         full_response += chunk.content
     print(full_response)
 
-    basic_llm.invoke("Hello")
-    vl_llm.invoke("Hello")
+    get_llm_by_type("basic").invoke("Hello")
+    get_llm_by_type("vision").invoke("Hello")
@@ -0,0 +1,190 @@
+"""
+Tool execution of the react agents.
+
+The model often asks for several tools in one turn, such as five crawls.
+`BoundedToolNode` runs them at the same time and returns their results in
+the order of the calls. Calls are grouped by the resource they share
+(`groups`; by default each tool is its own group). A turn runs at most
+`limits[group]` calls of a group at once, started in the order the model
+made them, so the calls of a group limited to 1 run one after another.
+
+A call that takes longer than `timeouts[tool]` seconds is abandoned and
+the model gets an error message for it instead of a result. Async calls
+are cancelled; a sync call keeps its thread, and its group slot, until it
+returns.
+
+The node hooks into private `ToolNode` methods (`_func`, `_afunc`,
+`_run_one`, `_arun_one`, `_parse_input`) of langgraph-prebuilt, which is
+why pyproject.toml keeps langgraph-prebuilt below 0.2. Check them when
+raising that bound.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+
+logger = logging.getLogger(__name__)
+
+
+class _Turn:
+    """The group slots of one turn's tool calls."""
+
+    def __init__(self, tickets: dict[str, tuple[str, int]], limits: dict[str, int]):
+        # Group of each call id, and its place among the group's calls.
+        self.tickets = tickets
+        self.limits = limits
+        self.started = dict.fromkeys(limits, 0)
+        self.running = dict.fromkeys(limits, 0)
+
+    def _ready(self, group: str, ticket: int) -> bool:
+        return (
+            self.started[group] == ticket and self.running[group] < self.limits[group]
+        )
+
+    def _start(self, group: str) -> None:
+        self.started[group] += 1
+        self.running[group] += 1
+
+    def acquire(self, condition: threading.Condition, group: str, ticket: int):
+        with condition:
+            condition.wait_for(lambda: self._ready(group, ticket))
+            self._start(group)
+
+    def release(self, condition: threading.Condition, group: str) -> None:
+        with condition:
+            self.running[group] -= 1
+            condition.notify_all()
+
+    async def aacquire(self, condition: asyncio.Condition, group: str, ticket: int):
+        async with condition:
+            await condition.wait_for(lambda: self._ready(group, ticket))
+            self._start(group)
+
+    async def arelease(self, condition: asyncio.Condition, group: str) -> None:
+        async with condition:
+            self.running[group] -= 1
+            condition.notify_all()
+
+
+# The turn being executed, and the condition its calls wait on.
+_turn: contextvars.ContextVar[Optional[tuple[_Turn, object]]] = contextvars.ContextVar(
+    "tool_turn", default=None
+)
+
+
+class BoundedToolNode(ToolNode):
+    def __init__(
+        self,
+        tools,
+        *,
+        limits: Optional[dict[str, int]] = None,
+        timeouts: Optional[dict[str, float]] = None,
+        groups: Optional[dict[str, str]] = None,
+        default_limit: int = 4,
+        default_timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        super().__init__(tools, **kwargs)
+        self.limits = limits or {}
+        self.timeouts = timeouts or {}
+        self.groups = groups or {}
+        self.default_limit = default_limit
+        self.default_timeout = default_timeout
+
+    def _new_turn(self, input, store) -> _Turn:
+        tool_calls, _ = self._parse_input(input, store)
+        tickets: dict[str, tuple[str, int]] = {}
+        limits: dict[str, int] = {}
+        counts: dict[str, int] = {}
+        for call in tool_calls:
+            group = self.groups.get(call["name"], call["name"])
+            limits[group] = max(self.limits.get(group, self.default_limit), 1)
+            tickets[call["id"]] = (group, counts.get(group, 0))
+            counts[group] = counts.get(group, 0) + 1
+        return _Turn(tickets, limits)
+
+    def _func(self, input, config: RunnableConfig, *, store: Optional[BaseStore]):
+        token = _turn.set((self._new_turn(input, store), threading.Condition()))
+        try:
+            return super()._func(input, config, store=store)
+        finally:
+            _turn.reset(token)
+
+    async def _afunc(
+        self, input, config: RunnableConfig, *, store: Optional[BaseStore]
+    ):
+        token = _turn.set((self._new_turn(input, store), asyncio.Condition()))
+        try:
+            return await super()._afunc(input, config, store=store)
+        finally:
+            _turn.reset(token)
+
+    def _run_one(self, call, input_type, config) -> ToolMessage:
+        turn, condition = _turn.get() or (None, None)
+        slot = turn.tickets.get(call["id"]) if turn else None
+        if slot:
+            turn.acquire(condition, *slot)
+        timeout = self.timeouts.get(call["name"], self.default_timeout)
+        if not timeout:
+            try:
+                return super()._run_one(call, input_type, config)
+            finally:
+                if slot:
+                    turn.release(condition, slot[0])
+
+        # A sync tool cannot be interrupted; it finishes in its own thread.
+        future: Future = Future()
+        context = contextvars.copy_context()
+        run_one = super()._run_one
+
+        def target():
+            try:
+                future.set_result(context.run(run_one, call, input_type, config))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                if slot:
+                    turn.release(condition, slot[0])
+
+        threading.Thread(target=target, daemon=True).start()
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            return self._timed_out(call, timeout)
+
+    async def _arun_one(self, call, input_type, config) -> ToolMessage:
+        turn, condition = _turn.get() or (None, None)
+        slot = turn.tickets.get(call["id"]) if turn else None
+        if slot:
+            await turn.aacquire(condition, *slot)
+        timeout = self.timeouts.get(call["name"], self.default_timeout)
+        try:
+            return await asyncio.wait_for(
+                super()._arun_one(call, input_type, config), timeout or None
+            )
+        except asyncio.TimeoutError:
+            return self._timed_out(call, timeout)
+        finally:
+            if slot:
+                await turn.arelease(condition, slot[0])
+
+    def _timed_out(self, call, timeout: float) -> ToolMessage:
+        logger.warning(f"Tool {call['name']} timed out after {timeout:g}s")
+        return ToolMessage(
+            content=(
+                f"Error: {call['name']} did not finish within {timeout:g}s. "
+                "Try again with a smaller request."
+            ),
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+        )
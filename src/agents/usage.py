@@ -0,0 +1,120 @@
+"""
+Token usage of LLM responses, including provider-side prompt caching.
+
+Providers report the prompt tokens they served from their prompt cache in
+different places. OpenAI sends `prompt_tokens_details.cached_tokens`, which
+langchain exposes as `usage_metadata["input_token_details"]["cache_read"]`.
+DeepSeek sends `prompt_cache_hit_tokens`. `token_usage` reads all of them.
+
+`PromptCacheCallbackHandler` records the cached share of the prompt tokens
+of every LLM request of a workflow, and adds it to the process-wide
+`prompt_cache_stats` served by `/api/metrics`.
+"""
+
+import threading
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+def token_usage(response: LLMResult) -> dict[str, Optional[int]]:
+    """Input, output and cached input tokens of a response; None if unknown."""
+    usage: dict[str, Optional[int]] = dict.fromkeys(("input", "output", "cached"))
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if not metadata:
+                continue
+            usage["input"] = (usage["input"] or 0) + metadata["input_tokens"]
+            usage["output"] = (usage["output"] or 0) + metadata["output_tokens"]
+            cache_read = (metadata.get("input_token_details") or {}).get("cache_read")
+            if cache_read is not None:
+                usage["cached"] = (usage["cached"] or 0) + cache_read
+    provider_usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage["input"] is None:
+        usage["input"] = provider_usage.get("prompt_tokens")
+        usage["output"] = provider_usage.get("completion_tokens")
+    if not usage["cached"]:
+        cached = provider_usage.get("prompt_cache_hit_tokens")
+        if cached is None:
+            details = provider_usage.get("prompt_tokens_details") or {}
+            cached = details.get("cached_tokens")
+        usage["cached"] = cached if cached is not None else usage["cached"]
+    return usage
+
+
+def _model_name(response: LLMResult) -> str:
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "response_metadata", None) or {}
+            if metadata.get("model_name"):
+                return metadata["model_name"]
+    return (response.llm_output or {}).get("model_name") or "unknown"
+
+
+class PromptCacheStats:
+    """Prompt tokens and provider cache hits, per model."""
+
+    def __init__(self):
+        self._models: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, input_tokens: int, cached_tokens: int) -> None:
+        with self._lock:
+            stats = self._models.setdefault(
+                model,
+                {
+                    "requests": 0,
+                    "requests_with_hits": 0,
+                    "input_tokens": 0,
+                    "cached_tokens": 0,
+                },
+            )
+            stats["requests"] += 1
+            stats["requests_with_hits"] += cached_tokens > 0
+            stats["input_tokens"] += input_tokens
+            stats["cached_tokens"] += cached_tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {model: dict(stats) for model, stats in self._models.items()}
+        for stats in models.values():
+            stats["cached_token_ratio"] = (
+                stats["cached_tokens"] / stats["input_tokens"]
+                if stats["input_tokens"]
+                else 0.0
+            )
+        return models
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+class PromptCacheCallbackHandler(BaseCallbackHandler):
+    """Cached-token ratio of each LLM request of one workflow."""
+
+    run_inline = True
+
+    def __init__(self):
+        # (model, input tokens, cached tokens) of every request, in order
+        self.requests: list[tuple[str, int, int]] = []
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = token_usage(response)
+        if not usage["input"]:
+            # Answers from the LLM response cache carry no usage.
+            return
+        model = _model_name(response)
+        self.requests.append((model, usage["input"], usage["cached"] or 0))
+        prompt_cache_stats.record(model, usage["input"], usage["cached"] or 0)
+
+    @property
+    def cached_token_ratio(self) -> float:
+        input_tokens = sum(request[1] for request in self.requests)
+        cached_tokens = sum(request[2] for request in self.requests)
+        return cached_tokens / input_tokens if input_tokens else 0.0
@@ -2,7 +2,6 @@
 FastAPI application for LangManus.
 """
 
-import json
 import logging
 from typing import Dict, List, Any, Optional, Union
 
@@ -13,9 +12,21 @@ from sse_starlette.sse import EventSourceResponse
 import asyncio
 from typing import AsyncGenerator, Dict, List, Any
 
-from src.graph import build_graph
-from src.config import TEAM_MEMBERS
+from src.agents.cache import get_llm_cache
+from src.agents.cascade import cascade_stats
+from src.agents.gateway import llm_gateway
+from src.agents.usage import prompt_cache_stats
+from src.config import SSE_COALESCE_MAX_CHARS, SSE_COALESCE_WINDOW_MS, TEAM_MEMBERS
+from src.crawler.cache import get_crawl_cache
+from src.graph.routing import supervisor_router
+from src.prompts.compaction import compaction_totals
+from src.service.sse import coalesce_deltas, dumps
+from src.service.tracing import trace_store
 from src.service.workflow_service import run_agent_workflow
+from src.search import get_multi_search
+from src.tools.decorators import tool_metrics
+from src.tools.browser_pool import get_browser_pool
+from src.tools.kernels import get_kernel_manager
 from src.poc.memory.api import router as memory_router
 from src.poc.task.api import router as task_router
 from src.poc.integration.api import router as integration_router
@@ -39,9 +50,6 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Create the graph
-graph = build_graph()
-
 # Register POC routers
 app.include_router(memory_router)
 app.include_router(task_router)
@@ -75,6 +83,19 @@ class ChatRequest(BaseModel):
     search_before_planning: Optional[bool] = Field(
         False, description="Whether to search before planning"
     )
+    parallel_execution: Optional[bool] = Field(
+        False, description="Whether to run independent plan steps in parallel"
+    )
+    workflow_id: Optional[str] = Field(
+        None,
+        description="Id of an interrupted workflow to resume from its last "
+        "completed node",
+    )
+    coalesce_deltas: Optional[bool] = Field(
+        False,
+        description="Whether to merge consecutive token deltas of a message "
+        "into fewer events",
+    )
 
 
 @app.post("/api/chat/stream")
@@ -114,20 +135,29 @@ async def chat_endpoint(request: ChatRequest, req: Request):
             messages.append(message_dict)
 
         async def event_generator():
+            events = run_agent_workflow(
+                messages,
+                request.debug,
+                request.deep_thinking_mode,
+                request.search_before_planning,
+                request.parallel_execution,
+                request.workflow_id,
+            )
+            if request.coalesce_deltas:
+                events = coalesce_deltas(
+                    events, SSE_COALESCE_WINDOW_MS / 1000, SSE_COALESCE_MAX_CHARS
+                )
             try:
-                async for event in run_agent_workflow(
-                    messages,
-                    request.debug,
-                    request.deep_thinking_mode,
-                    request.search_before_planning,
-                ):
+                async for event in events:
                     # Check if client is still connected
                     if await req.is_disconnected():
+                        # Completed nodes are checkpointed; reconnecting with
+                        # the workflow_id continues from there.
                         logger.info("Client disconnected, stopping workflow")
                         break
                     yield {
                         "event": event["event"],
-                        "data": json.dumps(event["data"], ensure_ascii=False),
+                        "data": dumps(event["data"]),
                     }
             except asyncio.CancelledError:
                 logger.info("Stream processing cancelled")
@@ -141,3 +171,42 @@ async def chat_endpoint(request: ChatRequest, req: Request):
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Runtime counters of the workflow components."""
+    return {
+        "supervisor": supervisor_router.stats(),
+        "compaction": compaction_totals(),
+        "llm_gateway": llm_gateway.stats(),
+        "llm_cache": llm_cache.stats() if (llm_cache := get_llm_cache()) else None,
+        "prompt_cache": prompt_cache_stats.stats(),
+        "llm_cascade": cascade_stats.stats(),
+        "tools": tool_metrics.stats(),
+        "crawl_cache": (
+            crawl_cache.stats() if (crawl_cache := get_crawl_cache()) else None
+        ),
+        "search": get_multi_search().stats(),
+        "python_kernels": get_kernel_manager().stats(),
+        "browser": get_browser_pool().stats(),
+    }
+
+
+@app.get("/api/debug/traces/{workflow_id}")
+async def trace_endpoint(workflow_id: str, format: str = "json"):
+    """Spans recorded for a workflow.
+
+    `format` is "json" (spans and per-node totals), "chrome" (load in
+    chrome://tracing or Perfetto) or "otlp" (OTLP/HTTP JSON).
+    """
+    trace = trace_store.get(workflow_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "chrome":
+        return trace.to_chrome_trace()
+    if format == "otlp":
+        return trace.to_otlp()
+    if format == "json":
+        return trace.as_dict()
+    raise HTTPException(status_code=400, detail=f"Unknown trace format: {format}")
@@ -1,4 +1,5 @@
 from .env import (
+    APP_ENV,
     # Reasoning LLM
     REASONING_MODEL,
     REASONING_BASE_URL,
@@ -7,19 +8,86 @@ from .env import (
     BASIC_MODEL,
     BASIC_BASE_URL,
     BASIC_API_KEY,
+    # Small LLM
+    SMALL_MODEL,
+    SMALL_BASE_URL,
+    SMALL_API_KEY,
     # Vision-language LLM
     VL_MODEL,
     VL_BASE_URL,
     VL_API_KEY,
+    # LLM gateway
+    LLM_MAX_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    # LLM response cache
+    LLM_CACHE,
+    LLM_CACHE_DB,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CASCADE,
+    PROMPT_CACHE_LAYOUT,
+    # Tracing
+    TRACE_MAX_WORKFLOWS,
+    TRACE_OTLP_ENDPOINT,
+    # Web crawler
+    CRAWLER_READER_URL,
+    CRAWLER_TIMEOUT,
+    CRAWLER_MAX_CONNECTIONS,
+    CRAWLER_PER_HOST_CONCURRENCY,
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_TTL,
+    CRAWL_CACHE_MAX_BYTES,
+    CRAWL_EXTRACT_WORKERS,
+    CRAWL_EXTRACT_QUEUE,
+    CRAWL_EXTRACT_TIMEOUT,
+    CRAWL_EXTRACT_INLINE_CHARS,
+    SEARCH_BACKEND,
+    SEARCH_FIXTURE_PATH,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_MAX_ENTRIES,
+    BASH_TIMEOUT,
+    BASH_CPU_SECONDS,
+    BASH_MEMORY_MB,
+    BASH_MAX_PROCESSES,
+    BASH_MAX_OUTPUT_CHARS,
+    SANDBOX_ROOT,
+    SANDBOX_POOL_SIZE,
+    PYTHON_KERNEL_WARM,
+    PYTHON_KERNEL_MAX,
+    PYTHON_KERNEL_IDLE_SECONDS,
+    PYTHON_KERNEL_TIMEOUT,
+    PYTHON_KERNEL_MEMORY_MB,
+    PYTHON_KERNEL_PRELOAD,
+    BROWSER_MAX_CONTEXTS,
+    BROWSER_WARM_CONTEXTS,
+    BROWSER_IDLE_SECONDS,
+    BROWSER_LEASE_TIMEOUT,
+    BROWSER_HEADLESS,
+    SSE_COALESCE_WINDOW_MS,
+    SSE_COALESCE_MAX_CHARS,
     # Other configurations
     CHROME_INSTANCE_PATH,
+    CHECKPOINT_DB,
+)
+from .tools import (
+    TAVILY_MAX_RESULTS,
+    CRAWL_MAX_TOKENS,
+    CRAWL_CHUNK_TOKENS,
+    CRAWL_MAX_IMAGES,
+    SEARCH_MAX_QUERIES,
+    TOOL_GROUPS,
+    TOOL_CONCURRENCY,
+    DEFAULT_TOOL_CONCURRENCY,
+    TOOL_TIMEOUTS,
+    DEFAULT_TOOL_TIMEOUT,
 )
-from .tools import TAVILY_MAX_RESULTS
 
 # Team configuration
 TEAM_MEMBERS = ["researcher", "coder", "browser", "reporter"]
 
 __all__ = [
+    "APP_ENV",
     # Reasoning LLM
     "REASONING_MODEL",
     "REASONING_BASE_URL",
@@ -28,12 +96,76 @@ __all__ = [
     "BASIC_MODEL",
     "BASIC_BASE_URL",
     "BASIC_API_KEY",
+    # Small LLM
+    "SMALL_MODEL",
+    "SMALL_BASE_URL",
+    "SMALL_API_KEY",
     # Vision-language LLM
     "VL_MODEL",
     "VL_BASE_URL",
     "VL_API_KEY",
+    # LLM gateway
+    "LLM_MAX_CONCURRENCY",
+    "LLM_REQUESTS_PER_MINUTE",
+    "LLM_TOKENS_PER_MINUTE",
+    # LLM response cache
+    "LLM_CACHE",
+    "LLM_CACHE_DB",
+    "LLM_CACHE_TTL",
+    "LLM_CACHE_MAX_ENTRIES",
+    "LLM_CASCADE",
+    "PROMPT_CACHE_LAYOUT",
+    # Tracing
+    "TRACE_MAX_WORKFLOWS",
+    "TRACE_OTLP_ENDPOINT",
+    # Web crawler
+    "CRAWLER_READER_URL",
+    "CRAWLER_TIMEOUT",
+    "CRAWLER_MAX_CONNECTIONS",
+    "CRAWLER_PER_HOST_CONCURRENCY",
+    "CRAWL_CACHE_DIR",
+    "CRAWL_CACHE_TTL",
+    "CRAWL_CACHE_MAX_BYTES",
+    "CRAWL_EXTRACT_WORKERS",
+    "CRAWL_EXTRACT_QUEUE",
+    "CRAWL_EXTRACT_TIMEOUT",
+    "CRAWL_EXTRACT_INLINE_CHARS",
+    "SEARCH_BACKEND",
+    "SEARCH_FIXTURE_PATH",
+    "SEARCH_CACHE_TTL",
+    "SEARCH_CACHE_MAX_ENTRIES",
+    "BASH_TIMEOUT",
+    "BASH_CPU_SECONDS",
+    "BASH_MEMORY_MB",
+    "BASH_MAX_PROCESSES",
+    "BASH_MAX_OUTPUT_CHARS",
+    "SANDBOX_ROOT",
+    "SANDBOX_POOL_SIZE",
+    "PYTHON_KERNEL_WARM",
+    "PYTHON_KERNEL_MAX",
+    "PYTHON_KERNEL_IDLE_SECONDS",
+    "PYTHON_KERNEL_TIMEOUT",
+    "PYTHON_KERNEL_MEMORY_MB",
+    "PYTHON_KERNEL_PRELOAD",
+    "BROWSER_MAX_CONTEXTS",
+    "BROWSER_WARM_CONTEXTS",
+    "BROWSER_IDLE_SECONDS",
+    "BROWSER_LEASE_TIMEOUT",
+    "BROWSER_HEADLESS",
+    "SSE_COALESCE_WINDOW_MS",
+    "SSE_COALESCE_MAX_CHARS",
     # Other configurations
     "TEAM_MEMBERS",
     "TAVILY_MAX_RESULTS",
+    "CRAWL_MAX_TOKENS",
+    "CRAWL_CHUNK_TOKENS",
+    "CRAWL_MAX_IMAGES",
+    "SEARCH_MAX_QUERIES",
+    "TOOL_GROUPS",
+    "TOOL_CONCURRENCY",
+    "DEFAULT_TOOL_CONCURRENCY",
+    "TOOL_TIMEOUTS",
+    "DEFAULT_TOOL_TIMEOUT",
     "CHROME_INSTANCE_PATH",
+    "CHECKPOINT_DB",
 ]
@@ -1,7 +1,7 @@
 from typing import Literal
 
 # Define available LLM types
-LLMType = Literal["basic", "reasoning", "vision"]
+LLMType = Literal["small", "basic", "reasoning", "vision"]
 
 # Define agent-LLM mapping
 AGENT_LLM_MAP: dict[str, LLMType] = {
@@ -13,3 +13,25 @@ AGENT_LLM_MAP: dict[str, LLMType] = {
     "browser": "vision",  # 浏览器操作使用vision llm
     "reporter": "basic",  # 编写报告使用basic llm
 }
+
+# Model cascade (LLM_CASCADE): the models an agent may try, cheapest first.
+# A call starts at the first configured model cheaper than the one the agent
+# would use and escalates, up to that model, whenever the output fails the
+# agent's check.
+AGENT_LLM_CASCADE: dict[str, list[LLMType]] = {
+    "coordinator": ["small", "basic"],
+    "supervisor": ["small", "basic"],
+    "planner": ["basic", "reasoning"],
+}
+
+# Per-agent context budget in (estimated) tokens for the message history.
+# Older history is compacted once it grows past the budget; None disables it.
+AGENT_CONTEXT_BUDGET: dict[str, int | None] = {
+    "coordinator": 8000,
+    "planner": 16000,
+    "supervisor": 8000,
+    "researcher": 24000,
+    "coder": 24000,
+    "browser": 16000,
+    "reporter": 48000,
+}
@@ -4,6 +4,9 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# "development" enables conveniences such as reloading edited prompts
+APP_ENV = os.getenv("APP_ENV", "production")
+
 # Reasoning LLM configuration (for complex reasoning tasks)
 REASONING_MODEL = os.getenv("REASONING_MODEL", "o1-mini")
 REASONING_BASE_URL = os.getenv("REASONING_BASE_URL")
@@ -14,10 +17,111 @@ BASIC_MODEL = os.getenv("BASIC_MODEL", "gpt-4o")
 BASIC_BASE_URL = os.getenv("BASIC_BASE_URL")
 BASIC_API_KEY = os.getenv("BASIC_API_KEY")
 
+# Small LLM configuration (cheap first tier of the model cascade; empty
+# SMALL_MODEL leaves the tier out)
+SMALL_MODEL = os.getenv("SMALL_MODEL", "")
+SMALL_BASE_URL = os.getenv("SMALL_BASE_URL")
+SMALL_API_KEY = os.getenv("SMALL_API_KEY")
+
 # Vision-language LLM configuration (for tasks requiring visual understanding)
 VL_MODEL = os.getenv("VL_MODEL", "gpt-4o")
 VL_BASE_URL = os.getenv("VL_BASE_URL")
 VL_API_KEY = os.getenv("VL_API_KEY")
 
+# LLM gateway limits, applied per model (0 disables the rate limits)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+
+# LLM response cache: "memory", "sqlite" or empty to disable
+LLM_CACHE = os.getenv("LLM_CACHE", "memory")
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+# Model cascade: "true" answers the coordinator, supervisor and planner with
+# the cheaper models of AGENT_LLM_CASCADE first, escalating when their output
+# does not pass the agent's check
+LLM_CASCADE = os.getenv("LLM_CASCADE", "false").lower() == "true"
+
+# Prompt layout for provider-side prompt caching: "true" keeps each system
+# prompt identical across calls and sends the current time after the
+# conversation instead
+PROMPT_CACHE_LAYOUT = os.getenv("PROMPT_CACHE_LAYOUT", "false").lower() == "true"
+
+# Workflow tracing: number of traces kept in memory (0 disables tracing) and
+# an optional OTLP/HTTP collector, e.g. http://localhost:4318/v1/traces
+TRACE_MAX_WORKFLOWS = int(os.getenv("TRACE_MAX_WORKFLOWS", "100"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+
+# Web crawler: reader endpoint that fetches and renders pages, request
+# timeout in seconds, pooled connections and concurrent crawls per site
+CRAWLER_READER_URL = os.getenv("CRAWLER_READER_URL", "https://r.jina.ai/")
+CRAWLER_TIMEOUT = float(os.getenv("CRAWLER_TIMEOUT", "30"))
+CRAWLER_MAX_CONNECTIONS = int(os.getenv("CRAWLER_MAX_CONNECTIONS", "20"))
+CRAWLER_PER_HOST_CONCURRENCY = int(os.getenv("CRAWLER_PER_HOST_CONCURRENCY", "4"))
+
+# On-disk crawl cache (empty directory disables it), freshness in seconds and
+# size cap in bytes
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", ".crawl_cache")
+CRAWL_CACHE_TTL = float(os.getenv("CRAWL_CACHE_TTL", "86400"))
+CRAWL_CACHE_MAX_BYTES = int(os.getenv("CRAWL_CACHE_MAX_BYTES", str(512 * 2**20)))
+
+# Article extraction: worker processes (0 extracts in the calling process),
+# queued pages beyond the busy workers, per-page timeout in seconds, and the
+# size in characters below which pages use the in-process pure-Python path
+CRAWL_EXTRACT_WORKERS = int(
+    os.getenv("CRAWL_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+CRAWL_EXTRACT_QUEUE = int(os.getenv("CRAWL_EXTRACT_QUEUE", "32"))
+CRAWL_EXTRACT_TIMEOUT = float(os.getenv("CRAWL_EXTRACT_TIMEOUT", "60"))
+CRAWL_EXTRACT_INLINE_CHARS = int(os.getenv("CRAWL_EXTRACT_INLINE_CHARS", "20000"))
+
+# Web search: backend ("tavily", or "fixture" to search the JSON documents in
+# SEARCH_FIXTURE_PATH offline), and the per-query result cache
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "tavily")
+SEARCH_FIXTURE_PATH = os.getenv("SEARCH_FIXTURE_PATH", "")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+
+# Sandbox of the coder's shell commands: wall-clock and CPU time in seconds,
+# address space in MiB, processes, and the characters of output kept. Each
+# workflow gets its own working directory under SANDBOX_ROOT (a temporary
+# directory if empty); SANDBOX_POOL_SIZE directories are kept ready.
+BASH_TIMEOUT = float(os.getenv("BASH_TIMEOUT", "120"))
+BASH_CPU_SECONDS = int(os.getenv("BASH_CPU_SECONDS", "60"))
+BASH_MEMORY_MB = int(os.getenv("BASH_MEMORY_MB", "4096"))
+BASH_MAX_PROCESSES = int(os.getenv("BASH_MAX_PROCESSES", "512"))
+BASH_MAX_OUTPUT_CHARS = int(os.getenv("BASH_MAX_OUTPUT_CHARS", "20000"))
+SANDBOX_ROOT = os.getenv("SANDBOX_ROOT", "")
+SANDBOX_POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "4"))
+
+# Per-workflow Python kernels of the coder: interpreters kept started, most
+# running at once, idle seconds before one is stopped, per-execution timeout
+# in seconds, address space in MiB and modules imported ahead of time
+PYTHON_KERNEL_WARM = int(os.getenv("PYTHON_KERNEL_WARM", "2"))
+PYTHON_KERNEL_MAX = int(os.getenv("PYTHON_KERNEL_MAX", "16"))
+PYTHON_KERNEL_IDLE_SECONDS = float(os.getenv("PYTHON_KERNEL_IDLE_SECONDS", "600"))
+PYTHON_KERNEL_TIMEOUT = float(os.getenv("PYTHON_KERNEL_TIMEOUT", "120"))
+PYTHON_KERNEL_MEMORY_MB = int(os.getenv("PYTHON_KERNEL_MEMORY_MB", "4096"))
+PYTHON_KERNEL_PRELOAD = os.getenv("PYTHON_KERNEL_PRELOAD", "numpy,pandas")
+
+# Browser agent sessions: contexts open at most, empty ones kept ready, idle
+# seconds before a workflow's context is closed, and the longest wait for a
+# free context
+BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "4"))
+BROWSER_WARM_CONTEXTS = int(os.getenv("BROWSER_WARM_CONTEXTS", "1"))
+BROWSER_IDLE_SECONDS = float(os.getenv("BROWSER_IDLE_SECONDS", "300"))
+BROWSER_LEASE_TIMEOUT = float(os.getenv("BROWSER_LEASE_TIMEOUT", "60"))
+BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "true").lower() != "false"
+
+# Coalesced chat stream mode: milliseconds and characters of consecutive
+# token deltas merged into one SSE event
+SSE_COALESCE_WINDOW_MS = float(os.getenv("SSE_COALESCE_WINDOW_MS", "50"))
+SSE_COALESCE_MAX_CHARS = int(os.getenv("SSE_COALESCE_MAX_CHARS", "1024"))
+
 # Chrome Instance configuration
 CHROME_INSTANCE_PATH = os.getenv("CHROME_INSTANCE_PATH")
+
+# Workflow checkpoint storage (sqlite file, ":memory:", or empty to disable)
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
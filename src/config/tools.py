@@ -1,2 +1,35 @@
 # Tool configuration
 TAVILY_MAX_RESULTS = 5
+# Most queries one multi_search_tool call runs
+SEARCH_MAX_QUERIES = 5
+
+# Longest preview of a tool argument or result written to the debug log
+TOOL_LOG_PREVIEW_CHARS = 500
+
+# Token budget of one crawled page in a tool result, size of the chunks a
+# page is split into for relevance ranking, and images kept per page
+CRAWL_MAX_TOKENS = 4000
+CRAWL_CHUNK_TOKENS = 300
+CRAWL_MAX_IMAGES = 5
+
+# Tool calls of one agent turn run at the same time, at most this many per
+# group of tools sharing a resource. The coder's tools share the workflow's
+# directory and kernel, so its calls run one after another, in order.
+TOOL_GROUPS = {"python_repl_tool": "sandbox", "bash_tool": "sandbox"}
+TOOL_CONCURRENCY = {
+    "sandbox": 1,
+    "browser": 1,
+    "crawl_tool": 5,
+    "crawl_many_tool": 2,
+    "multi_search_tool": 3,
+}
+DEFAULT_TOOL_CONCURRENCY = 4
+# Seconds a tool call may take before the agent gets an error instead
+TOOL_TIMEOUTS = {
+    "crawl_tool": 90,
+    "crawl_many_tool": 180,
+    "multi_search_tool": 60,
+    "tavily_search": 60,
+    "browser": 900,
+}
+DEFAULT_TOOL_TIMEOUT = 300
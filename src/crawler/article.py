@@ -1,28 +1,34 @@
 import re
+from typing import Optional
 from urllib.parse import urljoin
 
 from markdownify import markdownify as md
 
+IMAGE_PATTERN = re.compile(r"!\[.*?\]\((.*?)\)")
+
 
 class Article:
     url: str
 
-    def __init__(self, title: str, html_content: str):
+    def __init__(self, title: str, html_content: str, markdown: Optional[str] = None):
         self.title = title
         self.html_content = html_content
+        # Markdown of the body; rendered on first use unless restored from
+        # the crawl cache.
+        self.markdown = markdown
 
     def to_markdown(self, including_title: bool = True) -> str:
+        if self.markdown is None:
+            self.markdown = md(self.html_content)
         markdown = ""
         if including_title:
             markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
+        markdown += self.markdown
         return markdown
 
     def to_message(self) -> list[dict]:
-        image_pattern = r"!\[.*?\]\((.*?)\)"
-
         content: list[dict[str, str]] = []
-        parts = re.split(image_pattern, self.to_markdown())
+        parts = IMAGE_PATTERN.split(self.to_markdown())
 
         for i, part in enumerate(parts):
             if i % 2 == 1:
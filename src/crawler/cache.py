@@ -0,0 +1,281 @@
+"""
+On-disk cache of crawled pages.
+
+Pages are indexed by normalized URL in a small sqlite database. The page
+contents are stored once per distinct HTML, named by its sha256: the raw
+HTML and a JSON file with the extracted `Article` (title, readable HTML and
+rendered markdown). Two URLs serving the same page share the files, and a
+cached crawl needs neither the reader service, readability nor markdownify.
+
+Entries younger than `ttl` are served as they are. Older entries are
+revalidated with the ETag / Last-Modified validators the reader returned;
+a 304 refreshes the entry without downloading or extracting the page again.
+The total size of the stored files is capped; least recently used pages
+are evicted first.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config import CRAWL_CACHE_DIR, CRAWL_CACHE_MAX_BYTES, CRAWL_CACHE_TTL
+
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of `url` for cache keys.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched: float
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating the page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlCache:
+    def __init__(self, directory: str, ttl: float = 86400, max_bytes: int = 2**29):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "pages"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched REAL NOT NULL,
+                    accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed);
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                );
+                """)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "refetched": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def lookup(self, url: str) -> tuple[Optional[CachedPage], bool]:
+        """The cached page for `url` and whether it is still fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, digest, etag, last_modified, fetched FROM pages "
+                "WHERE key = ?",
+                (normalize_url(url),),
+            ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None, False
+        page = CachedPage(*row)
+        fresh = time.time() - page.fetched <= self.ttl
+        if fresh:
+            self._count("hits")
+        return page, fresh
+
+    def load(self, page: CachedPage, url: str) -> Optional[Article]:
+        """Read the stored article of `page`, or None if its files are gone."""
+        try:
+            with open(self._path(page.digest, "json"), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET accessed = ? WHERE key = ?",
+                (time.time(), normalize_url(url)),
+            )
+        article = Article(data["title"], data["html_content"], data["markdown"])
+        article.url = url
+        return article
+
+    def revalidated(self, url: str) -> None:
+        """Mark the entry fresh again after the reader answered 304."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET fetched = ?, accessed = ? WHERE key = ?",
+                (now, now, normalize_url(url)),
+            )
+        self._count("revalidated")
+
+    def store(
+        self,
+        url: str,
+        html: str,
+        article: Article,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stale: bool = False,
+    ) -> None:
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        if not os.path.exists(self._path(digest, "json")):
+            extracted = json.dumps(
+                {
+                    "title": article.title,
+                    "html_content": article.html_content,
+                    "markdown": article.to_markdown(including_title=False),
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+            self._write(self._path(digest, "html"), raw)
+            self._write(self._path(digest, "json"), extracted)
+            size = len(raw) + len(extracted)
+        else:
+            size = None
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock, self._conn:
+            previous = self._conn.execute(
+                "SELECT digest FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if size is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?)", (digest, size)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, digest, etag, last_modified, now, now),
+            )
+            # The page changed: its old contents may no longer be referenced.
+            orphaned = previous and self._release(previous[0])
+        if orphaned:
+            self._remove_files(previous[0])
+        self._count("refetched" if stale else "writes")
+        self._evict()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = sum(
+            stats[name] for name in ("hits", "misses", "revalidated", "refetched")
+        )
+        served = stats["hits"] + stats["revalidated"]
+        stats["hit_rate"] = served / lookups if lookups else 0.0
+        with self._lock:
+            stats["entries"] = self._conn.execute(
+                "SELECT COUNT(*) FROM pages"
+            ).fetchone()[0]
+            stats["size_bytes"] = self._total_size()
+        return stats
+
+    def _evict(self) -> None:
+        removed = []
+        evicted = 0
+        with self._lock, self._conn:
+            while self._total_size() > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, digest FROM pages ORDER BY accessed LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (row[0],))
+                evicted += 1
+                if self._release(row[1]):
+                    removed.append(row[1])
+        for digest in removed:
+            self._remove_files(digest)
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _release(self, digest: str) -> bool:
+        """Drop the blob row of `digest` if no page uses it; lock held."""
+        if self._conn.execute(
+            "SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone():
+            return False
+        self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        return True
+
+    def _remove_files(self, digest: str) -> None:
+        for suffix in ("html", "json"):
+            try:
+                os.remove(self._path(digest, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _total_size(self) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+
+    def _path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.directory, "pages", digest[:2], f"{digest}.{suffix}")
+
+    def _write(self, path: str, data: bytes) -> None:
+        # Write to a temporary file first so readers never see a partial file.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+@functools.cache
+def get_crawl_cache() -> Optional[CrawlCache]:
+    """The configured crawl cache, shared by every `Crawler`."""
+    if not CRAWL_CACHE_DIR:
+        return None
+    logger.info(f"Caching crawled pages in {CRAWL_CACHE_DIR}")
+    return CrawlCache(CRAWL_CACHE_DIR, CRAWL_CACHE_TTL, CRAWL_CACHE_MAX_BYTES)
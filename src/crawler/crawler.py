@@ -1,11 +1,27 @@
+import asyncio
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import httpx
 
 from .article import Article
-from .jina_client import JinaClient
+from .cache import CachedPage, CrawlCache, get_crawl_cache
+from .jina_client import JinaClient, get_jina_client
 from .readability_extractor import ReadabilityExtractor
 
 
 class Crawler:
+    def __init__(
+        self,
+        client: Optional[JinaClient] = None,
+        extractor: Optional[ReadabilityExtractor] = None,
+        cache: Optional[CrawlCache] = None,
+    ):
+        self.client = client or get_jina_client()
+        self.extractor = extractor or ReadabilityExtractor()
+        self.cache = cache or get_crawl_cache()
+
     def crawl(self, url: str) -> Article:
         # To help LLMs better understand content, we extract clean
         # articles from HTML, convert them to markdown, and split
@@ -17,13 +33,98 @@ class Crawler:
         #
         # Instead of using Jina's own markdown converter, we'll use
         # our own solution to get better readability results.
-        jina_client = JinaClient()
-        html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
+        article, page = self._cached(url)
+        if article is not None:
+            return article
+        response = self.client.fetch(url, "html", page and page.validators())
+        if response.status_code == 304:
+            article = self._revalidated(url, page)
+            if article is not None:
+                return article
+            response = self.client.fetch(url, "html")
+        return self._process(url, response, page)
+
+    async def acrawl(self, url: str) -> Article:
+        # Cache reads and writes block; keep them off the event loop.
+        # Extraction runs in the extraction pool.
+        article, page = await asyncio.to_thread(self._cached, url)
+        if article is not None:
+            return article
+        response = await self.client.afetch(url, "html", page and page.validators())
+        if response.status_code == 304:
+            article = await asyncio.to_thread(self._revalidated, url, page)
+            if article is not None:
+                return article
+            response = await self.client.afetch(url, "html")
+        article = await self.extractor.aextract_article(response.text)
         article.url = url
+        await asyncio.to_thread(self._store, url, response, article, page)
         return article
 
+    async def crawl_many(self, urls: list[str]) -> list[Article | Exception]:
+        """Crawl `urls` concurrently.
+
+        Results are in the order of `urls`; a URL that failed yields its
+        exception instead of an article.
+        """
+        return await asyncio.gather(
+            *(self.acrawl(url) for url in urls), return_exceptions=True
+        )
+
+    def crawl_many_sync(self, urls: list[str]) -> list[Article | Exception]:
+        """`crawl_many` for callers without an event loop, on threads."""
+
+        def crawl(url: str) -> Article | Exception:
+            try:
+                return self.crawl(url)
+            except Exception as e:
+                return e
+
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(urls), 16)) as pool:
+            return list(pool.map(crawl, urls))
+
+    def _cached(self, url: str) -> tuple[Optional[Article], Optional[CachedPage]]:
+        """A fresh cached article, or the stale entry to revalidate."""
+        if self.cache is None:
+            return None, None
+        page, fresh = self.cache.lookup(url)
+        if page is not None and fresh:
+            return self.cache.load(page, url), page
+        return None, page
+
+    def _revalidated(self, url: str, page: Optional[CachedPage]) -> Optional[Article]:
+        article = self.cache.load(page, url) if page else None
+        if article is not None:
+            self.cache.revalidated(url)
+        return article
+
+    def _process(
+        self, url: str, response: httpx.Response, page: Optional[CachedPage]
+    ) -> Article:
+        article = self.extractor.extract_article(response.text)
+        article.url = url
+        self._store(url, response, article, page)
+        return article
+
+    def _store(
+        self,
+        url: str,
+        response: httpx.Response,
+        article: Article,
+        page: Optional[CachedPage],
+    ) -> None:
+        if self.cache is not None:
+            self.cache.store(
+                url,
+                response.text,
+                article,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+                stale=page is not None,
+            )
+
 
 if __name__ == "__main__":
     if len(sys.argv) == 2:
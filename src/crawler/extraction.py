@@ -0,0 +1,188 @@
+"""
+Article extraction off the calling thread.
+
+Readability extraction and markdown conversion are CPU bound. Large pages
+are sent to a pool of worker processes, so crawls use every core and an
+async graph run never blocks its event loop on them. Pages smaller than
+`inline_chars` skip the pool and go through readabilipy's pure-Python
+extractor in the calling process, which avoids both the process hop and
+the node subprocess Readability.js needs.
+
+At most `max_workers + max_queue` pages are submitted at once; beyond
+that `ExtractionQueueFull` is raised instead of letting work pile up. A
+page that takes longer than `timeout` raises `TimeoutError`. Pages that
+have not started yet when their caller times out or is cancelled are
+dropped from the queue. A page that has started cannot be interrupted, so
+the pool is recycled: its workers are killed and later pages go to fresh
+ones. Pages that were on the killed workers are submitted again within
+their own deadline.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import logging
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from src.config import (
+    CRAWL_EXTRACT_INLINE_CHARS,
+    CRAWL_EXTRACT_QUEUE,
+    CRAWL_EXTRACT_TIMEOUT,
+    CRAWL_EXTRACT_WORKERS,
+)
+
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionQueueFull(RuntimeError):
+    """Raised when too many pages are already waiting for extraction."""
+
+
+def extract_html(html: str, use_readability: bool = True) -> tuple:
+    """Extract the article of `html`: (title, readable HTML, markdown).
+
+    Runs in the worker processes, so it only returns plain values.
+    """
+    from readabilipy import simple_json_from_html_string
+
+    article = simple_json_from_html_string(html, use_readability=use_readability)
+    article = Article(title=article.get("title"), html_content=article.get("content"))
+    return article.title, article.html_content, article.to_markdown(False)
+
+
+class ExtractionPool:
+    # Runs in the workers; a module-level function, so it can be pickled.
+    _worker = staticmethod(extract_html)
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 32,
+        timeout: float = 60,
+        inline_chars: int = 20000,
+        use_readability: bool = True,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.inline_chars = inline_chars
+        self.use_readability = use_readability
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def extract(self, html: str) -> Article:
+        if self._inline(html):
+            return _article(extract_html(html, use_readability=False))
+        if not self.max_workers:
+            return _article(extract_html(html, self.use_readability))
+        deadline = time.monotonic() + self.timeout
+        for retry in (False, True):
+            executor, future = self._submit(html)
+            try:
+                return _article(future.result(max(deadline - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                if not future.cancel() and future.running():
+                    self._recycle(executor)
+                raise TimeoutError(f"Article extraction took over {self.timeout}s")
+            except BrokenProcessPool:
+                # Workers recycled for another page, or one that crashed.
+                self._recycle(executor)
+                if retry or time.monotonic() >= deadline:
+                    raise
+
+    async def aextract(self, html: str) -> Article:
+        if self._inline(html):
+            return _article(
+                await asyncio.to_thread(extract_html, html, use_readability=False)
+            )
+        if not self.max_workers:
+            return _article(
+                await asyncio.to_thread(extract_html, html, self.use_readability)
+            )
+        deadline = time.monotonic() + self.timeout
+        for retry in (False, True):
+            executor, future = self._submit(html)
+            # Cancelling the wrapper (timeout or caller cancellation) cancels
+            # the submitted page if no worker has picked it up yet.
+            try:
+                return _article(
+                    await asyncio.wait_for(
+                        asyncio.wrap_future(future),
+                        max(deadline - time.monotonic(), 0),
+                    )
+                )
+            except asyncio.TimeoutError:
+                if not future.cancel() and future.running():
+                    self._recycle(executor)
+                raise TimeoutError(f"Article extraction took over {self.timeout}s")
+            except BrokenProcessPool:
+                self._recycle(executor)
+                if retry or time.monotonic() >= deadline:
+                    raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _inline(self, html: str) -> bool:
+        return len(html) < self.inline_chars
+
+    def _submit(self, html: str) -> tuple[ProcessPoolExecutor, Future]:
+        if not self._slots.acquire(blocking=False):
+            raise ExtractionQueueFull("Too many pages are waiting for extraction")
+        try:
+            executor = self._pool()
+            future = executor.submit(self._worker, html, self.use_readability)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return executor, future
+
+    def _recycle(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of `executor` unless it was replaced already."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logger.warning("Killing stuck article extraction workers")
+        # The executor has no public way to stop a running call.
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False)
+        for process in processes:
+            process.kill()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs threads (the server, HTTP
+                # clients) is unsafe; start clean interpreters instead.
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+
+def _article(extracted: tuple) -> Article:
+    title, html_content, markdown = extracted
+    return Article(title=title, html_content=html_content, markdown=markdown)
+
+
+@functools.cache
+def get_extraction_pool() -> ExtractionPool:
+    """The extraction pool shared by every `ReadabilityExtractor`."""
+    return ExtractionPool(
+        CRAWL_EXTRACT_WORKERS,
+        CRAWL_EXTRACT_QUEUE,
+        CRAWL_EXTRACT_TIMEOUT,
+        CRAWL_EXTRACT_INLINE_CHARS,
+    )
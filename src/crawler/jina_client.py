@@ -1,23 +1,148 @@
+import asyncio
+import functools
 import logging
 import os
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
 
-import requests
+import httpx
+
+from src.config import (
+    CRAWLER_MAX_CONNECTIONS,
+    CRAWLER_PER_HOST_CONCURRENCY,
+    CRAWLER_READER_URL,
+    CRAWLER_TIMEOUT,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class _LoopClient:
+    """Async client and per-host limits bound to one event loop."""
+
+    def __init__(self, client: httpx.AsyncClient, per_host: int):
+        self.client = client
+        self.hosts = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+
 class JinaClient:
-    def crawl(self, url: str, return_format: str = "html") -> str:
-        headers = {
-            "Content-Type": "application/json",
-            "X-Return-Format": return_format,
-        }
+    """Fetch pages through the Jina reader (or a compatible endpoint).
+
+    Connections to the reader are pooled and kept alive: sync callers share
+    one `httpx.Client`, async callers one `httpx.AsyncClient` per event
+    loop. At most `per_host_concurrency` requests per crawled site are in
+    flight at once, so a batch of links from one site is not fetched all
+    at the same time.
+    """
+
+    def __init__(
+        self,
+        reader_url: str = CRAWLER_READER_URL,
+        timeout: float = CRAWLER_TIMEOUT,
+        max_connections: int = CRAWLER_MAX_CONNECTIONS,
+        per_host_concurrency: int = CRAWLER_PER_HOST_CONCURRENCY,
+    ):
+        self.reader_url = reader_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.per_host_concurrency = per_host_concurrency
+        self._client: httpx.Client | None = None
+        self._loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._host_limits = defaultdict(
+            lambda: threading.BoundedSemaphore(per_host_concurrency)
+        )
+        self._lock = threading.Lock()
+        self._headers = {"Content-Type": "application/json"}
         if os.getenv("JINA_API_KEY"):
-            headers["Authorization"] = f"Bearer {os.getenv('JINA_API_KEY')}"
-        else:
+            self._headers["Authorization"] = f"Bearer {os.getenv('JINA_API_KEY')}"
+        elif urlparse(reader_url).hostname == "r.jina.ai":
             logger.warning(
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
-        data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        response = self.fetch(url, return_format)
+        return response.text
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        response = await self.afetch(url, return_format)
         return response.text
+
+    def fetch(
+        self, url: str, return_format: str = "html", headers: dict | None = None
+    ) -> httpx.Response:
+        """Fetch `url`; `headers` can carry conditional request validators."""
+        with self._host_limit(url):
+            response = self._sync_client().post(
+                self.reader_url,
+                headers=self._request_headers(return_format, headers),
+                json={"url": url},
+            )
+        return self._checked(response)
+
+    async def afetch(
+        self, url: str, return_format: str = "html", headers: dict | None = None
+    ) -> httpx.Response:
+        loop_client = self._loop_client()
+        async with loop_client.hosts[urlparse(url).netloc]:
+            response = await loop_client.client.post(
+                self.reader_url,
+                headers=self._request_headers(return_format, headers),
+                json={"url": url},
+            )
+        return self._checked(response)
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        loop_client = self._loop_clients.pop(asyncio.get_running_loop(), None)
+        if loop_client is not None:
+            await loop_client.client.aclose()
+
+    def _checked(self, response: httpx.Response) -> httpx.Response:
+        # 304 answers a conditional request from the crawl cache.
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _request_headers(self, return_format: str, headers: dict | None) -> dict:
+        return {**self._headers, "X-Return-Format": return_format, **(headers or {})}
+
+    def _sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self.limits)
+            return self._client
+
+    def _loop_client(self) -> _LoopClient:
+        loop = asyncio.get_running_loop()
+        loop_client = self._loop_clients.get(loop)
+        if loop_client is None:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            loop_client = self._loop_clients[loop] = _LoopClient(
+                client, self.per_host_concurrency
+            )
+        return loop_client
+
+    @contextmanager
+    def _host_limit(self, url: str):
+        with self._lock:
+            limit = self._host_limits[urlparse(url).netloc]
+        with limit:
+            yield
+
+
+@functools.cache
+def get_jina_client() -> JinaClient:
+    """The client shared by every crawler, so connections are reused."""
+    return JinaClient()
@@ -1,12 +1,15 @@
-from readabilipy import simple_json_from_html_string
+from typing import Optional
 
 from .article import Article
+from .extraction import ExtractionPool, get_extraction_pool
 
 
 class ReadabilityExtractor:
+    def __init__(self, pool: Optional[ExtractionPool] = None):
+        self.pool = pool or get_extraction_pool()
+
     def extract_article(self, html: str) -> Article:
-        article = simple_json_from_html_string(html, use_readability=True)
-        return Article(
-            title=article.get("title"),
-            html_content=article.get("content"),
-        )
+        return self.pool.extract(html)
+
+    async def aextract_article(self, html: str) -> Article:
+        return await self.pool.aextract(html)
@@ -0,0 +1,194 @@
+"""
+Token-budgeted rendering of crawled articles into LLM message content.
+
+The markdown of an article is split into chunks that follow its sections:
+every chunk stays within one section, starts with that section's heading
+and holds whole paragraphs up to `chunk_tokens`. When the page does not
+fit in `max_tokens`, the chunks are ranked by BM25 relevance to the
+research query and the best ones that fit are kept, in page order, with a
+note saying how much was left out. Without a query the beginning of the
+page is kept. Images are resolved against the page URL, deduplicated and
+capped at `max_images`.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from urllib.parse import urljoin
+
+from src.config.tools import CRAWL_CHUNK_TOKENS, CRAWL_MAX_IMAGES, CRAWL_MAX_TOKENS
+from src.prompts.compaction import IMAGE_TOKENS, estimate_tokens
+
+from .article import IMAGE_PATTERN, Article
+
+_HEADING = re.compile(r"^#{1,6}\s")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Latin words and single CJK characters, so Chinese queries match too.
+_TERM = re.compile(r"[^\W_]+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def _terms(text: str) -> list[str]:
+    terms = []
+    for word in _TERM.findall(text.lower()):
+        if _CJK.search(word):
+            terms.extend(word)
+        else:
+            terms.append(word)
+    return terms
+
+
+@dataclass
+class Chunk:
+    index: int
+    text: str
+    tokens: int
+    score: float = 0.0
+
+
+def _pieces(paragraph: str, chunk_tokens: int) -> Iterator[str]:
+    """`paragraph`, cut at line breaks or else hard-wrapped if it is too big."""
+    if estimate_tokens(paragraph) <= chunk_tokens:
+        yield paragraph
+        return
+    piece = ""
+    for line in paragraph.splitlines():
+        while estimate_tokens(line) > chunk_tokens:
+            width = max(len(line) * chunk_tokens // estimate_tokens(line), 1)
+            if piece:
+                yield piece
+                piece = ""
+            yield line[:width]
+            line = line[width:]
+        if piece and estimate_tokens(piece + line) > chunk_tokens:
+            yield piece
+            piece = ""
+        piece = f"{piece}\n{line}" if piece else line
+    if piece:
+        yield piece
+
+
+def split_chunks(markdown: str, chunk_tokens: int = CRAWL_CHUNK_TOKENS) -> list[Chunk]:
+    """Split `markdown` into section-aware chunks of about `chunk_tokens`."""
+    chunks: list[Chunk] = []
+    heading = ""
+    paragraphs: list[str] = []
+    used = 0
+
+    def flush():
+        nonlocal paragraphs, used
+        if paragraphs:
+            text = "\n\n".join(paragraphs)
+            if heading and not text.startswith(heading):
+                text = f"{heading}\n\n{text}"
+            images = len(IMAGE_PATTERN.findall(text))
+            tokens = estimate_tokens(IMAGE_PATTERN.sub("", text))
+            chunks.append(Chunk(len(chunks), text, tokens + IMAGE_TOKENS * images))
+        paragraphs, used = [], 0
+
+    for paragraph in _PARAGRAPH_BREAK.split(markdown):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if _HEADING.match(paragraph):
+            flush()
+            heading = paragraph.splitlines()[0]
+        for piece in _pieces(paragraph, chunk_tokens):
+            cost = estimate_tokens(piece)
+            if paragraphs and used + cost > chunk_tokens:
+                flush()
+            paragraphs.append(piece)
+            used += cost
+    flush()
+    return chunks
+
+
+def rank_chunks(chunks: list[Chunk], query: str) -> None:
+    """Score `chunks` by BM25 relevance to `query`."""
+    query_terms = set(_terms(query))
+    if not query_terms or not chunks:
+        return
+    counts = [Counter(_terms(chunk.text)) for chunk in chunks]
+    lengths = [sum(count.values()) for count in counts]
+    average = sum(lengths) / len(chunks) or 1
+    for term in query_terms:
+        frequency = sum(1 for count in counts if term in count)
+        if not frequency:
+            continue
+        idf = math.log(1 + (len(chunks) - frequency + 0.5) / (frequency + 0.5))
+        for chunk, count, length in zip(chunks, counts, lengths):
+            tf = count[term]
+            if tf:
+                chunk.score += (
+                    idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / average))
+                )
+
+
+class ArticleRenderer:
+    def __init__(
+        self,
+        max_tokens: Optional[int] = CRAWL_MAX_TOKENS,
+        chunk_tokens: int = CRAWL_CHUNK_TOKENS,
+        max_images: Optional[int] = CRAWL_MAX_IMAGES,
+        dedup_images: bool = True,
+    ):
+        self.max_tokens = max_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_images = max_images
+        self.dedup_images = dedup_images
+
+    def render(self, article: Article, query: str = "") -> list[dict]:
+        return list(self.iter_blocks(article, query))
+
+    def iter_blocks(self, article: Article, query: str = "") -> Iterator[dict]:
+        """Yield the text and image blocks of `article`, in page order."""
+        title = f"# {article.title}"
+        chunks = split_chunks(article.to_markdown(False), self.chunk_tokens)
+        selected = self._select(chunks, query, estimate_tokens(title))
+        url = getattr(article, "url", None) or ""
+        seen: set[str] = set()
+        images = 0
+        text = [title]
+        for chunk in selected:
+            parts = IMAGE_PATTERN.split(chunk.text)
+            for i, part in enumerate(parts):
+                if i % 2 == 0:
+                    if part.strip():
+                        text.append(part.strip())
+                    continue
+                image_url = urljoin(url, part.strip())
+                if self.dedup_images and image_url in seen:
+                    continue
+                if self.max_images is not None and images >= self.max_images:
+                    continue
+                seen.add(image_url)
+                images += 1
+                if text:
+                    yield {"type": "text", "text": "\n\n".join(text)}
+                yield {"type": "image_url", "image_url": {"url": image_url}}
+                text = []
+        if len(selected) < len(chunks):
+            text.append(
+                f"[{len(chunks) - len(selected)} of {len(chunks)} parts of the "
+                "page omitted to fit the context budget]"
+            )
+        if text:
+            yield {"type": "text", "text": "\n\n".join(text)}
+
+    def _select(self, chunks: list[Chunk], query: str, used: int) -> list[Chunk]:
+        if self.max_tokens is None:
+            return chunks
+        budget = self.max_tokens - used
+        if sum(chunk.tokens for chunk in chunks) <= budget:
+            return chunks
+        rank_chunks(chunks, query)
+        selected = []
+        # Most relevant first; the page order breaks ties, so without a
+        # query the beginning of the page is kept.
+        for chunk in sorted(chunks, key=lambda chunk: (-chunk.score, chunk.index)):
+            if chunk.tokens <= budget:
+                selected.append(chunk)
+                budget -= chunk.tokens
+        return sorted(selected, key=lambda chunk: chunk.index)
@@ -1,26 +1,70 @@
+from typing import Callable, get_args, get_type_hints
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START
+from langgraph.utils.runnable import RunnableCallable
 
 from .types import State
 from .nodes import (
     supervisor_node,
+    asupervisor_node,
     research_node,
+    aresearch_node,
     code_node,
+    acode_node,
     coordinator_node,
+    acoordinator_node,
     browser_node,
+    abrowser_node,
     reporter_node,
+    areporter_node,
     planner_node,
+    aplanner_node,
+    parallel_supervisor_node,
 )
 
 
-def build_graph():
-    """Build and return the agent workflow graph."""
+def _add_node(
+    builder: StateGraph, name: str, func: Callable, afunc: Callable | None = None
+):
+    """Register a node with both its sync and async implementations.
+
+    `graph.invoke` runs `func`, while `graph.ainvoke`/`astream_events` await
+    `afunc` directly instead of pushing `func` onto the default thread pool.
+    Nodes that do no I/O may omit `afunc` and then run inline on the loop.
+    """
+    # Routing targets are read from the `Command[Literal[...]]` return hint,
+    # which langgraph cannot see through the wrapping runnable.
+    destinations = get_args(get_args(get_type_hints(func)["return"])[0])
+    builder.add_node(
+        name,
+        RunnableCallable(func, afunc, name=name, trace=False),
+        destinations=destinations,
+    )
+
+
+def build_graph(
+    parallel: bool = False, checkpointer: BaseCheckpointSaver | None = None
+):
+    """Build and return the agent workflow graph.
+
+    Args:
+        parallel: If True, the supervisor follows the plan's step
+            dependencies and fans independent steps out to the workers
+            concurrently instead of asking the LLM for one agent at a time.
+        checkpointer: Saver that persists the state after every step, so a
+            run can be resumed by its `thread_id` after an interruption.
+    """
     builder = StateGraph(State)
     builder.add_edge(START, "coordinator")
-    builder.add_node("coordinator", coordinator_node)
-    builder.add_node("planner", planner_node)
-    builder.add_node("supervisor", supervisor_node)
-    builder.add_node("researcher", research_node)
-    builder.add_node("coder", code_node)
-    builder.add_node("browser", browser_node)
-    builder.add_node("reporter", reporter_node)
-    return builder.compile()
+    _add_node(builder, "coordinator", coordinator_node, acoordinator_node)
+    _add_node(builder, "planner", planner_node, aplanner_node)
+    if parallel:
+        _add_node(builder, "supervisor", parallel_supervisor_node)
+    else:
+        _add_node(builder, "supervisor", supervisor_node, asupervisor_node)
+    _add_node(builder, "researcher", research_node, aresearch_node)
+    _add_node(builder, "coder", code_node, acode_node)
+    _add_node(builder, "browser", browser_node, abrowser_node)
+    _add_node(builder, "reporter", reporter_node, areporter_node)
+    return builder.compile(checkpointer=checkpointer)
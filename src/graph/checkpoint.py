@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteCheckpointSaver(SqliteSaver):
+    """File-backed checkpoint saver usable from both `invoke` and `astream`.
+
+    `SqliteSaver` only implements the sync interface and `AsyncSqliteSaver`
+    is bound to the event loop it was created on, which does not work for a
+    graph compiled once at import time. This saver keeps one thread-safe
+    sqlite connection and runs the sync methods in a worker thread for the
+    async interface, so the same compiled graph serves any loop.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(sqlite3.connect(path, check_same_thread=False), **kwargs)
+        self.path = path
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+
+def create_checkpointer(location: str | None) -> BaseCheckpointSaver | None:
+    """Create the checkpoint saver configured by `location`.
+
+    Args:
+        location: Path of the sqlite database, `:memory:` for an in-process
+            saver, or an empty value to disable checkpointing.
+    """
+    if not location:
+        return None
+    if location == ":memory:":
+        return MemorySaver()
+    logger.info(f"Checkpointing workflows to {location}")
+    return SqliteCheckpointSaver(location)
@@ -2,37 +2,62 @@ import logging
 import json
 from copy import deepcopy
 from typing import Literal
-from langchain_core.messages import HumanMessage
-from langgraph.types import Command
+from langchain_core.callbacks.manager import (
+    adispatch_custom_event,
+    dispatch_custom_event,
+)
+from langchain_core.messages import BaseMessage, HumanMessage
+from langgraph.types import Command, Send
 from langgraph.graph import END
 
-from src.agents import research_agent, coder_agent, browser_agent
+from src.agents import get_agent
+from src.agents.cascade import get_cascade
 from src.agents.llm import get_llm_by_type
 from src.config import TEAM_MEMBERS
-from src.config.agents import AGENT_LLM_MAP
+from src.config.agents import AGENT_LLM_MAP, LLMType
 from src.prompts.template import apply_prompt_template
-from src.tools.search import tavily_tool
-from .types import State, Router
+from .plan_parser import PlanParseError, StreamingPlanParser
+from .routing import supervisor_router
+from .types import OPTIONS, State, Router
 
 logger = logging.getLogger(__name__)
 
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 
 
-def research_node(state: State) -> Command[Literal["supervisor"]]:
-    """Node for the researcher agent that performs research tasks."""
-    logger.info("Research agent starting task")
-    result = research_agent.invoke(state)
-    logger.info("Research agent completed task")
-    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+def _agent_input(state: State) -> State:
+    """Add the assigned step as an explicit instruction in parallel mode."""
+    if state.get("current_step") is None:
+        return state
+    step = state["plan_steps"][state["current_step"]]
+    instruction = f"Execute step {state['current_step'] + 1}: {step['title']}\n\n{step['description']}"
+    if step.get("note"):
+        instruction += f"\n\nNote: {step['note']}"
+    return {
+        **state,
+        "messages": [
+            *state["messages"],
+            HumanMessage(content=instruction, name="supervisor"),
+        ],
+    }
+
+
+def _agent_command(
+    agent_name: str, content: str, state: State
+) -> Command[Literal["supervisor"]]:
+    """Wrap an agent's final answer and hand control back to the supervisor."""
+    if state.get("current_step") is not None:
+        # The dispatcher merges parallel results into `messages` in plan order.
+        return Command(
+            update={"step_results": {state["current_step"]: content}},
+            goto="supervisor",
+        )
     return Command(
         update={
             "messages": [
                 HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "researcher", result["messages"][-1].content
-                    ),
-                    name="researcher",
+                    content=RESPONSE_FORMAT.format(agent_name, content),
+                    name=agent_name,
                 )
             ]
         },
@@ -40,57 +65,63 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
     )
 
 
+def research_node(state: State) -> Command[Literal["supervisor"]]:
+    """Node for the researcher agent that performs research tasks."""
+    logger.info("Research agent starting task")
+    result = get_agent("researcher").invoke(_agent_input(state))
+    logger.info("Research agent completed task")
+    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+    return _agent_command("researcher", result["messages"][-1].content, state)
+
+
+async def aresearch_node(state: State) -> Command[Literal["supervisor"]]:
+    """Async counterpart of `research_node`."""
+    logger.info("Research agent starting task")
+    result = await get_agent("researcher").ainvoke(_agent_input(state))
+    logger.info("Research agent completed task")
+    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+    return _agent_command("researcher", result["messages"][-1].content, state)
+
+
 def code_node(state: State) -> Command[Literal["supervisor"]]:
     """Node for the coder agent that executes Python code."""
     logger.info("Code agent starting task")
-    result = coder_agent.invoke(state)
+    result = get_agent("coder").invoke(_agent_input(state))
     logger.info("Code agent completed task")
     logger.debug(f"Code agent response: {result['messages'][-1].content}")
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "coder", result["messages"][-1].content
-                    ),
-                    name="coder",
-                )
-            ]
-        },
-        goto="supervisor",
-    )
+    return _agent_command("coder", result["messages"][-1].content, state)
+
+
+async def acode_node(state: State) -> Command[Literal["supervisor"]]:
+    """Async counterpart of `code_node`."""
+    logger.info("Code agent starting task")
+    result = await get_agent("coder").ainvoke(_agent_input(state))
+    logger.info("Code agent completed task")
+    logger.debug(f"Code agent response: {result['messages'][-1].content}")
+    return _agent_command("coder", result["messages"][-1].content, state)
 
 
 def browser_node(state: State) -> Command[Literal["supervisor"]]:
     """Node for the browser agent that performs web browsing tasks."""
     logger.info("Browser agent starting task")
-    result = browser_agent.invoke(state)
+    result = get_agent("browser").invoke(_agent_input(state))
     logger.info("Browser agent completed task")
     logger.debug(f"Browser agent response: {result['messages'][-1].content}")
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "browser", result["messages"][-1].content
-                    ),
-                    name="browser",
-                )
-            ]
-        },
-        goto="supervisor",
-    )
+    return _agent_command("browser", result["messages"][-1].content, state)
 
 
-def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
-    """Supervisor node that decides which agent should act next."""
-    logger.info("Supervisor evaluating next action")
-    messages = apply_prompt_template("supervisor", state)
-    response = (
-        get_llm_by_type(AGENT_LLM_MAP["supervisor"])
-        .with_structured_output(Router)
-        .invoke(messages)
-    )
+async def abrowser_node(state: State) -> Command[Literal["supervisor"]]:
+    """Async counterpart of `browser_node`."""
+    logger.info("Browser agent starting task")
+    result = await get_agent("browser").ainvoke(_agent_input(state))
+    logger.info("Browser agent completed task")
+    logger.debug(f"Browser agent response: {result['messages'][-1].content}")
+    return _agent_command("browser", result["messages"][-1].content, state)
+
+
+def _supervisor_command(
+    state: State, response: Router
+) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     goto = response["next"]
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Supervisor response: {response}")
@@ -104,54 +135,171 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     return Command(goto=goto, update={"next": goto})
 
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
-    """Planner node that generate the full plan."""
-    logger.info("Planner generating full plan")
-    messages = apply_prompt_template("planner", state)
+def _valid_route(response) -> bool:
+    """Whether a structured supervisor answer names a known next hop."""
+    return isinstance(response, dict) and response.get("next") in OPTIONS
+
+
+def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    """Supervisor node that decides which agent should act next."""
+    logger.info("Supervisor evaluating next action")
+    goto = supervisor_router.route(state)
+    if goto is not None:
+        return _supervisor_command(state, {"next": goto})
+    messages = apply_prompt_template("supervisor", state)
+    response = get_cascade("supervisor").invoke(
+        lambda llm: llm.with_structured_output(Router).invoke(messages), _valid_route
+    )
+    supervisor_router.remember(state, response["next"])
+    return _supervisor_command(state, response)
+
+
+async def asupervisor_node(
+    state: State,
+) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    """Async counterpart of `supervisor_node`."""
+    logger.info("Supervisor evaluating next action")
+    goto = supervisor_router.route(state)
+    if goto is not None:
+        return _supervisor_command(state, {"next": goto})
+    messages = apply_prompt_template("supervisor", state)
+    response = await get_cascade("supervisor").ainvoke(
+        lambda llm: llm.with_structured_output(Router).ainvoke(messages), _valid_route
+    )
+    supervisor_router.remember(state, response["next"])
+    return _supervisor_command(state, response)
+
+
+def _planner_llm_type(state: State) -> LLMType:
     # whether to enable deep thinking mode
-    llm = get_llm_by_type("basic")
     if state.get("deep_thinking_mode"):
-        llm = get_llm_by_type("reasoning")
-    if state.get("search_before_planning"):
-        searched_content = tavily_tool.invoke({"query": state["messages"][-1].content})
-        messages = deepcopy(messages)
-        messages[
-            -1
-        ].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
-    stream = llm.stream(messages)
-    full_response = ""
-    for chunk in stream:
-        full_response += chunk.content
-    logger.debug(f"Current state messages: {state['messages']}")
-    logger.debug(f"Planner response: {full_response}")
+        return "reasoning"
+    return "basic"
+
+
+def _search_before_planning(state: State):
+    """The shared search and the queries for the user's question."""
+    # Imported on first use, like the agent tools.
+    from src.search import get_multi_search, reformulate
 
-    if full_response.startswith("```json"):
-        full_response = full_response.removeprefix("```json")
+    return get_multi_search(), reformulate(state["messages"][-1].content)
 
-    if full_response.endswith("```"):
-        full_response = full_response.removesuffix("```")
+
+def _with_search_results(messages: list, searched_content: list) -> list:
+    messages = deepcopy(messages)
+    # The results go to the user's turn, before the trailing system message
+    # of the prompt cache layout.
+    last = next(
+        message
+        for message in reversed(messages)
+        if isinstance(message, BaseMessage) and message.type != "system"
+    )
+    last.content += f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
+    return messages
+
+
+def _planner_command(
+    state: State, full_response: str, plan: dict | None
+) -> Command[Literal["supervisor", "__end__"]]:
+    logger.debug(f"Current state messages: {state['messages']}")
+    logger.debug(f"Planner response: {full_response}")
 
     goto = "supervisor"
-    try:
-        json.loads(full_response)
-    except json.JSONDecodeError:
-        logger.warning("Planner response is not a valid JSON")
+    if plan is None:
         goto = "__end__"
 
     return Command(
         update={
             "messages": [HumanMessage(content=full_response, name="planner")],
             "full_plan": full_response,
+            "plan_steps": plan["steps"] if plan else [],
         },
         goto=goto,
     )
 
 
-def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
-    """Coordinator node that communicate with customers."""
-    logger.info("Coordinator talking.")
-    messages = apply_prompt_template("coordinator", state)
-    response = get_llm_by_type(AGENT_LLM_MAP["coordinator"]).invoke(messages)
+def _stream_plan(llm, messages: list) -> tuple[str, dict | None]:
+    """The planner's response and its plan, None if it is not a valid plan."""
+    parser = StreamingPlanParser()
+    chunks = []
+    plan = None
+    stream = llm.stream(messages)
+    try:
+        for chunk in stream:
+            chunks.append(chunk.content)
+            for step in parser.feed(chunk.content):
+                dispatch_custom_event("plan_step", _plan_step_event(parser, step))
+        plan = parser.close()
+    except PlanParseError as e:
+        # Stop paying for tokens as soon as the plan cannot be valid anymore.
+        logger.warning(f"Planner response is not a valid plan: {e}")
+    finally:
+        stream.close()
+    return parser.text if plan else "".join(chunks), plan
+
+
+async def _astream_plan(llm, messages: list) -> tuple[str, dict | None]:
+    """Async counterpart of `_stream_plan`."""
+    parser = StreamingPlanParser()
+    chunks = []
+    plan = None
+    stream = llm.astream(messages)
+    try:
+        async for chunk in stream:
+            chunks.append(chunk.content)
+            for step in parser.feed(chunk.content):
+                await adispatch_custom_event(
+                    "plan_step", _plan_step_event(parser, step)
+                )
+        plan = parser.close()
+    except PlanParseError as e:
+        # Stop paying for tokens as soon as the plan cannot be valid anymore.
+        logger.warning(f"Planner response is not a valid plan: {e}")
+    finally:
+        await stream.aclose()
+    return parser.text if plan else "".join(chunks), plan
+
+
+def _has_plan(response: tuple[str, dict | None]) -> bool:
+    return response[1] is not None
+
+
+def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+    """Planner node that generate the full plan."""
+    logger.info("Planner generating full plan")
+    messages = apply_prompt_template("planner", state)
+    if state.get("search_before_planning"):
+        search, queries = _search_before_planning(state)
+        searched_content = search.search(queries)
+        messages = _with_search_results(messages, searched_content)
+    full_response, plan = get_cascade("planner", _planner_llm_type(state)).invoke(
+        lambda llm: _stream_plan(llm, messages), _has_plan
+    )
+    return _planner_command(state, full_response, plan)
+
+
+async def aplanner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+    """Async counterpart of `planner_node`."""
+    logger.info("Planner generating full plan")
+    messages = apply_prompt_template("planner", state)
+    if state.get("search_before_planning"):
+        search, queries = _search_before_planning(state)
+        searched_content = await search.asearch(queries)
+        messages = _with_search_results(messages, searched_content)
+    full_response, plan = await get_cascade(
+        "planner", _planner_llm_type(state)
+    ).ainvoke(lambda llm: _astream_plan(llm, messages), _has_plan)
+    return _planner_command(state, full_response, plan)
+
+
+def _plan_step_event(parser: StreamingPlanParser, step: dict) -> dict:
+    """Payload of the `plan_step` custom event emitted while the plan streams."""
+    return {"index": len(parser.steps) - 1, "step": step}
+
+
+def _coordinator_command(
+    state: State, response
+) -> Command[Literal["planner", "__end__"]]:
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"reporter response: {response}")
 
@@ -164,22 +312,121 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     )
 
 
+def _clean_handoff(response) -> bool:
+    """Whether a coordinator reply is either a bare handoff or a plain answer.
+
+    The stream hides replies that start with the handoff; a handoff anywhere
+    else would show the call to the user and still start the planner.
+    """
+    content = response.content
+    if not content.strip():
+        return False
+    return "handoff_to_planner" not in content or content.startswith(
+        "handoff_to_planner"
+    )
+
+
+def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+    """Coordinator node that communicate with customers."""
+    logger.info("Coordinator talking.")
+    messages = apply_prompt_template("coordinator", state)
+    response = get_cascade("coordinator").invoke(
+        lambda llm: llm.invoke(messages), _clean_handoff
+    )
+    return _coordinator_command(state, response)
+
+
+async def acoordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+    """Async counterpart of `coordinator_node`."""
+    logger.info("Coordinator talking.")
+    messages = apply_prompt_template("coordinator", state)
+    response = await get_cascade("coordinator").ainvoke(
+        lambda llm: llm.ainvoke(messages), _clean_handoff
+    )
+    return _coordinator_command(state, response)
+
+
 def reporter_node(state: State) -> Command[Literal["supervisor"]]:
     """Reporter node that write a final report."""
     logger.info("Reporter write final report")
-    messages = apply_prompt_template("reporter", state)
+    messages = apply_prompt_template("reporter", _agent_input(state))
     response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(messages)
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"reporter response: {response}")
+    return _agent_command("reporter", response.content, state)
+
+
+async def areporter_node(state: State) -> Command[Literal["supervisor"]]:
+    """Async counterpart of `reporter_node`."""
+    logger.info("Reporter write final report")
+    messages = apply_prompt_template("reporter", _agent_input(state))
+    response = await get_llm_by_type(AGENT_LLM_MAP["reporter"]).ainvoke(messages)
+    logger.debug(f"Current state messages: {state['messages']}")
+    logger.debug(f"reporter response: {response}")
+    return _agent_command("reporter", response.content, state)
 
+
+def _step_dependencies(steps: list[dict]) -> list[set[int]]:
+    """Zero-based prerequisites of every plan step.
+
+    Steps without `depends_on` wait for all earlier steps, and the reporter
+    always does, so plans written without dependencies keep running in order.
+    """
+    dependencies = []
+    for index, step in enumerate(steps):
+        depends_on = step.get("depends_on")
+        if depends_on is None or step["agent_name"] == "reporter":
+            dependencies.append(set(range(index)))
+        else:
+            dependencies.append({dep - 1 for dep in depends_on if 0 < dep <= index})
+    return dependencies
+
+
+def parallel_supervisor_node(
+    state: State,
+) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    """Dispatch every plan step whose dependencies are met, all at once.
+
+    Results of the previous batch are appended to `messages` in plan order
+    before the next batch is sent, so the history does not depend on which
+    worker finished first.
+    """
+    steps = state.get("plan_steps") or []
+    results = state.get("step_results") or {}
+    merged = list(state.get("merged_steps") or [])
+
+    new_messages = []
+    for index in sorted(set(results) - set(merged)):
+        agent_name = steps[index]["agent_name"]
+        new_messages.append(
+            HumanMessage(
+                content=RESPONSE_FORMAT.format(agent_name, results[index]),
+                name=agent_name,
+            )
+        )
+        merged.append(index)
+
+    dependencies = _step_dependencies(steps)
+    pending = [index for index in range(len(steps)) if index not in results]
+    ready = [index for index in pending if dependencies[index] <= results.keys()]
+    if pending and not ready:
+        logger.warning("Plan dependencies cannot be satisfied, running in order")
+        ready = pending[:1]
+
+    update = {"messages": new_messages, "merged_steps": merged}
+    if not ready:
+        logger.info("Workflow completed")
+        return Command(goto="__end__", update={**update, "next": "__end__"})
+
+    logger.info(
+        "Supervisor dispatching in parallel: "
+        + ", ".join(f"{i + 1}:{steps[i]['agent_name']}" for i in ready)
+    )
+    worker_state = {**state, "messages": [*state["messages"], *new_messages]}
     return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format("reporter", response.content),
-                    name="reporter",
-                )
-            ]
-        },
-        goto="supervisor",
+        goto=[
+            Send(steps[index]["agent_name"], {**worker_state, "current_step": index})
+            for index in ready
+        ],
+        update=update,
     )
@@ -0,0 +1,286 @@
+import json
+
+from src.config import TEAM_MEMBERS
+
+_WHITESPACE = " \t\r\n"
+_DIGITS = "0123456789"
+_ESCAPES = '"\\/bfnrtu'
+_HEX = "0123456789abcdefABCDEF"
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+
+# What the automaton expects next outside of a scalar.
+_VALUE = "value"
+_VALUE_OR_END = "value_or_end"  # right after `[`
+_KEY = "key"
+_KEY_OR_END = "key_or_end"  # right after `{`
+_COLON = "colon"
+_COMMA_OR_END = "comma_or_end"
+_DONE = "done"
+
+
+class PlanParseError(ValueError):
+    """Raised as soon as the planner output can no longer be a valid plan."""
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "start")
+
+    def __init__(self, kind: str, start: int):
+        self.kind = kind
+        self.key: str | None = None
+        self.start = start
+
+
+class StreamingPlanParser:
+    """Incrementally validate planner JSON and surface steps as they close.
+
+    Feed the streamed chunks to `feed`, which returns every step object of
+    the top-level `steps` array that was completed by that chunk. A
+    `PlanParseError` is raised on the first character that makes the output
+    impossible to complete into a JSON plan, or when a finished step is not
+    assigned to a known team member. `close` validates the complete document
+    and returns the parsed plan.
+
+    A leading "```json" fence and a trailing "```" fence are tolerated, as
+    the planner prompt cannot fully prevent them.
+    """
+
+    def __init__(self, team_members: list[str] | None = None):
+        self.team_members = team_members or TEAM_MEMBERS
+        self.steps: list[dict] = []
+        self._body: list[str] = []
+        self._pos = 0
+        self._head = ""
+        self._in_body = False
+        self._expect = _VALUE
+        self._stack: list[_Frame] = []
+        # scalar sub-states
+        self._string: list[str] | None = None
+        self._string_is_key = False
+        self._escape = False
+        self._unicode = 0
+        self._number: str | None = None
+        self._literal: str | None = None
+        self._trailer = ""
+
+    @property
+    def text(self) -> str:
+        """The plan JSON received so far, without code fences."""
+        return "".join(self._body)
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume a streamed chunk and return the steps it completed."""
+        completed: list[dict] = []
+        if not self._in_body:
+            chunk = self._consume_head(chunk)
+            if chunk is None:
+                return completed
+        for char in chunk:
+            if self._expect == _DONE:
+                self._consume_trailer(char)
+                continue
+            self._body.append(char)
+            step = self._consume(char)
+            if step is not None:
+                completed.append(step)
+            self._pos += 1
+        return completed
+
+    def close(self) -> dict:
+        """Validate the complete output and return the parsed plan."""
+        if self._expect != _DONE:
+            raise PlanParseError("Planner output ended before the plan was complete")
+        if self._trailer.strip("`" + _WHITESPACE):
+            raise PlanParseError("Unexpected content after the plan")
+        plan = json.loads(self.text)
+        if not isinstance(plan.get("steps"), list):
+            raise PlanParseError("Plan has no `steps` list")
+        return plan
+
+    def _consume_head(self, chunk: str) -> str | None:
+        """Skip leading whitespace and an optional opening code fence."""
+        self._head += chunk
+        head = self._head.lstrip(_WHITESPACE)
+        if not head:
+            return None
+        if head.startswith("`"):
+            if len(head) < 3:
+                return None
+            if not head.startswith("```"):
+                raise PlanParseError("Malformed code fence before the plan")
+            rest = head[3:]
+            if len(rest) < 4 and "json".startswith(rest):
+                return None
+            head = rest.removeprefix("json")
+        self._in_body = True
+        self._head = ""
+        return head
+
+    def _consume_trailer(self, char: str) -> None:
+        if char not in _WHITESPACE and char != "`":
+            raise PlanParseError(f"Unexpected {char!r} after the plan")
+        self._trailer += char
+
+    def _consume(self, char: str) -> dict | None:
+        if self._string is not None:
+            self._consume_string(char)
+            return None
+        if self._literal is not None:
+            self._consume_literal(char)
+            return None
+        if self._number is not None:
+            if self._consume_number(char):
+                return None
+            self._end_number()
+            # the terminating character still needs to be processed
+            return self._consume(char)
+
+        if char in _WHITESPACE:
+            return None
+        expect = self._expect
+        if expect in (_VALUE, _VALUE_OR_END):
+            if expect == _VALUE_OR_END and char == "]":
+                return self._close_container("array")
+            if not self._stack and char != "{":
+                raise PlanParseError("Plan must be a JSON object")
+            self._start_value(char)
+            return None
+        if expect in (_KEY, _KEY_OR_END):
+            if expect == _KEY_OR_END and char == "}":
+                return self._close_container("object")
+            if char != '"':
+                raise PlanParseError(f"Expected an object key, got {char!r}")
+            self._string = []
+            self._string_is_key = True
+            return None
+        if expect == _COLON:
+            if char != ":":
+                raise PlanParseError(f"Expected ':', got {char!r}")
+            self._expect = _VALUE
+            return None
+        if expect == _COMMA_OR_END:
+            frame = self._stack[-1]
+            if char == ",":
+                self._expect = _KEY if frame.kind == "object" else _VALUE
+                return None
+            if char == "}" and frame.kind == "object":
+                return self._close_container("object")
+            if char == "]" and frame.kind == "array":
+                return self._close_container("array")
+            raise PlanParseError(f"Unexpected {char!r} in {frame.kind}")
+        raise PlanParseError(f"Unexpected {char!r}")
+
+    def _start_value(self, char: str) -> None:
+        if char == "{":
+            self._stack.append(_Frame("object", self._pos))
+            self._expect = _KEY_OR_END
+        elif char == "[":
+            self._stack.append(_Frame("array", self._pos))
+            self._expect = _VALUE_OR_END
+        elif char == '"':
+            self._string = []
+            self._string_is_key = False
+        elif char == "-" or char in _DIGITS:
+            self._number = char
+        elif char in _LITERALS:
+            self._literal = _LITERALS[char][1:]
+        else:
+            raise PlanParseError(f"Unexpected {char!r} where a value was expected")
+
+    def _consume_string(self, char: str) -> None:
+        if self._unicode:
+            if char not in _HEX:
+                raise PlanParseError("Invalid unicode escape")
+            self._unicode -= 1
+        elif self._escape:
+            if char not in _ESCAPES:
+                raise PlanParseError(f"Invalid escape '\\{char}'")
+            self._escape = False
+            if char == "u":
+                self._unicode = 4
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            if self._string_is_key:
+                self._stack[-1].key = "".join(self._string)
+                self._expect = _COLON
+            else:
+                self._end_value()
+            self._string = None
+            return
+        elif char < " ":
+            raise PlanParseError("Unescaped control character in string")
+        if self._string_is_key:
+            self._string.append(char)
+
+    def _consume_literal(self, char: str) -> None:
+        if char != self._literal[0]:
+            raise PlanParseError(f"Invalid literal near {char!r}")
+        self._literal = self._literal[1:] or None
+        if self._literal is None:
+            self._end_value()
+
+    def _consume_number(self, char: str) -> bool:
+        """Extend the current number; return False when `char` ends it."""
+        number = self._number
+        last = number[-1]
+        if char in _DIGITS:
+            if number in ("0", "-0"):
+                raise PlanParseError("Leading zeros are not allowed")
+        elif char == ".":
+            if "." in number or "e" in number.lower() or last not in _DIGITS:
+                raise PlanParseError("Misplaced '.' in number")
+        elif char in "eE":
+            if "e" in number.lower() or last not in _DIGITS:
+                raise PlanParseError("Misplaced exponent in number")
+        elif char in "+-":
+            if last not in "eE":
+                raise PlanParseError(f"Misplaced {char!r} in number")
+        else:
+            return False
+        self._number += char
+        return True
+
+    def _end_number(self) -> None:
+        if self._number[-1] not in _DIGITS:
+            raise PlanParseError(f"Incomplete number {self._number!r}")
+        self._number = None
+        self._end_value()
+
+    def _close_container(self, kind: str) -> dict | None:
+        frame = self._stack.pop()
+        step = None
+        if kind == "object" and self._is_step(frame):
+            step = self._validate_step(
+                json.loads(self.text[frame.start : self._pos + 1])
+            )
+        self._end_value()
+        return step
+
+    def _is_step(self, frame: _Frame) -> bool:
+        """Whether `frame` is an element of the top-level `steps` array."""
+        return (
+            len(self._stack) == 2
+            and self._stack[1].kind == "array"
+            and self._stack[0].key == "steps"
+        )
+
+    def _validate_step(self, step: dict) -> dict:
+        index = len(self.steps) + 1
+        if step.get("agent_name") not in self.team_members:
+            raise PlanParseError(
+                f"Step {index} is assigned to unknown agent {step.get('agent_name')!r}"
+            )
+        for field in ("title", "description"):
+            if not isinstance(step.get(field), str):
+                raise PlanParseError(f"Step {index} has no {field}")
+        depends_on = step.get("depends_on", [])
+        if not isinstance(depends_on, list) or not all(
+            isinstance(dep, int) for dep in depends_on
+        ):
+            raise PlanParseError(f"Step {index} has an invalid `depends_on`")
+        self.steps.append(step)
+        return step
+
+    def _end_value(self) -> None:
+        self._expect = _COMMA_OR_END if self._stack else _DONE
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from src.config import TEAM_MEMBERS
+
+logger = logging.getLogger(__name__)
+
+
+class SupervisorRouter:
+    """Decides the supervisor's next hop without the LLM whenever it can.
+
+    `route` first follows the parsed plan: while the agents that have answered
+    since the planner match the plan's steps in order, the next hop is the
+    next step's agent (or FINISH once every step, or the reporter, is done).
+    Otherwise it looks for an earlier LLM decision on an identical trimmed
+    state. Only when both miss does the caller need to ask the LLM, and it
+    should `remember` the answer.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"plan_routes": 0, "cache_hits": 0, "llm_calls": 0}
+
+    def route(self, state: dict) -> str | None:
+        """Return the next hop, or None when the LLM has to decide."""
+        goto = self.route_from_plan(state)
+        if goto is not None:
+            self._count("plan_routes")
+            logger.info(f"Supervisor routed by plan to: {goto}")
+            return goto
+        key = self.cache_key(state)
+        with self._lock:
+            goto = self._cache.get(key)
+            if goto is not None:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+        if goto is not None:
+            logger.info(f"Supervisor routed from cache to: {goto}")
+        return goto
+
+    def remember(self, state: dict, goto: str) -> None:
+        """Record an LLM routing decision for identical future states."""
+        key = self.cache_key(state)
+        with self._lock:
+            self._stats["llm_calls"] += 1
+            self._cache[key] = goto
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cache_size"] = len(self._cache)
+        stats["llm_calls_avoided"] = stats["plan_routes"] + stats["cache_hits"]
+        return stats
+
+    @staticmethod
+    def route_from_plan(state: dict) -> str | None:
+        steps = state.get("plan_steps") or []
+        messages = state.get("messages") or []
+        if not steps or not messages:
+            return None
+        if messages[-1].name == "reporter":
+            return "FINISH"
+
+        planner_at = max(
+            (i for i, message in enumerate(messages) if message.name == "planner"),
+            default=None,
+        )
+        if planner_at is None:
+            return None
+        answered = [
+            message.name
+            for message in messages[planner_at + 1 :]
+            if message.name in TEAM_MEMBERS
+        ]
+        planned = [step["agent_name"] for step in steps]
+        if answered != planned[: len(answered)]:
+            # Someone deviated from the plan (e.g. a retry); let the LLM judge.
+            return None
+        if len(answered) == len(planned):
+            return "FINISH"
+        return planned[len(answered)]
+
+    @staticmethod
+    def cache_key(state: dict) -> str:
+        """Hash of the parts of the state the supervisor prompt depends on."""
+        trimmed = [state.get("TEAM_MEMBERS") or TEAM_MEMBERS]
+        for message in state.get("messages") or []:
+            trimmed.append([message.type, message.name, message.content])
+        payload = json.dumps(trimmed, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+supervisor_router = SupervisorRouter()
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Annotated, Literal
 from typing_extensions import TypedDict
 from langgraph.graph import MessagesState
 
@@ -14,6 +14,13 @@ class Router(TypedDict):
     next: Literal[*OPTIONS]
 
 
+def merge_step_results(
+    left: dict[int, str] | None, right: dict[int, str] | None
+) -> dict[int, str]:
+    """Reducer for results of plan steps executed in parallel."""
+    return {**(left or {}), **(right or {})}
+
+
 class State(MessagesState):
     """State for the agent system, extends MessagesState with next field."""
 
@@ -23,5 +30,11 @@ class State(MessagesState):
     # Runtime Variables
     next: str
     full_plan: str
+    plan_steps: list[dict]
+    # Parallel execution: the step a worker was sent to run, the raw results
+    # of finished steps and the steps already merged into `messages`.
+    current_step: int
+    step_results: Annotated[dict[int, str], merge_step_results]
+    merged_steps: list[int]
     deep_thinking_mode: bool
     search_before_planning: bool
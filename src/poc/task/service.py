@@ -9,6 +9,7 @@ from src.poc.memory.models import MeetingDelta, TopicMember, TopicState
 from src.poc.memory.service import MemoryService
 from .models import NotificationAction, ProcessResult
 from src.agents.llm import get_llm_by_type
+from src.agents.gateway import BACKGROUND, llm_priority
 import json
 from src.poc.assets_loader import load_assets_by_date
 from src.poc.integration.service import IntegrationService
@@ -242,9 +243,10 @@ class TaskOrchestrator:
         # 1) Try to get a structured delta (once). If fails, fallback to synthetic.
         meeting_delta: Optional[MeetingDelta] = None
         try:
-            meeting_delta = self.memory_service.generate_delta_with_llm(
-                topic_id=topic_id, transcript=transcript, meeting_id=f"assets-{date_str}"
-            )
+            with llm_priority(BACKGROUND):
+                meeting_delta = self.memory_service.generate_delta_with_llm(
+                    topic_id=topic_id, transcript=transcript, meeting_id=f"assets-{date_str}"
+                )
         except Exception:
             meeting_delta = None
 
@@ -312,22 +314,24 @@ class TaskOrchestrator:
 
     def _call_llm(self, prompt: str) -> str:
         """Call LLM with fallback to stream for models that require it."""
-        try:
-            resp = self.llm.invoke(prompt)
-            return resp.content if hasattr(resp, "content") else str(resp)
-        except Exception as exc:
-            if hasattr(self.llm, "stream"):
-                try:
-                    chunks = []
-                    for chunk in self.llm.stream(prompt):
-                        part = getattr(chunk, "content", None)
-                        if part:
-                            chunks.append(part)
-                    if chunks:
-                        return "".join(chunks)
-                except Exception:
-                    pass
-            raise exc
+        # Orchestrator jobs must not hold up interactive chat requests.
+        with llm_priority(BACKGROUND):
+            try:
+                resp = self.llm.invoke(prompt)
+                return resp.content if hasattr(resp, "content") else str(resp)
+            except Exception as exc:
+                if hasattr(self.llm, "stream"):
+                    try:
+                        chunks = []
+                        for chunk in self.llm.stream(prompt):
+                            part = getattr(chunk, "content", None)
+                            if part:
+                                chunks.append(part)
+                        if chunks:
+                            return "".join(chunks)
+                    except Exception:
+                        pass
+                raise exc
 
     def _extract_json_array(self, content: str):
         """Extract JSON array from raw model output, tolerant to code fences and preamble."""
@@ -0,0 +1,209 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Rough per-image cost used when estimating multimodal content.
+IMAGE_TOKENS = 85
+# Token budget of an agent response once it has been summarized.
+SUMMARY_TOKENS = 200
+
+
+@dataclass
+class CompactionStats:
+    """Token accounting of the compaction stage."""
+
+    calls: int = 0
+    compacted_calls: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def add(self, before: int, after: int) -> None:
+        self.calls += 1
+        self.compacted_calls += before != after
+        self.tokens_before += before
+        self.tokens_after += after
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "compacted_calls": self.compacted_calls,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+_totals = CompactionStats()
+_totals_lock = threading.Lock()
+_run_stats: ContextVar[CompactionStats | None] = ContextVar(
+    "compaction_run_stats", default=None
+)
+
+
+def compaction_totals() -> dict:
+    """Process-wide compaction counters."""
+    with _totals_lock:
+        return _totals.as_dict()
+
+
+@contextmanager
+def track_compaction():
+    """Collect the compaction stats of every prompt built inside the block.
+
+    Tasks spawned inside the block (graph nodes, react agent steps) inherit
+    the context, so one workflow run gets one `CompactionStats`.
+
+    The stats are cleared rather than reset to a token: the block spans the
+    yields of `run_agent_workflow`, and if a consumer stops iterating
+    without closing it, the generator is finalized in another context.
+    """
+    stats = CompactionStats()
+    _run_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _run_stats.set(None)
+
+
+def estimate_tokens(content) -> int:
+    """Cheap token estimate: ~4 ASCII characters or 1 CJK character per token."""
+    if isinstance(content, list):
+        total = 0
+        for part in content:
+            if isinstance(part, str):
+                total += estimate_tokens(part)
+            elif part.get("type") == "text":
+                total += estimate_tokens(part.get("text", ""))
+            else:
+                total += IMAGE_TOKENS
+        return total
+    if not content:
+        return 0
+    non_ascii = sum(1 for char in content if ord(char) > 127)
+    return (len(content) - non_ascii) // 4 + non_ascii + 1
+
+
+def _message_tokens(message: BaseMessage) -> int:
+    tokens = estimate_tokens(message.content) + 4
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(str(call.get("args", "")))
+    return tokens
+
+
+def summarize_response(content: str, max_tokens: int = SUMMARY_TOKENS) -> str:
+    """Extractive summary of a markdown agent response.
+
+    Keeps headings and the first line of every paragraph until `max_tokens`
+    is reached.
+    """
+    kept, used, previous_blank = [], 0, True
+    for line in content.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            previous_blank = True
+            continue
+        if stripped.startswith("#") or previous_blank:
+            cost = estimate_tokens(stripped)
+            if used + cost > max_tokens:
+                break
+            kept.append(stripped)
+            used += cost
+        previous_blank = False
+    return "\n".join(kept) + "\n\n[Earlier response summarized to save context]"
+
+
+def compact_messages(
+    messages: list[BaseMessage], budget: int | None
+) -> list[BaseMessage]:
+    """Fit `messages` into `budget` tokens without breaking the conversation.
+
+    Stages are applied oldest-first, and only while the history is over budget:
+
+    1. raw tool output that an assistant turn already consumed is dropped;
+    2. earlier agent responses are replaced by extractive summaries;
+    3. the oldest agent responses are removed altogether.
+
+    User messages, the plan, the latest agent response and any tool output the
+    model has not answered yet are always kept. Tool-call/tool-result pairs
+    are never split, so the result stays valid for the provider.
+    """
+    if budget is None or not messages:
+        return messages
+    if not all(isinstance(message, BaseMessage) for message in messages):
+        return messages
+
+    compacted = list(messages)
+    sizes = [_message_tokens(message) for message in compacted]
+    before = total = sum(sizes)
+
+    def replace(index: int, message: BaseMessage | None) -> None:
+        nonlocal total
+        total -= sizes[index]
+        sizes[index] = _message_tokens(message) if message is not None else 0
+        total += sizes[index]
+        compacted[index] = message
+
+    if total > budget:
+        last_ai = max(
+            (i for i, m in enumerate(compacted) if isinstance(m, AIMessage)),
+            default=-1,
+        )
+        for index in range(last_ai):
+            message = compacted[index]
+            if total <= budget:
+                break
+            if isinstance(message, ToolMessage) and sizes[index] > 50:
+                replace(
+                    index,
+                    message.model_copy(
+                        update={
+                            "content": f"[Output of {message.name or 'tool'} "
+                            f"dropped after use, ~{sizes[index]} tokens]"
+                        }
+                    ),
+                )
+
+    responses = [
+        i
+        for i, m in enumerate(compacted)
+        if m.type == "human" and m.name and m.name not in ("planner", "supervisor")
+    ][:-1]
+    for index in responses:
+        if total <= budget:
+            break
+        message = compacted[index]
+        if isinstance(message.content, str) and sizes[index] > SUMMARY_TOKENS:
+            replace(
+                index,
+                message.model_copy(
+                    update={"content": summarize_response(message.content)}
+                ),
+            )
+    for index in responses:
+        if total <= budget:
+            break
+        replace(index, None)
+
+    compacted = [message for message in compacted if message is not None]
+    _record(before, total)
+    if total != before:
+        logger.debug(f"Compacted history from ~{before} to ~{total} tokens")
+    return compacted
+
+
+def _record(before: int, after: int) -> None:
+    with _totals_lock:
+        _totals.add(before, after)
+    stats = _run_stats.get()
+    if stats is not None:
+        stats.add(before, after)
@@ -1,23 +1,135 @@
+import glob
 import os
 import re
+import threading
 from datetime import datetime
 
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import PromptTemplate
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.config import APP_ENV, PROMPT_CACHE_LAYOUT
+from src.config.agents import AGENT_CONTEXT_BUDGET
+from .compaction import compact_messages
 
-def get_prompt_template(prompt_name: str) -> str:
-    template = open(os.path.join(os.path.dirname(__file__), f"{prompt_name}.md")).read()
+PROMPTS_DIR = os.path.dirname(__file__)
+
+_VARIABLE = re.compile(r"<<([^>>]+)>>")
+
+# Prompt variables that change on every call. In the cache layout, the lines
+# using them are sent after the conversation, so that the system prompt is
+# the same for every call and providers can serve it from their prompt cache.
+VOLATILE_VARIABLES = ("CURRENT_TIME",)
+_VOLATILE = re.compile(r"(?<!\{)\{(?:" + "|".join(VOLATILE_VARIABLES) + r")\}(?!\})")
+# Front matter left empty once its volatile lines are taken out
+_EMPTY_FRONT_MATTER = re.compile(r"\A\s*---\s*\n---\s*\n\s*")
+
+
+def compile_prompt_template(template: str) -> str:
+    """Turn a markdown prompt into an f-string `PromptTemplate` template."""
     # Escape curly braces using backslash
     template = template.replace("{", "{{").replace("}", "}}")
     # Replace `<<VAR>>` with `{VAR}`
-    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
-    return template
+    return _VARIABLE.sub(r"{\1}", template)
+
+
+def split_volatile(template: str) -> tuple[str, str]:
+    """A compiled template without its volatile lines, and those lines."""
+    static, volatile = [], []
+    for line in template.splitlines(keepends=True):
+        (volatile if _VOLATILE.search(line) else static).append(line)
+    return _EMPTY_FRONT_MATTER.sub("", "".join(static)), "".join(volatile).strip()
+
+
+class PromptRegistry:
+    """Compiled `PromptTemplate`s for every `*.md` prompt in `directory`.
+
+    All prompts are read and compiled together on first use and kept in
+    memory. With `reload`, each lookup also checks the file's mtime and
+    recompiles a prompt that was edited, so prompt changes show up without
+    restarting the server in development.
+    """
+
+    def __init__(self, directory: str = PROMPTS_DIR, reload: bool = False):
+        self.directory = directory
+        self.reload = reload
+        self._templates: dict[str, tuple[int, PromptTemplate]] = {}
+        # Template each split was made from, static part, volatile part
+        self._splits: dict[str, tuple[PromptTemplate, str, str]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def get(self, prompt_name: str) -> PromptTemplate:
+        if not self._loaded:
+            self.load_all()
+        entry = self._templates.get(prompt_name)
+        if entry is None or (self.reload and self._mtime(prompt_name) != entry[0]):
+            entry = self._load(prompt_name)
+        return entry[1]
+
+    def render(self, prompt_name: str, **variables) -> str:
+        """Format a prompt; same output as `PromptTemplate.format`.
+
+        The compiled template is a plain f-string template without partial
+        variables, so `str.format` gives the same result without the pure
+        Python `string.Formatter` that `PromptTemplate.format` goes through.
+        """
+        return self.get(prompt_name).template.format(**variables)
+
+    def render_split(self, prompt_name: str, **variables) -> tuple[str, str]:
+        """`render` split into the static prompt and its volatile lines."""
+        template = self.get(prompt_name)
+        split = self._splits.get(prompt_name)
+        if split is None or split[0] is not template:
+            split = (template, *split_volatile(template.template))
+            self._splits[prompt_name] = split
+        return split[1].format(**variables), split[2].format(**variables)
+
+    def load_all(self) -> None:
+        for path in glob.glob(os.path.join(self.directory, "*.md")):
+            self._load(os.path.splitext(os.path.basename(path))[0])
+        self._loaded = True
+
+    def _path(self, prompt_name: str) -> str:
+        return os.path.join(self.directory, f"{prompt_name}.md")
+
+    def _mtime(self, prompt_name: str) -> int:
+        return os.stat(self._path(prompt_name)).st_mtime_ns
+
+    def _load(self, prompt_name: str) -> tuple[int, PromptTemplate]:
+        with self._lock:
+            mtime = self._mtime(prompt_name)
+            with open(self._path(prompt_name)) as f:
+                template = compile_prompt_template(f.read())
+            entry = (
+                mtime,
+                PromptTemplate(input_variables=["CURRENT_TIME"], template=template),
+            )
+            self._templates[prompt_name] = entry
+            return entry
+
+
+prompt_registry = PromptRegistry(reload=APP_ENV == "development")
+
+
+def get_prompt_template(prompt_name: str) -> str:
+    return prompt_registry.get(prompt_name).template
 
 
 def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
-    system_prompt = PromptTemplate(
-        input_variables=["CURRENT_TIME"],
-        template=get_prompt_template(prompt_name),
-    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
-    return [{"role": "system", "content": system_prompt}] + state["messages"]
+    current_time = datetime.now().strftime("%a %b %d %Y %H:%M:%S %z")
+    messages = compact_messages(
+        state["messages"], AGENT_CONTEXT_BUDGET.get(prompt_name)
+    )
+    if not PROMPT_CACHE_LAYOUT:
+        system_prompt = prompt_registry.render(
+            prompt_name, CURRENT_TIME=current_time, **state
+        )
+        return [{"role": "system", "content": system_prompt}] + messages
+
+    system_prompt, volatile = prompt_registry.render_split(
+        prompt_name, CURRENT_TIME=current_time, **state
+    )
+    # After the conversation, so everything before it stays a stable prefix.
+    trailer = [SystemMessage(content=volatile)] if volatile else []
+    return [{"role": "system", "content": system_prompt}, *messages, *trailer]
@@ -0,0 +1,11 @@
+from .backends import FixtureBackend, SearchBackend, TavilyBackend
+from .multi_search import MultiSearch, get_multi_search, reformulate
+
+__all__ = [
+    "FixtureBackend",
+    "MultiSearch",
+    "SearchBackend",
+    "TavilyBackend",
+    "get_multi_search",
+    "reformulate",
+]
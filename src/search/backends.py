@@ -0,0 +1,92 @@
+"""
+Search backends used by `MultiSearch`.
+
+A backend runs one query and returns Tavily-style results: dicts with
+`title`, `url`, `content` and `score`. `TavilyBackend` is the default;
+`FixtureBackend` searches a local JSON file of documents, for tests and
+offline runs. Other engines plug in by subclassing `SearchBackend`.
+"""
+
+import asyncio
+import json
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+
+_TERM = re.compile(r"[^\W_]+")
+
+
+class SearchBackend(ABC):
+    name = "search"
+
+    @abstractmethod
+    def search(self, query: str, max_results: int) -> list[dict]:
+        """The top `max_results` results of `query`."""
+
+    async def asearch(self, query: str, max_results: int) -> list[dict]:
+        """Runs `search` in a thread unless the backend has a native async API."""
+        return await asyncio.to_thread(self.search, query, max_results)
+
+
+class TavilyBackend(SearchBackend):
+    name = "tavily"
+
+    def __init__(self):
+        # Created on first use: it requires TAVILY_API_KEY.
+        self._api = None
+
+    @property
+    def api(self):
+        if self._api is None:
+            from langchain_community.utilities.tavily_search import (
+                TavilySearchAPIWrapper,
+            )
+
+            self._api = TavilySearchAPIWrapper()
+        return self._api
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        return self.api.results(query, max_results=max_results)
+
+    async def asearch(self, query: str, max_results: int) -> list[dict]:
+        return await self.api.results_async(query, max_results=max_results)
+
+
+class FixtureBackend(SearchBackend):
+    """Ranks the documents of a JSON file by term overlap with the query.
+
+    The file holds a list of `{"title", "url", "content"}` objects.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str = "", documents: list[dict] | None = None):
+        if documents is None:
+            with open(path, encoding="utf-8") as f:
+                documents = json.load(f)
+        self.documents = documents
+        self._terms = [
+            Counter(_TERM.findall(f"{doc['title']} {doc['content']}".lower()))
+            for doc in documents
+        ]
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        query_terms = set(_TERM.findall(query.lower()))
+        scored = []
+        for doc, terms in zip(self.documents, self._terms):
+            matched = sum(
+                1 + math.log(terms[term]) for term in query_terms if terms[term]
+            )
+            if matched:
+                scored.append((matched / (len(query_terms) or 1), doc))
+        scored.sort(key=lambda item: -item[0])
+        return [
+            {
+                "title": doc["title"],
+                "url": doc["url"],
+                "content": doc["content"],
+                "score": round(score, 4),
+            }
+            for score, doc in scored[:max_results]
+        ]
@@ -0,0 +1,210 @@
+"""
+Concurrent multi-query web search.
+
+`MultiSearch` runs several formulations of a question at once against a
+`SearchBackend`, then merges the result lists with reciprocal rank fusion:
+a page found by several queries, or ranked high by one, comes first.
+Results are deduplicated by normalized URL and by a hash of their text,
+so mirrors and syndicated copies of a page are returned once. Each query's
+results are cached for `ttl` seconds.
+"""
+
+import asyncio
+import functools
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.config import (
+    SEARCH_BACKEND,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL,
+    SEARCH_FIXTURE_PATH,
+    TAVILY_MAX_RESULTS,
+)
+from src.crawler.cache import normalize_url
+
+from .backends import FixtureBackend, SearchBackend, TavilyBackend
+
+logger = logging.getLogger(__name__)
+
+# Tavily rejects longer queries.
+MAX_QUERY_CHARS = 400
+# Reciprocal rank fusion constant; larger values flatten the rank weights.
+_RRF_K = 60
+
+_TERM = re.compile(r"[^\W_]+")
+_SENTENCE = re.compile(r"(?<=[.?!。？！])\s*")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can could did do does for from how i in is "
+    "it me my of on or please should tell that the their them there these "
+    "this to was what when where which who why will with would you your".split()
+)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split())[:MAX_QUERY_CHARS]
+
+
+def reformulate(question: str, max_queries: int = 3) -> list[str]:
+    """Search queries for a raw user question, without an LLM call.
+
+    The question itself, its keywords, and each of its sentences when it
+    asks several things.
+    """
+    question = _normalize_query(question)
+    keywords = [
+        word for word in _TERM.findall(question) if word.lower() not in _STOPWORDS
+    ]
+    queries = [question, " ".join(dict.fromkeys(keywords))]
+    queries += [s for s in _SENTENCE.split(question) if len(s) > 10]
+    return list(dict.fromkeys(q for q in queries if q))[:max_queries]
+
+
+class MultiSearch:
+    def __init__(
+        self,
+        backend: SearchBackend,
+        max_results: int = 5,
+        max_total: int = 10,
+        ttl: Optional[float] = 3600,
+        max_entries: int = 512,
+    ):
+        self.backend = backend
+        self.max_results = max_results
+        self.max_total = max_total
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "hits": 0, "misses": 0, "errors": 0}
+
+    def search(self, queries: list[str]) -> list[dict]:
+        queries, results, missing = self._prepare(queries)
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                fetched = list(pool.map(self._fetch, missing))
+            results.update(zip(missing, fetched))
+        return self._merge(queries, results)
+
+    async def asearch(self, queries: list[str]) -> list[dict]:
+        queries, results, missing = self._prepare(queries)
+        if missing:
+            fetched = await asyncio.gather(*(self._afetch(q) for q in missing))
+            results.update(zip(missing, fetched))
+        return self._merge(queries, results)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _prepare(
+        self, queries: list[str]
+    ) -> tuple[list[str], dict[str, list[dict] | Exception], list[str]]:
+        """Distinct queries, their cached results, and the queries to run."""
+        distinct: dict[str, str] = {}
+        for query in map(_normalize_query, queries):
+            if query:
+                distinct.setdefault(query.lower(), query)
+        queries = list(distinct.values())
+        if not queries:
+            raise ValueError("No search query given")
+        results: dict[str, list[dict] | Exception] = {}
+        now = time.time()
+        with self._lock:
+            self._stats["queries"] += len(queries)
+            for query in queries:
+                entry = self._entries.get(self._key(query))
+                if entry is None or (
+                    self.ttl is not None and now - entry[0] > self.ttl
+                ):
+                    continue
+                self._entries.move_to_end(self._key(query))
+                results[query] = entry[1]
+            self._stats["hits"] += len(results)
+            self._stats["misses"] += len(queries) - len(results)
+        return queries, results, [q for q in queries if q not in results]
+
+    def _fetch(self, query: str) -> list[dict] | Exception:
+        try:
+            return self._store(query, self.backend.search(query, self.max_results))
+        except Exception as e:
+            return self._failed(query, e)
+
+    async def _afetch(self, query: str) -> list[dict] | Exception:
+        try:
+            results = await self.backend.asearch(query, self.max_results)
+            return self._store(query, results)
+        except Exception as e:
+            return self._failed(query, e)
+
+    def _store(self, query: str, results: list[dict]) -> list[dict]:
+        with self._lock:
+            self._entries[self._key(query)] = (time.time(), results)
+            self._entries.move_to_end(self._key(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def _failed(self, query: str, error: Exception) -> Exception:
+        logger.warning(f"Search for {query!r} failed: {error!r}")
+        with self._lock:
+            self._stats["errors"] += 1
+        return error
+
+    def _merge(
+        self, queries: list[str], results: dict[str, list[dict] | Exception]
+    ) -> list[dict]:
+        errors = [r for r in results.values() if isinstance(r, Exception)]
+        if len(errors) == len(queries):
+            raise errors[0]
+        merged: dict[str, dict] = {}
+        fused: dict[str, float] = {}
+        aliases: dict[str, str] = {}
+        for query in queries:
+            if isinstance(results[query], Exception):
+                continue
+            for rank, result in enumerate(results[query]):
+                keys = [normalize_url(result["url"])]
+                text = " ".join(result.get("content", "").lower().split())
+                if text:
+                    keys.append(hashlib.sha1(text.encode()).hexdigest())
+                key = next((aliases[k] for k in keys if k in aliases), keys[0])
+                for k in keys:
+                    aliases.setdefault(k, key)
+                entry = merged.setdefault(key, {**result, "queries": []})
+                if query not in entry["queries"]:
+                    entry["queries"].append(query)
+                fused[key] = fused.get(key, 0.0) + 1 / (_RRF_K + rank + 1)
+        ranked = sorted(merged, key=lambda key: -fused[key])
+        return [merged[key] for key in ranked[: self.max_total]]
+
+    def _key(self, query: str) -> str:
+        return f"{self.backend.name}\x00{self.max_results}\x00{query.lower()}"
+
+
+@functools.cache
+def get_multi_search() -> MultiSearch:
+    """The search shared by the planner and `multi_search_tool`."""
+    if SEARCH_BACKEND == "fixture":
+        backend = FixtureBackend(SEARCH_FIXTURE_PATH)
+    elif SEARCH_BACKEND == "tavily":
+        backend = TavilyBackend()
+    else:
+        raise ValueError(f"Unknown search backend: {SEARCH_BACKEND}")
+    return MultiSearch(
+        backend,
+        max_results=TAVILY_MAX_RESULTS,
+        max_total=TAVILY_MAX_RESULTS * 2,
+        ttl=SEARCH_CACHE_TTL,
+        max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    )
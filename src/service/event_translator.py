@@ -0,0 +1,243 @@
+from langchain_community.adapters.openai import convert_message_to_dict
+from langchain_core.messages import AIMessage
+
+from src.config import TEAM_MEMBERS
+
+# Number of coordinator chunks buffered before deciding whether the reply is a
+# handoff to the planner (which must not reach the client) or a plain answer.
+MAX_CACHE_SIZE = 2
+
+STREAMING_LLM_AGENTS = [*TEAM_MEMBERS, "planner", "coordinator"]
+
+
+class WorkflowEventTranslator:
+    """Translate langgraph `astream_events` (v2) into SSE events for one workflow.
+
+    All buffering lives on the instance, so every `run_agent_workflow`
+    invocation owns its translator and concurrent streams cannot see each
+    other's coordinator chunks.
+    """
+
+    def __init__(self, workflow_id: str, user_input_messages: list):
+        self.workflow_id = workflow_id
+        self.user_input_messages = user_input_messages
+        self.coordinator_cache: list[str] = []
+        self.is_handoff_case = False
+        self._workflow_started = False
+        # run_ids of chat model calls that streamed at least one chunk
+        self._streamed_runs: set[str] = set()
+        self._coordinator_message_id: str | None = None
+        self._last_data: dict | None = None
+        # run_id -> agent_id of agents that are currently running
+        self._running_agents: dict[str, str] = {}
+
+    def translate(self, event: dict) -> list[dict]:
+        """Return the SSE events (possibly none) produced by one graph event."""
+        kind = event.get("event")
+        data = event.get("data")
+        name = event.get("name")
+        metadata = event.get("metadata")
+        self._last_data = data
+        node = (
+            ""
+            if (metadata.get("checkpoint_ns") is None)
+            else metadata.get("checkpoint_ns").split(":")[0]
+        )
+        langgraph_step = (
+            ""
+            if (metadata.get("langgraph_step") is None)
+            else str(metadata["langgraph_step"])
+        )
+        run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
+
+        if kind == "on_chain_start" and name in STREAMING_LLM_AGENTS:
+            agent_id = f"{self.workflow_id}_{name}_{langgraph_step}"
+            if agent_id in self._running_agents.values():
+                # Parallel execution runs the same agent several times per step.
+                agent_id = f"{agent_id}_{len(self._running_agents)}"
+            self._running_agents[run_id] = agent_id
+            events = []
+            if name == "planner" and not self._workflow_started:
+                events.append(self._start_of_workflow())
+            events.append(
+                {
+                    "event": "start_of_agent",
+                    "data": {"agent_name": name, "agent_id": agent_id},
+                }
+            )
+            return events
+        elif kind == "on_chain_end" and name in STREAMING_LLM_AGENTS:
+            agent_id = self._running_agents.pop(
+                run_id, f"{self.workflow_id}_{name}_{langgraph_step}"
+            )
+            return [
+                {
+                    "event": "end_of_agent",
+                    "data": {"agent_name": name, "agent_id": agent_id},
+                }
+            ]
+        elif kind == "on_chat_model_start" and node in STREAMING_LLM_AGENTS:
+            return [{"event": "start_of_llm", "data": {"agent_name": node}}]
+        elif kind == "on_chat_model_end" and node in STREAMING_LLM_AGENTS:
+            events = []
+            if run_id not in self._streamed_runs:
+                # Answers served from the LLM cache arrive without chunks.
+                events.extend(self._translate_output(node, run_id, data.get("output")))
+            self._streamed_runs.discard(run_id)
+            if node == "coordinator":
+                events.extend(self._flush_coordinator())
+            events.append({"event": "end_of_llm", "data": {"agent_name": node}})
+            return events
+        elif kind == "on_chat_model_stream" and node in STREAMING_LLM_AGENTS:
+            self._streamed_runs.add(run_id)
+            return self._translate_chunk(node, data["chunk"])
+        elif kind == "on_custom_event" and name == "plan_step":
+            return [{"event": "plan_step", "data": data}]
+        elif kind == "on_custom_event" and name == "llm_escalation":
+            # The model cascade rejected the answer streamed so far and asks
+            # a stronger model; the client drops the rejected answer.
+            if data["agent_name"] == "coordinator":
+                self.coordinator_cache = []
+                self.is_handoff_case = False
+            return [{"event": "llm_escalation", "data": data}]
+        elif kind == "on_custom_event" and name == "tool_output":
+            # Dispatched from inside the tool run, so the ids match tool_call.
+            tool_name = data["tool_name"]
+            return [
+                {
+                    "event": "tool_output",
+                    "data": {
+                        "tool_call_id": f"{self.workflow_id}_{node}_{tool_name}_{run_id}",
+                        "tool_name": tool_name,
+                        "stream": data["stream"],
+                        "text": data["text"],
+                    },
+                }
+            ]
+        elif kind == "on_tool_start" and node in TEAM_MEMBERS:
+            return [
+                {
+                    "event": "tool_call",
+                    "data": {
+                        "tool_call_id": f"{self.workflow_id}_{node}_{name}_{run_id}",
+                        "tool_name": name,
+                        "tool_input": data.get("input"),
+                    },
+                }
+            ]
+        elif kind == "on_tool_end" and node in TEAM_MEMBERS:
+            return [
+                {
+                    "event": "tool_call_result",
+                    "data": {
+                        "tool_call_id": f"{self.workflow_id}_{node}_{name}_{run_id}",
+                        "tool_name": name,
+                        "tool_result": (
+                            data["output"].content if data.get("output") else ""
+                        ),
+                    },
+                }
+            ]
+        return []
+
+    def resume(self, next_nodes: tuple[str, ...]) -> list[dict]:
+        """Return the opening events for a run continued from a checkpoint."""
+        if "coordinator" in next_nodes:
+            # Interrupted before the coordinator decided; behave as a new run.
+            return []
+        self.is_handoff_case = True
+        return [self._start_of_workflow()]
+
+    def replay(self, values: dict) -> list[dict]:
+        """Return the closing events of a workflow that has already finished."""
+        self.is_handoff_case = True
+        self._last_data = {"output": values}
+        return [self._start_of_workflow(), *self.finish()]
+
+    def finish(self) -> list[dict]:
+        """Return the closing events once the graph stream is exhausted."""
+        if not self.is_handoff_case:
+            return []
+        return [
+            {
+                "event": "end_of_workflow",
+                "data": {
+                    "workflow_id": self.workflow_id,
+                    "messages": [
+                        convert_message_to_dict(msg)
+                        for msg in self._last_data["output"].get("messages", [])
+                    ],
+                },
+            }
+        ]
+
+    def _translate_output(self, node: str, run_id: str, message) -> list[dict]:
+        if not isinstance(message, AIMessage) or not message.content:
+            return []
+        if message.id is None:
+            message = message.model_copy(update={"id": f"run-{run_id}"})
+        return self._translate_chunk(node, message)
+
+    def _flush_coordinator(self) -> list[dict]:
+        """Emit a coordinator answer too short to fill the handoff buffer."""
+        if self.is_handoff_case or not 0 < len(self.coordinator_cache) < MAX_CACHE_SIZE:
+            return []
+        content = "".join(self.coordinator_cache)
+        self.coordinator_cache.append("")  # mark as flushed
+        return [self._content_event(self._coordinator_message_id, content)]
+
+    def _translate_chunk(self, node: str, chunk) -> list[dict]:
+        content = chunk.content
+        if content is None or content == "":
+            if not chunk.additional_kwargs.get("reasoning_content"):
+                # Skip empty messages
+                return []
+            return [
+                {
+                    "event": "message",
+                    "data": {
+                        "message_id": chunk.id,
+                        "delta": {
+                            "reasoning_content": (
+                                chunk.additional_kwargs["reasoning_content"]
+                            )
+                        },
+                    },
+                }
+            ]
+
+        if node != "coordinator":
+            return [self._content_event(chunk.id, content)]
+
+        # Check if the message is from the coordinator
+        self._coordinator_message_id = chunk.id
+        if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+            self.coordinator_cache.append(content)
+            cached_content = "".join(self.coordinator_cache)
+            if cached_content.startswith("handoff"):
+                self.is_handoff_case = True
+                return []
+            if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+                return []
+            # Send the cached message
+            return [self._content_event(chunk.id, cached_content)]
+        if not self.is_handoff_case:
+            return [self._content_event(chunk.id, content)]
+        return []
+
+    def _start_of_workflow(self) -> dict:
+        self._workflow_started = True
+        return {
+            "event": "start_of_workflow",
+            "data": {
+                "workflow_id": self.workflow_id,
+                "input": self.user_input_messages,
+            },
+        }
+
+    @staticmethod
+    def _content_event(message_id: str, content: str) -> dict:
+        return {
+            "event": "message",
+            "data": {"message_id": message_id, "delta": {"content": content}},
+        }
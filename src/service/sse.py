@@ -0,0 +1,137 @@
+"""
+Encoding of the workflow events sent over `/api/chat/stream`.
+
+`dumps` serializes an event payload with orjson when it is installed
+(`pip install lang-manus[fast]`), and with the standard library otherwise.
+
+`coalesce_deltas` is the opt-in coalesced stream mode. Every streamed LLM
+token is a `message` event of its own. It merges consecutive deltas of the
+same message into one event, and sends the event once `window` seconds
+have passed since its first delta or its text reaches `max_chars`. Any
+other event sends the merged delta before it, so the order of the stream
+does not change.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(data: Any) -> str:
+    """`data` as JSON text, non-ASCII characters unescaped."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode()
+        except TypeError:
+            # Keys or values orjson does not know; let json report them.
+            pass
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _delta_key(event: dict) -> Optional[tuple[str, str]]:
+    """Message id and delta field of a token event, or None for others."""
+    if event.get("event") != "message":
+        return None
+    delta = event["data"].get("delta") or {}
+    if len(delta) != 1:
+        return None
+    (field,) = delta
+    if not isinstance(delta[field], str):
+        return None
+    return event["data"].get("message_id"), field
+
+
+# Events waiting for the client before the workflow is paused.
+_QUEUE_SIZE = 256
+_END = object()
+
+
+class _Merger:
+    """Merges token deltas and puts the resulting events on `out`."""
+
+    def __init__(self, out: asyncio.Queue, window: float, max_chars: int):
+        self.out = out
+        self.window = window
+        self.max_chars = max_chars
+        self.key: Optional[tuple[str, str]] = None
+        self.parts: list[str] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, event: dict) -> None:
+        key = _delta_key(event)
+        if self.key is not None and key != self.key:
+            self.flush()
+        if key is None:
+            self.out.put_nowait(event)
+            return
+        if self.key is None:
+            self.key = key
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        text = event["data"]["delta"][key[1]]
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.max_chars:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.key is None:
+            return
+        self.timer.cancel()
+        message_id, field = self.key
+        self.out.put_nowait(
+            {
+                "event": "message",
+                "data": {
+                    "message_id": message_id,
+                    "delta": {field: "".join(self.parts)},
+                },
+            }
+        )
+        self.key, self.parts, self.size = None, [], 0
+
+
+async def coalesce_deltas(
+    events: AsyncIterator[dict], window: float = 0.05, max_chars: int = 1024
+) -> AsyncIterator[dict]:
+    out: asyncio.Queue = asyncio.Queue()
+    merger = _Merger(out, window, max_chars)
+
+    async def produce():
+        # The workflow runs in this one task, so its context variables
+        # stay valid for its whole run.
+        try:
+            async for event in events:
+                merger.add(event)
+                if out.qsize() >= _QUEUE_SIZE:
+                    await out.join()
+        except Exception as e:
+            merger.flush()
+            out.put_nowait(e)
+        else:
+            merger.flush()
+            out.put_nowait(_END)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await out.get()
+            out.task_done()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if merger.timer is not None:
+            merger.timer.cancel()
+        producer.cancel()
+        try:
+            await producer
+        except (asyncio.CancelledError, Exception):
+            pass
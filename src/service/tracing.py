@@ -0,0 +1,515 @@
+"""
+Performance traces of workflow runs.
+
+`TraceCallbackHandler` is passed as a callback to the graph run and records
+a span for the workflow, every graph node, every LLM call and every tool
+call, nested the way the calls were made. LLM spans carry the time to the
+first streamed token, token usage and the time the request spent queued in
+the LLM gateway; every span carries the size of its input and output.
+
+Traces are kept per workflow id in `trace_store` and can be exported as
+Chrome trace JSON (chrome://tracing, Perfetto) or sent as OTLP/HTTP JSON to
+a local collector such as the OpenTelemetry Collector or Jaeger.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from langgraph.types import Command
+
+from src.agents.gateway import queue_wait_observer
+from src.agents.usage import token_usage
+from src.config import TRACE_MAX_WORKFLOWS
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW = "workflow"
+NODE = "node"
+LLM = "llm"
+TOOL = "tool"
+
+
+def payload_size(value: Any) -> int:
+    """Approximate size in bytes of a callback payload."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, BaseMessage):
+        return payload_size(value.content) + payload_size(
+            getattr(value, "tool_calls", None)
+        )
+    if isinstance(value, Command):
+        return payload_size(value.update)
+    if isinstance(value, dict):
+        return sum(payload_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    return len(str(value).encode())
+
+
+@dataclass
+class Span:
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    kind: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    input_bytes: int = 0
+    output_bytes: int = 0
+    ttft_ms: Optional[float] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    # Input tokens the provider served from its prompt cache
+    cached_tokens: Optional[int] = None
+    queue_wait_ms: Optional[float] = None
+    error: Optional[str] = None
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def cached_token_ratio(self) -> Optional[float]:
+        if self.cached_tokens is None or not self.input_tokens:
+            return None
+        return self.cached_tokens / self.input_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "duration_ms": self.duration_ms,
+            "cached_token_ratio": self.cached_token_ratio,
+        }
+
+
+class WorkflowTrace:
+    """Spans recorded for one workflow id, including resumed runs."""
+
+    def __init__(self, workflow_id: str):
+        self.workflow_id = workflow_id
+        self._spans: dict[str, Span] = {}
+        # Parent of every callback run, recorded or not, so spans can be
+        # attached to their closest recorded ancestor.
+        self._parents: dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        kind: str,
+        name: str,
+        **fields,
+    ) -> None:
+        key = str(run_id)
+        with self._lock:
+            parent_id = self._recorded_ancestor(parent_run_id)
+            self._spans[key] = Span(
+                span_id=key,
+                parent_id=parent_id,
+                name=name,
+                kind=kind,
+                start_ns=time.time_ns(),
+                **fields,
+            )
+
+    def link(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        with self._lock:
+            self._parents[str(run_id)] = str(parent_run_id) if parent_run_id else None
+
+    def update(self, run_id: UUID, **fields) -> Optional[Span]:
+        with self._lock:
+            span = self._spans.get(str(run_id))
+            if span is None:
+                return None
+            for name, value in fields.items():
+                setattr(span, name, value)
+            return span
+
+    def end(self, run_id: UUID, **fields) -> None:
+        self.update(run_id, end_ns=time.time_ns(), **fields)
+
+    def first_token(self, run_id: UUID) -> None:
+        with self._lock:
+            span = self._spans.get(str(run_id))
+            if span is not None and span.ttft_ms is None:
+                span.ttft_ms = (time.time_ns() - span.start_ns) / 1e6
+
+    def add_queue_wait(self, run_id: UUID, seconds: float) -> None:
+        with self._lock:
+            span = self._spans.get(str(run_id))
+            if span is not None:
+                span.queue_wait_ms = (span.queue_wait_ms or 0.0) + seconds * 1000
+
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans.values())
+
+    def _recorded_ancestor(self, run_id: Optional[UUID]) -> Optional[str]:
+        key = str(run_id) if run_id else None
+        while key is not None and key not in self._spans:
+            key = self._parents.get(key)
+        return key
+
+    def as_dict(self) -> dict:
+        spans = self.spans()
+        return {
+            "workflow_id": self.workflow_id,
+            "spans": [span.as_dict() for span in spans],
+            "summary": _summary(spans),
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace event format, one track per graph node."""
+        spans = self.spans()
+        by_id = {span.span_id: span for span in spans}
+        tracks: dict[str, int] = {}
+        events = []
+        for span in spans:
+            node = span
+            while node.kind not in (NODE, WORKFLOW) and node.parent_id in by_id:
+                node = by_id[node.parent_id]
+            if node.span_id not in tracks:
+                tracks[node.span_id] = len(tracks)
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": tracks[node.span_id],
+                        "args": {"name": node.name},
+                    }
+                )
+            end_ns = span.end_ns or time.time_ns()
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.kind,
+                    "ph": "X",
+                    "ts": span.start_ns / 1000,
+                    "dur": (end_ns - span.start_ns) / 1000,
+                    "pid": 1,
+                    "tid": tracks[node.span_id],
+                    "args": _attributes(span),
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"workflow_id": self.workflow_id},
+        }
+
+    def to_otlp(self) -> dict:
+        """OTLP/HTTP JSON `ExportTraceServiceRequest` body."""
+        trace_id = _trace_id(self.workflow_id)
+        otlp_spans = []
+        for span in self.spans():
+            attributes = {
+                "langmanus.span.kind": span.kind,
+                "langmanus.workflow_id": self.workflow_id,
+                **_attributes(span),
+            }
+            otlp_span = {
+                "traceId": trace_id,
+                "spanId": _span_id(span.span_id),
+                "name": span.name,
+                # SPAN_KIND_INTERNAL, or CLIENT for calls to the provider
+                "kind": 3 if span.kind == LLM else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in attributes.items()
+                ],
+                # STATUS_CODE_ERROR / STATUS_CODE_OK
+                "status": (
+                    {"code": 2, "message": span.error} if span.error else {"code": 1}
+                ),
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = _span_id(span.parent_id)
+            otlp_spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": "langmanus"},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+
+def _attributes(span: Span) -> dict:
+    attributes = {
+        "duration_ms": span.duration_ms,
+        "input_bytes": span.input_bytes,
+        "output_bytes": span.output_bytes,
+        "ttft_ms": span.ttft_ms,
+        "input_tokens": span.input_tokens,
+        "output_tokens": span.output_tokens,
+        "cached_tokens": span.cached_tokens,
+        "cached_token_ratio": span.cached_token_ratio,
+        "queue_wait_ms": span.queue_wait_ms,
+        "error": span.error,
+        **span.attributes,
+    }
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+def _summary(spans: list[Span]) -> dict:
+    """Totals per span kind and per node."""
+    kinds: dict[str, dict] = {}
+    nodes: dict[str, dict] = {}
+    for span in spans:
+        totals = kinds.setdefault(
+            span.kind,
+            {
+                "count": 0,
+                "duration_ms": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached_tokens": 0,
+                "queue_wait_ms": 0.0,
+            },
+        )
+        totals["count"] += 1
+        totals["duration_ms"] += span.duration_ms or 0.0
+        totals["input_tokens"] += span.input_tokens or 0
+        totals["output_tokens"] += span.output_tokens or 0
+        totals["cached_tokens"] += span.cached_tokens or 0
+        totals["queue_wait_ms"] += span.queue_wait_ms or 0.0
+        if span.kind == NODE:
+            node = nodes.setdefault(span.name, {"count": 0, "duration_ms": 0.0})
+            node["count"] += 1
+            node["duration_ms"] += span.duration_ms or 0.0
+    for totals in kinds.values():
+        totals["cached_token_ratio"] = (
+            totals["cached_tokens"] / totals["input_tokens"]
+            if totals["input_tokens"]
+            else 0.0
+        )
+    return {"kinds": kinds, "nodes": nodes}
+
+
+def _class_name(serialized: Optional[dict]) -> Optional[str]:
+    ids = (serialized or {}).get("id") or []
+    return (serialized or {}).get("name") or (ids[-1] if ids else None)
+
+
+def _trace_id(workflow_id: str) -> str:
+    try:
+        return uuid.UUID(workflow_id).hex
+    except ValueError:
+        return hashlib.md5(workflow_id.encode()).hexdigest()
+
+
+def _span_id(run_id: str) -> str:
+    # The tail of a run id is random for both uuid4 and uuid7 ids.
+    return uuid.UUID(run_id).hex[-16:]
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Records the spans of a graph run into a `WorkflowTrace`."""
+
+    # Inline handlers run in the caller's context, which is what lets an LLM
+    # span hook the gateway's queue-wait observer for the request it makes.
+    run_inline = True
+
+    def __init__(self, trace: WorkflowTrace):
+        self.trace = trace
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[list[str]] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.trace.link(run_id, parent_run_id)
+        name = kwargs.get("name")
+        if parent_run_id is None:
+            kind = WORKFLOW
+        elif (
+            metadata
+            and name
+            and metadata.get("langgraph_node") == name
+            # The graph's own bookkeeping, e.g. the __start__ node
+            and "langsmith:hidden" not in (tags or [])
+        ):
+            kind = NODE
+        else:
+            return
+        self.trace.start(
+            run_id,
+            parent_run_id,
+            kind,
+            name or "workflow",
+            input_bytes=payload_size(inputs),
+        )
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.trace.end(run_id, output_bytes=payload_size(outputs))
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.trace.end(run_id, error=repr(error))
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.trace.link(run_id, parent_run_id)
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            params.get("model")
+            or params.get("model_name")
+            or (metadata or {}).get("ls_model_name")
+        )
+        self.trace.start(
+            run_id,
+            parent_run_id,
+            LLM,
+            kwargs.get("name") or _class_name(serialized) or "llm",
+            input_bytes=payload_size(messages),
+            attributes={"model": model} if model else {},
+        )
+
+        def observe(seconds: float) -> None:
+            self.trace.add_queue_wait(run_id, seconds)
+
+        queue_wait_observer.set(observe)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self.trace.first_token(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        output_bytes = sum(
+            payload_size(getattr(generation, "message", None) or generation.text)
+            for generations in response.generations
+            for generation in generations
+        )
+        usage = token_usage(response)
+        self.trace.end(
+            run_id,
+            output_bytes=output_bytes,
+            input_tokens=usage["input"],
+            output_tokens=usage["output"],
+            cached_tokens=usage["cached"],
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.trace.end(run_id, error=repr(error))
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        inputs: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.trace.link(run_id, parent_run_id)
+        self.trace.start(
+            run_id,
+            parent_run_id,
+            TOOL,
+            kwargs.get("name") or serialized.get("name") or "tool",
+            input_bytes=payload_size(inputs if inputs is not None else input_str),
+        )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.trace.end(run_id, output_bytes=payload_size(output))
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.trace.end(run_id, error=repr(error))
+
+
+class TraceStore:
+    """The traces of the most recent `max_workflows` workflows."""
+
+    def __init__(self, max_workflows: int = 100):
+        self.max_workflows = max_workflows
+        self._traces: OrderedDict[str, WorkflowTrace] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workflows > 0
+
+    def trace(self, workflow_id: str) -> WorkflowTrace:
+        """The trace of `workflow_id`; created if missing."""
+        with self._lock:
+            trace = self._traces.get(workflow_id)
+            if trace is None:
+                trace = self._traces[workflow_id] = WorkflowTrace(workflow_id)
+            self._traces.move_to_end(workflow_id)
+            while len(self._traces) > self.max_workflows:
+                self._traces.popitem(last=False)
+            return trace
+
+    def get(self, workflow_id: str) -> Optional[WorkflowTrace]:
+        with self._lock:
+            return self._traces.get(workflow_id)
+
+
+trace_store = TraceStore(TRACE_MAX_WORKFLOWS)
+
+
+async def export_otlp(trace: WorkflowTrace, endpoint: str) -> None:
+    """POST the trace to an OTLP/HTTP collector; failures are only logged."""
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.post(endpoint, json=trace.to_otlp())
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Failed to export trace {trace.workflow_id} to {endpoint}: {e}")
@@ -1,8 +1,17 @@
+import asyncio
 import logging
+import sys
 
-from src.config import TEAM_MEMBERS
+from src.agents.usage import PromptCacheCallbackHandler
+from src.config import TEAM_MEMBERS, CHECKPOINT_DB, TRACE_OTLP_ENDPOINT
 from src.graph import build_graph
-from langchain_community.adapters.openai import convert_message_to_dict
+from src.graph.checkpoint import create_checkpointer
+from src.prompts.compaction import track_compaction
+from src.tools.browser_pool import get_browser_pool
+from src.tools.kernels import get_kernel_manager
+from src.tools.sandbox import get_workdir_pool
+from .event_translator import WorkflowEventTranslator
+from .tracing import TraceCallbackHandler, export_otlp, trace_store
 import uuid
 
 # Configure logging
@@ -19,12 +28,31 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
 
-# Cache for coordinator messages
-coordinator_cache = []
-MAX_CACHE_SIZE = 2
+def __getattr__(name: str):
+    """Create `checkpointer`, `graph` and `parallel_graph` on first access.
+
+    Each is cached as a plain module attribute afterwards, so tests and
+    benchmarks can still replace them. Both graphs share one saver so any
+    workflow can be resumed.
+    """
+    if name == "checkpointer":
+        value = create_checkpointer(CHECKPOINT_DB)
+    elif name == "graph":
+        value = build_graph(checkpointer=_this.checkpointer)
+    elif name == "parallel_graph":
+        value = build_graph(parallel=True, checkpointer=_this.checkpointer)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+# Module attributes must be read through the module for `__getattr__` to apply
+_this = sys.modules[__name__]
+
+# Keeps pending trace exports from being garbage collected.
+_export_tasks: set[asyncio.Task] = set()
 
 
 async def run_agent_workflow(
@@ -32,12 +60,18 @@ async def run_agent_workflow(
     debug: bool = False,
     deep_thinking_mode: bool = False,
     search_before_planning: bool = False,
+    parallel_execution: bool = False,
+    workflow_id: str | None = None,
 ):
     """Run the agent workflow with the given user input.
 
     Args:
         user_input_messages: The user request messages
         debug: If True, enables debug level logging
+        parallel_execution: If True, independent plan steps run concurrently
+        workflow_id: Id of an earlier, interrupted run to resume from its last
+            completed node. A new run is started under this id if nothing
+            was checkpointed for it.
 
     Returns:
         The final state after the workflow completes
@@ -50,159 +84,70 @@ async def run_agent_workflow(
 
     logger.info(f"Starting workflow with user input: {user_input_messages}")
 
-    workflow_id = str(uuid.uuid4())
-
-    streaming_llm_agents = [*TEAM_MEMBERS, "planner", "coordinator"]
-
-    # Reset coordinator cache at the start of each workflow
-    global coordinator_cache
-    coordinator_cache = []
-    global is_handoff_case
-    is_handoff_case = False
+    workflow_id = workflow_id or str(uuid.uuid4())
+    translator = WorkflowEventTranslator(workflow_id, user_input_messages)
+    prompt_cache = PromptCacheCallbackHandler()
+    config = {
+        "configurable": {"thread_id": workflow_id},
+        "metadata": {"parallel_execution": parallel_execution},
+        "callbacks": [prompt_cache],
+    }
+    if trace_store.enabled:
+        config["callbacks"].append(TraceCallbackHandler(trace_store.trace(workflow_id)))
+    inputs = {
+        # Constants
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        # Runtime Variables
+        "messages": user_input_messages,
+        "deep_thinking_mode": deep_thinking_mode,
+        "search_before_planning": search_before_planning,
+    }
+
+    snapshot = None
+    if _this.checkpointer is not None:
+        snapshot = await _this.graph.aget_state(config)
+    if snapshot is not None and snapshot.values:
+        # Keep running the graph the workflow was started with.
+        parallel_execution = snapshot.metadata.get(
+            "parallel_execution", parallel_execution
+        )
+        if not snapshot.next:
+            logger.info(f"Workflow {workflow_id} already finished")
+            for ydata in translator.replay(snapshot.values):
+                yield ydata
+            return
+        logger.info(f"Resuming workflow {workflow_id} at {list(snapshot.next)}")
+        inputs = None
+        for ydata in translator.resume(snapshot.next):
+            yield ydata
 
     # TODO: extract message content from object, specifically for on_chat_model_stream
-    async for event in graph.astream_events(
-        {
-            # Constants
-            "TEAM_MEMBERS": TEAM_MEMBERS,
-            # Runtime Variables
-            "messages": user_input_messages,
-            "deep_thinking_mode": deep_thinking_mode,
-            "search_before_planning": search_before_planning,
-        },
-        version="v2",
-    ):
-        kind = event.get("event")
-        data = event.get("data")
-        name = event.get("name")
-        metadata = event.get("metadata")
-        node = (
-            ""
-            if (metadata.get("checkpoint_ns") is None)
-            else metadata.get("checkpoint_ns").split(":")[0]
+    workflow_graph = _this.parallel_graph if parallel_execution else _this.graph
+    with track_compaction() as compaction:
+        async for event in workflow_graph.astream_events(inputs, config, version="v2"):
+            for ydata in translator.translate(event):
+                yield ydata
+
+    # Finished: the coder's Python kernel and working directory, and the
+    # browser context with its cookies and storage, go too.
+    get_kernel_manager().release(workflow_id)
+    get_workdir_pool().release(workflow_id)
+    get_browser_pool().release(workflow_id)
+    logger.info(
+        f"Workflow {workflow_id} compacted {compaction.compacted_calls}/"
+        f"{compaction.calls} prompts, saving ~{compaction.tokens_saved} tokens"
+    )
+    if prompt_cache.requests:
+        logger.info(
+            f"Workflow {workflow_id} got {prompt_cache.cached_token_ratio:.0%} of "
+            f"its prompt tokens from provider caches over "
+            f"{len(prompt_cache.requests)} LLM requests"
         )
-        langgraph_step = (
-            ""
-            if (metadata.get("langgraph_step") is None)
-            else str(metadata["langgraph_step"])
+    if trace_store.enabled and TRACE_OTLP_ENDPOINT:
+        task = asyncio.create_task(
+            export_otlp(trace_store.get(workflow_id), TRACE_OTLP_ENDPOINT)
         )
-        run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
-
-        if kind == "on_chain_start" and name in streaming_llm_agents:
-            if name == "planner":
-                yield {
-                    "event": "start_of_workflow",
-                    "data": {"workflow_id": workflow_id, "input": user_input_messages},
-                }
-            ydata = {
-                "event": "start_of_agent",
-                "data": {
-                    "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
-                },
-            }
-        elif kind == "on_chain_end" and name in streaming_llm_agents:
-            ydata = {
-                "event": "end_of_agent",
-                "data": {
-                    "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
-                },
-            }
-        elif kind == "on_chat_model_start" and node in streaming_llm_agents:
-            ydata = {
-                "event": "start_of_llm",
-                "data": {"agent_name": node},
-            }
-        elif kind == "on_chat_model_end" and node in streaming_llm_agents:
-            ydata = {
-                "event": "end_of_llm",
-                "data": {"agent_name": node},
-            }
-        elif kind == "on_chat_model_stream" and node in streaming_llm_agents:
-            content = data["chunk"].content
-            if content is None or content == "":
-                if not data["chunk"].additional_kwargs.get("reasoning_content"):
-                    # Skip empty messages
-                    continue
-                ydata = {
-                    "event": "message",
-                    "data": {
-                        "message_id": data["chunk"].id,
-                        "delta": {
-                            "reasoning_content": (
-                                data["chunk"].additional_kwargs["reasoning_content"]
-                            )
-                        },
-                    },
-                }
-            else:
-                # Check if the message is from the coordinator
-                if node == "coordinator":
-                    if len(coordinator_cache) < MAX_CACHE_SIZE:
-                        coordinator_cache.append(content)
-                        cached_content = "".join(coordinator_cache)
-                        if cached_content.startswith("handoff"):
-                            is_handoff_case = True
-                            continue
-                        if len(coordinator_cache) < MAX_CACHE_SIZE:
-                            continue
-                        # Send the cached message
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "message_id": data["chunk"].id,
-                                "delta": {"content": cached_content},
-                            },
-                        }
-                    elif not is_handoff_case:
-                        # For other agents, send the message directly
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "message_id": data["chunk"].id,
-                                "delta": {"content": content},
-                            },
-                        }
-                else:
-                    # For other agents, send the message directly
-                    ydata = {
-                        "event": "message",
-                        "data": {
-                            "message_id": data["chunk"].id,
-                            "delta": {"content": content},
-                        },
-                    }
-        elif kind == "on_tool_start" and node in TEAM_MEMBERS:
-            ydata = {
-                "event": "tool_call",
-                "data": {
-                    "tool_call_id": f"{workflow_id}_{node}_{name}_{run_id}",
-                    "tool_name": name,
-                    "tool_input": data.get("input"),
-                },
-            }
-        elif kind == "on_tool_end" and node in TEAM_MEMBERS:
-            ydata = {
-                "event": "tool_call_result",
-                "data": {
-                    "tool_call_id": f"{workflow_id}_{node}_{name}_{run_id}",
-                    "tool_name": name,
-                    "tool_result": data["output"].content if data.get("output") else "",
-                },
-            }
-        else:
-            continue
+        _export_tasks.add(task)
+        task.add_done_callback(_export_tasks.discard)
+    for ydata in translator.finish():
         yield ydata
-
-    if is_handoff_case:
-        yield {
-            "event": "end_of_workflow",
-            "data": {
-                "workflow_id": workflow_id,
-                "messages": [
-                    convert_message_to_dict(msg)
-                    for msg in data["output"].get("messages", [])
-                ],
-            },
-        }
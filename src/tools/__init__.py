@@ -1,14 +1,33 @@
-from .crawl import crawl_tool
-from .file_management import write_file_tool
-from .python_repl import python_repl_tool
-from .search import tavily_tool
-from .bash_tool import bash_tool
-from .browser import browser_tool
+import importlib
+
+# Tools are imported on first access: some of them (the browser in particular)
+# pull in heavy dependencies that most workflows never use.
+_TOOL_MODULES = {
+    "bash_tool": ".bash_tool",
+    "crawl_tool": ".crawl",
+    "crawl_many_tool": ".crawl",
+    "tavily_tool": ".search",
+    "multi_search_tool": ".search",
+    "python_repl_tool": ".python_repl",
+    "write_file_tool": ".file_management",
+    "browser_tool": ".browser",
+}
+
+
+def __getattr__(name: str):
+    if name not in _TOOL_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_TOOL_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "bash_tool",
     "crawl_tool",
+    "crawl_many_tool",
     "tavily_tool",
+    "multi_search_tool",
     "python_repl_tool",
     "write_file_tool",
     "browser_tool",
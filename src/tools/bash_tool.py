@@ -1,37 +1,104 @@
+import asyncio
 import logging
-import subprocess
 from typing import Annotated
-from langchain_core.tools import tool
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+
 from .decorators import log_io
+from .sandbox import (
+    CommandResult,
+    SandboxLimits,
+    get_workdir_pool,
+    run_command,
+)
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
 
-@tool
+def _workdir(config: RunnableConfig | None) -> str:
+    """The working directory of the workflow the command belongs to."""
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return get_workdir_pool().acquire(thread_id or "default")
+
+
+def _failed(returncode: int, stdout: str, stderr: str) -> str:
+    error_message = (
+        f"Command failed with exit code {returncode}.\n"
+        f"Stdout: {stdout}\nStderr: {stderr}"
+    )
+    logger.error(error_message)
+    return error_message
+
+
+def _timed_out(limits: SandboxLimits, stdout: str, stderr: str) -> str:
+    error_message = (
+        f"Command timed out after {limits.timeout:g}s and was killed.\n"
+        f"Stdout: {stdout}\nStderr: {stderr}"
+    )
+    logger.error(error_message)
+    return error_message
+
+
+def _result(limits: SandboxLimits, result: CommandResult) -> str:
+    if result.timed_out:
+        return _timed_out(limits, result.stdout, result.stderr)
+    if result.returncode:
+        return _failed(result.returncode, result.stdout, result.stderr)
+    return result.stdout
+
+
 @log_io
 def bash_tool(
     cmd: Annotated[str, "The bash command to be executed."],
+    config: RunnableConfig = None,
 ):
     """Use this to execute bash command and do necessary operations."""
     logger.info(f"Executing Bash Command: {cmd}")
+    limits = SandboxLimits()
     try:
-        # Execute the command and capture output
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True
-        )
-        # Return stdout as the result
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        # If command fails, return error information
-        error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
+        # The same executor as the async path, so a timeout also kills the
+        # command's background jobs and keeps the output read so far.
+        result = asyncio.run(run_command(cmd, _workdir(config), limits))
+    except Exception as e:
+        # Catch any other exceptions
+        error_message = f"Error executing command: {str(e)}"
         logger.error(error_message)
         return error_message
+    return _result(limits, result)
+
+
+@log_io
+async def abash_tool(
+    cmd: Annotated[str, "The bash command to be executed."],
+    config: RunnableConfig = None,
+):
+    """Use this to execute bash command and do necessary operations."""
+    logger.info(f"Executing Bash Command: {cmd}")
+
+    async def stream(name: str, text: str) -> None:
+        # Shown to the user as the command runs. The event belongs to the
+        # tool run, whose config is in the context; `config` is the caller's.
+        await adispatch_custom_event(
+            "tool_output", {"tool_name": "bash_tool", "stream": name, "text": text}
+        )
+
+    limits = SandboxLimits()
+    try:
+        result = await run_command(cmd, _workdir(config), limits, stream)
     except Exception as e:
-        # Catch any other exceptions
         error_message = f"Error executing command: {str(e)}"
         logger.error(error_message)
         return error_message
+    return _result(limits, result)
+
+
+# Async graph runs stream the output and never block a worker thread.
+bash_tool = StructuredTool.from_function(
+    func=bash_tool, coroutine=abash_tool, name="bash_tool"
+)
 
 
 if __name__ == "__main__":
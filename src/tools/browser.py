@@ -1,20 +1,32 @@
-import asyncio
+import functools
 
 from pydantic import BaseModel, Field
-from typing import Optional, ClassVar, Type
+from typing import ClassVar, Type
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
-from browser_use import Agent as BrowserAgent
-from src.agents.llm import vl_llm
+from langchain_core.runnables import ensure_config
+from src.agents.llm import create_openai_llm
+from src.tools.browser_pool import get_browser_pool
 from src.tools.decorators import create_logged_tool
-from src.config import CHROME_INSTANCE_PATH
+from src.config import VL_MODEL, VL_BASE_URL, VL_API_KEY
 
-expected_browser = None
 
-# Use Chrome instance if specified
-if CHROME_INSTANCE_PATH:
-    expected_browser = Browser(
-        config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH)
+@functools.cache
+def _browser_llm():
+    """The vision LLM of the browser agent.
+
+    Its async HTTP client is only used on the browser pool's event loop, so
+    it is not the instance the graph's agents share.
+    """
+    return create_openai_llm(model=VL_MODEL, base_url=VL_BASE_URL, api_key=VL_API_KEY)
+
+
+# browser_use is only imported once the browser is actually used; it takes
+# seconds to load and most workflows never open a browser.
+def _final_result(result) -> str:
+    from browser_use import AgentHistoryList
+
+    return (
+        str(result) if not isinstance(result, AgentHistoryList) else result.final_result
     )
 
 
@@ -31,45 +43,42 @@ class BrowserTool(BaseTool):
         "Use this tool to interact with web browsers. Input should be a natural language description of what you want to do with the browser, such as 'Go to google.com and search for browser-use', or 'Navigate to Reddit and find the top post about AI'."
     )
 
-    _agent: Optional[BrowserAgent] = None
-
     def _run(self, instruction: str) -> str:
         """Run the browser task synchronously."""
-        self._agent = BrowserAgent(
-            task=instruction,  # Will be set per request
-            llm=vl_llm,
-            browser=expected_browser,
-        )
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(self._agent.run())
-                return (
-                    str(result)
-                    if not isinstance(result, AgentHistoryList)
-                    else result.final_result
-                )
-            finally:
-                loop.close()
+            return get_browser_pool().run(_workflow_id(), _task(instruction))
         except Exception as e:
             return f"Error executing browser task: {str(e)}"
 
     async def _arun(self, instruction: str) -> str:
         """Run the browser task asynchronously."""
-        self._agent = BrowserAgent(
-            task=instruction, llm=vl_llm  # Will be set per request
-        )
         try:
-            result = await self._agent.run()
-            return (
-                str(result)
-                if not isinstance(result, AgentHistoryList)
-                else result.final_result
-            )
+            return await get_browser_pool().arun(_workflow_id(), _task(instruction))
         except Exception as e:
             return f"Error executing browser task: {str(e)}"
 
 
+def _workflow_id() -> str:
+    # The tool run's config, set in the context by BaseTool.
+    return ensure_config().get("configurable", {}).get("thread_id") or "default"
+
+
+def _task(instruction: str):
+    """The agent run for `instruction`, given the workflow's browser context."""
+
+    async def run(context) -> str:
+        from browser_use import Agent as BrowserAgent
+
+        agent = BrowserAgent(
+            task=instruction,
+            llm=_browser_llm(),
+            browser=context.browser,
+            browser_context=context,
+        )
+        return _final_result(await agent.run())
+
+    return run
+
+
 BrowserTool = create_logged_tool(BrowserTool)
 browser_tool = BrowserTool()
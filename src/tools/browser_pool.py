@@ -0,0 +1,382 @@
+"""
+Reusable browser sessions for `browser_tool`.
+
+Playwright objects belong to the event loop that created them. For that
+reason `BrowserSessionPool` runs one browser on its own event loop thread,
+and the sync and async tool paths both hand their work to it. The browser
+is launched on first use and kept running.
+
+Each workflow leases its own browser context. The context is kept across
+the workflow's browser calls, so a later instruction continues on the page
+an earlier one left open. A context is never handed to another workflow:
+once released or idle for `idle_seconds` it is closed, and cookies,
+storage and cache go with it. So a new workflow does not wait for a
+context to be created, `warm` empty contexts are kept open. At most
+`max_contexts` contexts are open at a time. When the pool is full, the
+least recently used idle workflow loses its context, or the lease waits
+up to `lease_timeout` for one to become idle.
+
+Before a context is reused it is health-checked. A page that does not
+answer gets its workflow a new context, and a disconnected browser is
+relaunched.
+
+With CHROME_INSTANCE_PATH set, browser_use drives the user's own Chrome
+and every context is that Chrome's default one. Workflows are then not
+isolated from each other.
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from src.config import (
+    BROWSER_HEADLESS,
+    BROWSER_IDLE_SECONDS,
+    BROWSER_LEASE_TIMEOUT,
+    BROWSER_MAX_CONTEXTS,
+    BROWSER_WARM_CONTEXTS,
+    CHROME_INSTANCE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Longest wait for a page to answer the health check.
+HEALTH_TIMEOUT = 5
+
+
+class BrowserPoolTimeout(TimeoutError):
+    """Every browser context stayed busy for the whole lease timeout."""
+
+
+@dataclass
+class _Session:
+    context: Any
+    last_used: float = field(default_factory=time.monotonic)
+    busy: int = 0
+
+
+class BrowserSessionPool:
+    def __init__(
+        self,
+        max_contexts: int = 4,
+        warm: int = 1,
+        idle_seconds: float = 300,
+        lease_timeout: float = 60,
+        headless: bool = True,
+        chrome_instance_path: Optional[str] = None,
+    ):
+        self.max_contexts = max_contexts
+        self.warm = min(warm, max_contexts)
+        self.idle_seconds = idle_seconds
+        self.lease_timeout = lease_timeout
+        self.headless = headless
+        self.chrome_instance_path = chrome_instance_path
+        # Everything below except `_stats` is only touched on the pool's loop.
+        self._browser = None
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._ready: list = []
+        self._creating = 0
+        self._capacity: Optional[asyncio.Condition] = None
+        self._launching: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "launches": 0,
+            "launch_ms": 0.0,
+            "cold_leases": 0,
+            "cold_lease_ms": 0.0,
+            "warm_leases": 0,
+            "warm_lease_ms": 0.0,
+            "reuses": 0,
+            "reuse_ms": 0.0,
+            "health_failures": 0,
+            "reaped": 0,
+            "evicted": 0,
+            "lease_timeouts": 0,
+        }
+
+    def run(self, key: str, task: Callable[[Any], Awaitable[T]]) -> T:
+        """`await task(context)` with the browser context of workflow `key`."""
+        return self._submit(self._use(key, task)).result()
+
+    async def arun(self, key: str, task: Callable[[Any], Awaitable[T]]) -> T:
+        return await asyncio.wrap_future(self._submit(self._use(key, task)))
+
+    def release(self, key: str) -> None:
+        """Close the context of workflow `key`, without waiting for it."""
+        with self._lock:
+            loop = self._loop
+        if loop is not None and not self._closed:
+            asyncio.run_coroutine_threadsafe(self._release(key), loop)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(
+                active=len(self._sessions),
+                busy=sum(bool(s.busy) for s in list(self._sessions.values())),
+                warm_ready=len(self._ready),
+                max_contexts=self.max_contexts,
+            )
+        for name in ("launch", "cold_lease", "warm_lease", "reuse"):
+            count = stats["launches" if name == "launch" else name + "s"]
+            stats[f"avg_{name}_ms"] = stats[f"{name}_ms"] / count if count else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(30)
+        except Exception as e:
+            logger.warning(f"Failed to close the browser: {e!r}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        if thread.is_alive():
+            return
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+    def _submit(self, coro: Awaitable[T]):
+        with self._lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("Browser pool is shut down")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="browser-pool", daemon=True
+                )
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._reap_forever(), self._loop)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    # The rest runs on the pool's loop.
+
+    async def _use(self, key: str, task: Callable[[Any], Awaitable[T]]) -> T:
+        session = await self._lease(key)
+        try:
+            return await task(session.context)
+        finally:
+            session.busy -= 1
+            session.last_used = time.monotonic()
+            async with self._capacity:
+                self._capacity.notify_all()
+
+    async def _lease(self, key: str) -> _Session:
+        started = time.perf_counter()
+        if self._capacity is None:
+            self._capacity = asyncio.Condition()
+        async with self._capacity:
+            session = self._sessions.get(key)
+            if session is not None:
+                if await self._healthy(session.context):
+                    self._sessions.move_to_end(key)
+                    session.busy += 1
+                    self._record("reuse", started)
+                    return session
+                await self._drop(key, session)
+
+            deadline = time.monotonic() + self.lease_timeout
+            while len(self._sessions) >= self.max_contexts:
+                if await self._evict_idle():
+                    continue
+                remaining = deadline - time.monotonic()
+                try:
+                    await asyncio.wait_for(self._capacity.wait(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    self._count("lease_timeouts")
+                    raise BrowserPoolTimeout(
+                        f"No browser context became free in {self.lease_timeout:g}s"
+                    )
+            context, warm = await self._take_context()
+            session = self._sessions[key] = _Session(context, busy=1)
+            self._record("warm_lease" if warm else "cold_lease", started)
+            self._replenish()
+            return session
+
+    async def _take_context(self) -> tuple[Any, bool]:
+        """A healthy warm context, or a newly created one; and which it was."""
+        await self._ensure_browser()
+        while self._ready:
+            context = self._ready.pop(0)
+            if await self._healthy(context):
+                return context, True
+            await self._close_context(context)
+        return await self._create_context(), False
+
+    async def _create_context(self):
+        from browser_use.browser.context import BrowserContext
+
+        context = BrowserContext(browser=self._browser)
+        try:
+            await context.get_session()
+        except BaseException:
+            await self._close_context(context)
+            raise
+        return context
+
+    async def _ensure_browser(self) -> None:
+        if self._launching is None:
+            self._launching = asyncio.Lock()
+        async with self._launching:
+            await self._launch()
+
+    async def _launch(self) -> None:
+        browser = self._browser
+        if browser is not None:
+            if browser.playwright_browser and browser.playwright_browser.is_connected():
+                return
+            logger.warning("Browser disconnected; relaunching")
+            self._count("health_failures")
+            await self._close_all()
+
+        from browser_use import Browser, BrowserConfig
+
+        started = time.perf_counter()
+        browser = Browser(
+            config=BrowserConfig(
+                headless=self.headless, chrome_instance_path=self.chrome_instance_path
+            )
+        )
+        await browser.get_playwright_browser()
+        self._browser = browser
+        self._record("launch", started)
+
+    async def _healthy(self, context) -> bool:
+        try:
+            page = await context.get_current_page()
+            await asyncio.wait_for(page.evaluate("1"), HEALTH_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning(f"Browser context failed its health check: {e!r}")
+            self._count("health_failures")
+            return False
+
+    def _replenish(self) -> None:
+        """Open contexts in the background until `warm` are ready."""
+        opened = len(self._sessions) + len(self._ready) + self._creating
+        missing = min(
+            self.warm - len(self._ready) - self._creating, self.max_contexts - opened
+        )
+        if self._closed or missing <= 0:
+            return
+        self._creating += missing
+        for _ in range(missing):
+            asyncio.ensure_future(self._create_warm())
+
+    async def _create_warm(self) -> None:
+        try:
+            await self._ensure_browser()
+            context = await self._create_context()
+        except Exception as e:
+            logger.warning(f"Failed to open a warm browser context: {e!r}")
+            return
+        finally:
+            self._creating -= 1
+        if self._closed:
+            await self._close_context(context)
+        else:
+            self._ready.append(context)
+
+    async def _evict_idle(self) -> bool:
+        for key, session in self._sessions.items():
+            if not session.busy:
+                self._count("evicted")
+                await self._drop(key, session)
+                return True
+        return False
+
+    async def _release(self, key: str) -> None:
+        session = self._sessions.get(key)
+        if session is not None and not session.busy:
+            await self._drop(key, session)
+            self._replenish()
+
+    async def _drop(self, key: str, session: _Session) -> None:
+        if self._sessions.get(key) is session:
+            del self._sessions[key]
+        await self._close_context(session.context)
+
+    async def _close_context(self, context) -> None:
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Failed to close browser context: {e!r}")
+
+    async def _close_all(self) -> None:
+        contexts = [
+            *self._ready,
+            *(session.context for session in self._sessions.values()),
+        ]
+        self._ready.clear()
+        self._sessions.clear()
+        for context in contexts:
+            await self._close_context(context)
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser: {e!r}")
+
+    async def reap(self) -> int:
+        """Close the contexts of workflows idle for longer than `idle_seconds`."""
+        cutoff = time.monotonic() - self.idle_seconds
+        idle = [
+            (key, session)
+            for key, session in self._sessions.items()
+            if not session.busy and session.last_used < cutoff
+        ]
+        for key, session in idle:
+            await self._drop(key, session)
+        self._count("reaped", len(idle))
+        if idle:
+            self._replenish()
+        return len(idle)
+
+    async def _reap_forever(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(max(min(self.idle_seconds / 4, 60), 0.05))
+            await self.reap()
+
+    def _record(self, name: str, started: float) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats["launches" if name == "launch" else name + "s"] += 1
+            self._stats[f"{name}_ms"] += elapsed
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+
+@functools.cache
+def get_browser_pool() -> BrowserSessionPool:
+    """The browser of every workflow; nothing is launched until first use."""
+    pool = BrowserSessionPool(
+        max_contexts=BROWSER_MAX_CONTEXTS,
+        warm=BROWSER_WARM_CONTEXTS,
+        idle_seconds=BROWSER_IDLE_SECONDS,
+        lease_timeout=BROWSER_LEASE_TIMEOUT,
+        headless=BROWSER_HEADLESS,
+        chrome_instance_path=CHROME_INSTANCE_PATH or None,
+    )
+    atexit.register(pool.shutdown)
+    return pool
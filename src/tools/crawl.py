@@ -2,25 +2,108 @@ import logging
 from typing import Annotated
 
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
+
 from .decorators import log_io
 
-from src.crawler import Crawler
+from src.config import CRAWL_CHUNK_TOKENS, CRAWL_MAX_TOKENS
+from src.crawler import Article, Crawler
+from src.crawler.renderer import ArticleRenderer
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the links fetched by one crawl_many_tool call.
+MAX_URLS_PER_CALL = 10
+
+_NO_URLS = "No urls to crawl. Pass at least one url."
+
+
+def _crawl_error(url: str, error: BaseException) -> str:
+    error_msg = f"Failed to crawl {url}. Error: {repr(error)}"
+    logger.error(error_msg)
+    return error_msg
+
+
+def _renderer(pages: int = 1) -> ArticleRenderer:
+    # Pages crawled together share the budget of one page.
+    return ArticleRenderer(max(CRAWL_MAX_TOKENS // pages, CRAWL_CHUNK_TOKENS))
+
+
+def _combine(urls: list[str], results: list[Article | Exception], query: str) -> dict:
+    """One user message with every crawled page, or the error, per URL."""
+    renderer = _renderer(len(urls))
+    content: list[dict] = []
+    for url, result in zip(urls, results):
+        content.append({"type": "text", "text": f"## {url}"})
+        if isinstance(result, Exception):
+            content.append({"type": "text", "text": _crawl_error(url, result)})
+        else:
+            content.extend(renderer.iter_blocks(result, query))
+    return {"role": "user", "content": content}
+
 
-@tool
 @log_io
 def crawl_tool(
     url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        str, "What you are looking for; the most relevant parts are kept."
+    ] = "",
 ) -> HumanMessage:
     """Use this to crawl a url and get a readable content in markdown format."""
     try:
-        crawler = Crawler()
-        article = crawler.crawl(url)
-        return {"role": "user", "content": article.to_message()}
+        article = Crawler().crawl(url)
+        return {"role": "user", "content": _renderer().render(article, query)}
     except BaseException as e:
-        error_msg = f"Failed to crawl. Error: {repr(e)}"
-        logger.error(error_msg)
-        return error_msg
+        return _crawl_error(url, e)
+
+
+@log_io
+async def acrawl_tool(
+    url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        str, "What you are looking for; the most relevant parts are kept."
+    ] = "",
+) -> HumanMessage:
+    """Use this to crawl a url and get a readable content in markdown format."""
+    try:
+        article = await Crawler().acrawl(url)
+        return {"role": "user", "content": _renderer().render(article, query)}
+    except Exception as e:
+        return _crawl_error(url, e)
+
+
+@log_io
+def crawl_many_tool(
+    urls: Annotated[list[str], "The urls to crawl, at most 10."],
+    query: Annotated[
+        str, "What you are looking for; the most relevant parts are kept."
+    ] = "",
+) -> HumanMessage:
+    """Use this to crawl several urls at once and get their readable content in markdown format. Prefer it over calling crawl_tool once per url."""
+    if not urls:
+        return _NO_URLS
+    urls = urls[:MAX_URLS_PER_CALL]
+    return _combine(urls, Crawler().crawl_many_sync(urls), query)
+
+
+@log_io
+async def acrawl_many_tool(
+    urls: Annotated[list[str], "The urls to crawl, at most 10."],
+    query: Annotated[
+        str, "What you are looking for; the most relevant parts are kept."
+    ] = "",
+) -> HumanMessage:
+    """Use this to crawl several urls at once and get their readable content in markdown format. Prefer it over calling crawl_tool once per url."""
+    if not urls:
+        return _NO_URLS
+    urls = urls[:MAX_URLS_PER_CALL]
+    return _combine(urls, await Crawler().crawl_many(urls), query)
+
+
+# Async graph runs await the pooled async crawler instead of blocking a thread.
+crawl_tool = StructuredTool.from_function(
+    func=crawl_tool, coroutine=acrawl_tool, name="crawl_tool"
+)
+crawl_many_tool = StructuredTool.from_function(
+    func=crawl_many_tool, coroutine=acrawl_many_tool, name="crawl_many_tool"
+)
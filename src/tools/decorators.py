@@ -1,61 +1,229 @@
-import logging
+import bisect
 import functools
+import inspect
+import logging
+import reprlib
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any, Callable, Type, TypeVar
 
+from src.config.tools import TOOL_LOG_PREVIEW_CHARS
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Upper bounds, in seconds, of the tool latency histogram buckets.
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+# Set while a call is being measured, so a tool whose async path runs its
+# sync `_run` in a thread is not counted twice.
+_measuring: ContextVar[bool] = ContextVar("tool_measuring", default=False)
+
+
+class _Preview:
+    """Truncated repr of a value, only built if a log record is emitted."""
+
+    _repr = reprlib.Repr()
+    _repr.maxstring = TOOL_LOG_PREVIEW_CHARS
+    _repr.maxother = TOOL_LOG_PREVIEW_CHARS
+    _repr.maxlist = _repr.maxtuple = _repr.maxdict = 10
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        preview = self._repr.repr(self.value)
+        size = payload_chars(self.value)
+        if len(preview) < size:
+            preview += f" ({size} chars)"
+        return preview
+
+
+class _Params:
+    """Call arguments formatted as `a, b, k=v` when a log record is emitted."""
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args: tuple, kwargs: dict):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return ", ".join(
+            [
+                *(str(_Preview(arg)) for arg in self.args),
+                *(f"{k}={_Preview(v)}" for k, v in self.kwargs.items()),
+            ]
+        )
+
+
+def payload_chars(value: Any) -> int:
+    """Size of a tool payload in characters, without copying it."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_chars(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_chars(item) for item in value)
+    content = getattr(value, "content", None)
+    return payload_chars(content) if content is not None else 0
+
+
+class ToolMetrics:
+    """Per-tool call counters, latency histogram and payload sizes."""
+
+    def __init__(self):
+        self._tools: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        tool_name: str,
+        seconds: float,
+        chars_in: int,
+        chars_out: int,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            stats = self._tools.get(tool_name)
+            if stats is None:
+                stats = self._tools[tool_name] = {
+                    "calls": 0,
+                    "errors": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                    "chars_in": 0,
+                    "chars_out": 0,
+                }
+            stats["calls"] += 1
+            stats["errors"] += error
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats["chars_in"] += chars_in
+            stats["chars_out"] += chars_out
+
+    @contextmanager
+    def measure(self, tool_name: str, args: tuple, kwargs: dict):
+        """Record the call made inside the block; yields a result setter."""
+        if _measuring.get():
+            yield lambda result: result
+            return
+        token = _measuring.set(True)
+        outcome = {}
+        start = time.perf_counter()
+        try:
+            yield lambda result: outcome.setdefault("result", result)
+        except BaseException:
+            outcome["error"] = True
+            raise
+        finally:
+            _measuring.reset(token)
+            self.record(
+                tool_name,
+                time.perf_counter() - start,
+                payload_chars(args) + payload_chars(kwargs),
+                payload_chars(outcome.get("result")),
+                outcome.get("error", False),
+            )
+
+    def stats(self) -> dict:
+        labels = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "latency_buckets": dict(zip(labels, stats["latency_buckets"])),
+                }
+                for name, stats in self._tools.items()
+            }
+
+
+tool_metrics = ToolMetrics()
+
+
+def _log_call(tool_name: str, args: tuple, kwargs: dict) -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Tool %s called with parameters: %s", tool_name, _Params(args, kwargs)
+        )
+
+
+def _log_result(tool_name: str, result: Any) -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Tool %s returned: %s", tool_name, _Preview(result))
+
 
 def log_io(func: Callable) -> Callable:
     """
     A decorator that logs the input parameters and output of a tool function.
 
+    Parameters and results are only formatted when DEBUG logging is on, and
+    are truncated to `TOOL_LOG_PREVIEW_CHARS`. Every call is counted in
+    `tool_metrics`.
+
     Args:
         func: The tool function to be decorated
 
     Returns:
         The wrapped function with input/output logging
     """
+    func_name = func.__name__
 
-    @functools.wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        # Log input parameters
-        func_name = func.__name__
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
-        )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+    if inspect.iscoroutinefunction(func):
 
-        # Execute the function
-        result = func(*args, **kwargs)
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            _log_call(func_name, args, kwargs)
+            with tool_metrics.measure(func_name, args, kwargs) as set_result:
+                result = set_result(await func(*args, **kwargs))
+            _log_result(func_name, result)
+            return result
 
-        # Log the output
-        logger.debug(f"Tool {func_name} returned: {result}")
+        return async_wrapper
 
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        _log_call(func_name, args, kwargs)
+        with tool_metrics.measure(func_name, args, kwargs) as set_result:
+            result = set_result(func(*args, **kwargs))
+        _log_result(func_name, result)
         return result
 
     return wrapper
 
 
 class LoggedToolMixin:
-    """A mixin class that adds logging functionality to any tool."""
+    """A mixin class that adds logging and metrics to any tool."""
+
+    @property
+    def _tool_name(self) -> str:
+        return self.__class__.__name__.replace("Logged", "")
 
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
-        tool_name = self.__class__.__name__.replace("Logged", "")
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
-        )
-        logger.debug(f"Tool {tool_name}.{method_name} called with parameters: {params}")
+        _log_call(f"{self._tool_name}.{method_name}", args, kwargs)
 
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """Override _run method to add logging."""
         self._log_operation("_run", *args, **kwargs)
-        result = super()._run(*args, **kwargs)
-        logger.debug(
-            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
-        )
+        with tool_metrics.measure(self._tool_name, args, kwargs) as set_result:
+            result = set_result(super()._run(*args, **kwargs))
+        _log_result(self._tool_name, result)
+        return result
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """Override _arun method to add logging."""
+        self._log_operation("_arun", *args, **kwargs)
+        with tool_metrics.measure(self._tool_name, args, kwargs) as set_result:
+            result = set_result(await super()._arun(*args, **kwargs))
+        _log_result(self._tool_name, result)
         return result
 
 
@@ -0,0 +1,93 @@
+"""
+Python kernel process started by `src.tools.kernels`.
+
+Runs as a script with only the standard library on the path. Requests and
+replies are JSON lines on the kernel's original stdin and stdout. File
+descriptors 1 and 2 are redirected to a scratch file, so output written
+by the code (prints, tracebacks, subprocesses) is captured and never
+mixes with the protocol.
+
+    python kernel_worker.py --memory-mb 4096 --preload numpy,pandas
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+
+def _output(scratch, max_chars: int) -> str:
+    """The head and tail of what the last execution wrote."""
+    size = scratch.seek(0, os.SEEK_END)
+    scratch.seek(0)
+    head_chars = max_chars // 2
+    tail_chars = max_chars - head_chars
+    # UTF-8 takes at most 4 bytes per character.
+    if size <= max_chars * 4:
+        text = scratch.read().decode("utf-8", "replace")
+        if len(text) <= max_chars:
+            return text
+        head, tail = text[:head_chars], text[len(text) - tail_chars :]
+    else:
+        head = scratch.read(head_chars * 4).decode("utf-8", "replace")[:head_chars]
+        scratch.seek(-tail_chars * 4, os.SEEK_END)
+        tail = scratch.read().decode("utf-8", "replace")[-tail_chars:]
+    return f"{head}\n... [output truncated to {max_chars} characters] ...\n{tail}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory-mb", type=int, default=0)
+    parser.add_argument("--preload", default="")
+    parser.add_argument("--max-output-chars", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Do not let the code import this directory's modules by accident.
+    sys.path.pop(0)
+    if args.memory_mb:
+        import resource
+
+        limit = args.memory_mb * 2**20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    for module in filter(None, args.preload.split(",")):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    scratch = tempfile.TemporaryFile()
+    os.dup2(scratch.fileno(), 1)
+    os.dup2(scratch.fileno(), 2)
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    replies.write(json.dumps({"ready": True}) + "\n")
+
+    for line in requests:
+        request = json.loads(line)
+        if "chdir" in request:
+            os.chdir(request["chdir"])
+            replies.write(json.dumps({"ok": True}) + "\n")
+            continue
+        scratch.seek(0)
+        scratch.truncate()
+        error = False
+        try:
+            exec(compile(request["code"], "<repl>", "exec"), namespace)
+        except BaseException as e:
+            error = True
+            # Leave this file's frame out of the traceback.
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        output = _output(scratch, args.max_output_chars)
+        replies.write(json.dumps({"output": output, "error": error}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
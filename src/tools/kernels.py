@@ -0,0 +1,326 @@
+"""
+Per-workflow Python kernels for `python_repl_tool`.
+
+Every workflow gets its own interpreter process (`kernel_worker.py`), so
+variables never leak between users and a long computation only blocks its
+own workflow. Kernels run in the workflow's sandbox directory, shared
+with `bash_tool`, and get the same sanitized environment. Each kernel's
+address space is capped at `memory_mb`.
+
+`KernelManager` keeps `warm` interpreters started in the background, with
+the `preload` modules (numpy and pandas) already imported. A new workflow
+takes one of them instead of paying the import time. An execution that
+runs longer than `timeout` kills its kernel; the next one starts fresh.
+Kernels idle for `idle_seconds` are reaped, and beyond `max_kernels` the
+least recently used kernel is stopped.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.config import (
+    BASH_MAX_OUTPUT_CHARS,
+    PYTHON_KERNEL_IDLE_SECONDS,
+    PYTHON_KERNEL_MAX,
+    PYTHON_KERNEL_MEMORY_MB,
+    PYTHON_KERNEL_PRELOAD,
+    PYTHON_KERNEL_TIMEOUT,
+    PYTHON_KERNEL_WARM,
+)
+
+from .sandbox import get_workdir_pool, sandbox_env
+
+logger = logging.getLogger(__name__)
+
+WORKER = os.path.join(os.path.dirname(__file__), "kernel_worker.py")
+# Longest wait for a kernel to import its preload modules.
+START_TIMEOUT = 120
+
+
+class KernelError(RuntimeError):
+    """The kernel died or did not answer; its state is lost."""
+
+
+class KernelTimeout(KernelError, TimeoutError):
+    """An execution ran past the timeout and its kernel was killed."""
+
+
+class Kernel:
+    def __init__(self, memory_mb: int, preload: str, max_output_chars: int):
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                WORKER,
+                f"--memory-mb={memory_mb}",
+                f"--preload={preload}",
+                f"--max-output-chars={max_output_chars}",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=sandbox_env(),
+            start_new_session=True,
+        )
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def wait_ready(self, timeout: float = START_TIMEOUT) -> None:
+        self._read(timeout)
+
+    def chdir(self, path: str) -> None:
+        with self.lock:
+            self._send({"chdir": path})
+            self._read(START_TIMEOUT)
+
+    def execute(self, code: str, timeout: float) -> tuple[str, bool]:
+        """Run `code`; its output and whether it raised."""
+        with self.lock:
+            self.last_used = time.monotonic()
+            self._send({"code": code})
+            reply = self._read(timeout)
+            self.last_used = time.monotonic()
+        return reply["output"], reply["error"]
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+    def _send(self, request: dict) -> None:
+        try:
+            self.process.stdin.write(json.dumps(request).encode() + b"\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            self.kill()
+            raise KernelError(f"Python kernel is gone: {e!r}")
+
+    def _read(self, timeout: float) -> dict:
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.process.stdout, selectors.EVENT_READ)
+            ready = selector.select(timeout)
+        if not ready:
+            self.kill()
+            raise KernelTimeout(f"Execution took over {timeout:g}s")
+        line = self.process.stdout.readline()
+        if not line:
+            self.kill()
+            raise KernelError(
+                f"Python kernel exited with code {self.process.returncode}"
+            )
+        return json.loads(line)
+
+
+class KernelManager:
+    def __init__(
+        self,
+        warm: int = 2,
+        max_kernels: int = 16,
+        idle_seconds: float = 600,
+        timeout: float = 120,
+        memory_mb: int = 4096,
+        preload: str = "numpy,pandas",
+        max_output_chars: int = 20000,
+    ):
+        self.warm = warm
+        self.max_kernels = max_kernels
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.preload = preload
+        self.max_output_chars = max_output_chars
+        self._kernels: OrderedDict[str, Kernel] = OrderedDict()
+        self._ready: list[Kernel] = []
+        self._starting = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reaper: Optional[threading.Thread] = None
+        self._stats = {
+            "acquisitions": 0,
+            "warm_starts": 0,
+            "cold_starts": 0,
+            "executions": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "reaped": 0,
+            "evicted": 0,
+        }
+
+    def execute(self, key: str, code: str) -> tuple[str, bool]:
+        """Run `code` in the kernel of workflow `key`."""
+        kernel = self.acquire(key)
+        try:
+            result = kernel.execute(code, self.timeout)
+        except KernelError as e:
+            with self._lock:
+                if self._kernels.get(key) is kernel:
+                    del self._kernels[key]
+                self._count_locked(
+                    "timeouts" if isinstance(e, KernelTimeout) else "crashes"
+                )
+            raise
+        with self._lock:
+            self._count_locked("executions")
+        return result
+
+    def acquire(self, key: str) -> Kernel:
+        with self._lock:
+            kernel = self._kernels.get(key)
+            if kernel is not None and kernel.alive:
+                self._kernels.move_to_end(key)
+                return kernel
+            self._count_locked("acquisitions")
+            kernel = None
+            while self._ready and kernel is None:
+                candidate = self._ready.pop(0)
+                kernel = candidate if candidate.alive else None
+            self._count_locked("warm_starts" if kernel else "cold_starts")
+        self._replenish()
+        self._start_reaper()
+        if kernel is None:
+            kernel = self._start()
+        kernel.chdir(get_workdir_pool().acquire(key))
+        with self._lock:
+            current = self._kernels.get(key)
+            if current is not None and current.alive:
+                # Another thread got a kernel for the workflow first.
+                self._ready.append(kernel)
+                return current
+            self._kernels[key] = kernel
+            evicted = []
+            while len(self._kernels) > self.max_kernels:
+                evicted.append(self._kernels.popitem(last=False)[1])
+                self._count_locked("evicted")
+        for old in evicted:
+            old.kill()
+        return kernel
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            kernel = self._kernels.pop(key, None)
+        if kernel is not None:
+            kernel.kill()
+
+    def reap(self) -> int:
+        """Stop the kernels idle for longer than `idle_seconds`."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [
+                key
+                for key, kernel in self._kernels.items()
+                if kernel.last_used < cutoff and not kernel.lock.locked()
+            ]
+            kernels = [self._kernels.pop(key) for key in idle]
+            self._count_locked("reaped", len(kernels))
+        for kernel in kernels:
+            kernel.kill()
+        return len(kernels)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            busy = sum(kernel.lock.locked() for kernel in self._kernels.values())
+            stats.update(
+                active=len(self._kernels),
+                busy=busy,
+                warm_ready=len(self._ready),
+                warm_starting=self._starting,
+                max_kernels=self.max_kernels,
+            )
+        stats["utilization"] = stats["active"] / self.max_kernels
+        acquisitions = stats["acquisitions"]
+        stats["cold_start_rate"] = (
+            stats["cold_starts"] / acquisitions if acquisitions else 0.0
+        )
+        return stats
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            kernels = [*self._ready, *self._kernels.values()]
+            self._ready.clear()
+            self._kernels.clear()
+        for kernel in kernels:
+            kernel.kill()
+
+    def _start(self) -> Kernel:
+        kernel = Kernel(self.memory_mb, self.preload, self.max_output_chars)
+        try:
+            kernel.wait_ready()
+        except KernelError:
+            logger.error("Python kernel failed to start")
+            raise
+        return kernel
+
+    def _replenish(self) -> None:
+        """Start kernels in the background until `warm` are ready."""
+        with self._lock:
+            missing = self.warm - len(self._ready) - self._starting
+            if self._closed or missing <= 0:
+                return
+            self._starting += missing
+        for _ in range(missing):
+            threading.Thread(target=self._start_warm, daemon=True).start()
+
+    def _start_warm(self) -> None:
+        try:
+            kernel = self._start()
+        except KernelError:
+            kernel = None
+        with self._lock:
+            self._starting -= 1
+            if kernel is not None and not self._closed:
+                self._ready.append(kernel)
+                kernel = None
+        if kernel is not None:
+            kernel.kill()
+
+    def _start_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, daemon=True)
+        self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while not self._closed:
+            time.sleep(max(min(self.idle_seconds / 4, 60), 0.05))
+            self.reap()
+
+    def _count_locked(self, name: str, amount: int = 1) -> None:
+        self._stats[name] += amount
+
+
+@functools.cache
+def get_kernel_manager() -> KernelManager:
+    """The kernels of every workflow; none are started until first use."""
+    manager = KernelManager(
+        warm=PYTHON_KERNEL_WARM,
+        max_kernels=PYTHON_KERNEL_MAX,
+        idle_seconds=PYTHON_KERNEL_IDLE_SECONDS,
+        timeout=PYTHON_KERNEL_TIMEOUT,
+        memory_mb=PYTHON_KERNEL_MEMORY_MB,
+        preload=PYTHON_KERNEL_PRELOAD,
+        max_output_chars=BASH_MAX_OUTPUT_CHARS,
+    )
+    # Kernels run in their own sessions and would outlive the server.
+    atexit.register(manager.shutdown)
+    return manager
@@ -1,30 +1,68 @@
+import asyncio
 import logging
+import re
 from typing import Annotated
-from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+
 from .decorators import log_io
+from .kernels import KernelError, get_kernel_manager
 
-# Initialize REPL and logger
-repl = PythonREPL()
 logger = logging.getLogger(__name__)
 
+# Backticks and a leading "python" the LLM sometimes wraps its code in.
+_FENCE_START = re.compile(r"^(\s|`)*(?i:python)?\s*")
+_FENCE_END = re.compile(r"(\s|`)*$")
 
-@tool
-@log_io
-def python_repl_tool(
-    code: Annotated[
-        str, "The python code to execute to do further analysis or calculation."
-    ],
-):
-    """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
-    you should print it out with `print(...)`. This is visible to the user."""
+
+def _run(code: str, config: RunnableConfig | None) -> str:
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    code = _FENCE_END.sub("", _FENCE_START.sub("", code))
     logger.info("Executing Python code")
     try:
-        result = repl.run(code)
+        result, _ = get_kernel_manager().execute(thread_id or "default", code)
         logger.info("Code execution successful")
+    except KernelError as e:
+        error_msg = (
+            f"Failed to execute. Error: {repr(e)}. The Python session was "
+            "restarted; variables defined earlier are lost."
+        )
+        logger.error(error_msg)
+        return error_msg
     except BaseException as e:
         error_msg = f"Failed to execute. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
     result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
     return result_str
+
+
+@log_io
+def python_repl_tool(
+    code: Annotated[
+        str, "The python code to execute to do further analysis or calculation."
+    ],
+    config: RunnableConfig = None,
+):
+    """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
+    you should print it out with `print(...)`. This is visible to the user."""
+    return _run(code, config)
+
+
+@log_io
+async def apython_repl_tool(
+    code: Annotated[
+        str, "The python code to execute to do further analysis or calculation."
+    ],
+    config: RunnableConfig = None,
+):
+    """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
+    you should print it out with `print(...)`. This is visible to the user."""
+    return await asyncio.to_thread(_run, code, config)
+
+
+# Each workflow runs its code in its own kernel process.
+python_repl_tool = StructuredTool.from_function(
+    func=python_repl_tool, coroutine=apython_repl_tool, name="python_repl_tool"
+)
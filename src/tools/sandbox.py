@@ -0,0 +1,260 @@
+"""
+Resource-limited execution of the coder's shell commands.
+
+Commands run in bash, in a new session, inside the working directory of
+their workflow. Before the command starts, `ulimit` caps its CPU time,
+address space and process count. The executor (the sync tool runs it on
+an event loop of its own) kills the whole process group when the
+wall-clock timeout expires. It reads stdout and stderr while the command
+runs, reports them through `on_output`, and keeps only the head and the
+tail of each, so a command that prints gigabytes does not fill the
+server's memory. Variables that look like credentials
+are removed from the command's environment.
+
+Working directories come from `WorkdirPool`, which keeps a few empty
+directories ready and hands each workflow its own one.
+"""
+
+import asyncio
+import atexit
+import codecs
+import functools
+import os
+import re
+import shutil
+import signal
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from src.config import (
+    BASH_CPU_SECONDS,
+    BASH_MAX_OUTPUT_CHARS,
+    BASH_MAX_PROCESSES,
+    BASH_MEMORY_MB,
+    BASH_TIMEOUT,
+    SANDBOX_POOL_SIZE,
+    SANDBOX_ROOT,
+)
+
+BASH = shutil.which("bash") or "/bin/sh"
+
+_SECRET = re.compile(r"KEY|SECRET|TOKEN|PASSWORD|CREDENTIAL", re.IGNORECASE)
+_READ_SIZE = 65536
+
+
+@dataclass
+class SandboxLimits:
+    timeout: float = BASH_TIMEOUT
+    cpu_seconds: int = BASH_CPU_SECONDS
+    memory_mb: int = BASH_MEMORY_MB
+    max_processes: int = BASH_MAX_PROCESSES
+    max_output_chars: int = BASH_MAX_OUTPUT_CHARS
+
+    def script(self, cmd: str) -> str:
+        """`cmd` preceded by the `ulimit` calls that enforce the limits."""
+        limits = [
+            ("-t", self.cpu_seconds),
+            ("-v", self.memory_mb * 1024),
+            ("-u", self.max_processes),
+        ]
+        prefix = "".join(
+            f"ulimit {flag} {value} 2>/dev/null\n" for flag, value in limits if value
+        )
+        return prefix + cmd
+
+
+def sandbox_env() -> dict:
+    """The server's environment without anything that looks like a secret."""
+    return {
+        name: value for name, value in os.environ.items() if not _SECRET.search(name)
+    }
+
+
+class OutputBuffer:
+    """Keeps the first and last `max_chars / 2` characters written to it."""
+
+    def __init__(self, max_chars: int):
+        self.head_chars = max_chars // 2
+        self.tail_chars = max_chars - self.head_chars
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+        self.total = 0
+
+    def write(self, text: str) -> None:
+        self.total += len(text)
+        room = self.head_chars - self._head_len
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_len += len(text[:room])
+            text = text[room:]
+        if text:
+            self._tail.append(text)
+            self._tail_len += len(text)
+            while self._tail_len - len(self._tail[0]) >= self.tail_chars:
+                self._tail_len -= len(self._tail.popleft())
+
+    def getvalue(self) -> str:
+        head, tail = "".join(self._head), "".join(self._tail)
+        if self.total <= self.head_chars + self.tail_chars:
+            return head + tail
+        tail = tail[-self.tail_chars :] if self.tail_chars else ""
+        dropped = self.total - len(head) - len(tail)
+        return f"{head}\n... [{dropped} characters truncated] ...\n{tail}"
+
+
+def truncate(text: Optional[str], max_chars: int = BASH_MAX_OUTPUT_CHARS) -> str:
+    buffer = OutputBuffer(max_chars)
+    buffer.write(text or "")
+    return buffer.getvalue()
+
+
+@dataclass
+class CommandResult:
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+
+
+async def run_command(
+    cmd: str,
+    cwd: str,
+    limits: Optional[SandboxLimits] = None,
+    on_output: Optional[Callable[[str, str], Awaitable[None]]] = None,
+) -> CommandResult:
+    """Run `cmd` under `limits`; `on_output(stream, text)` sees the output live.
+
+    At most `max_output_chars` characters of each stream are passed to
+    `on_output`.
+    """
+    limits = limits or SandboxLimits()
+    process = await asyncio.create_subprocess_exec(
+        BASH,
+        "-c",
+        limits.script(cmd),
+        cwd=cwd,
+        env=sandbox_env(),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    buffers = {
+        "stdout": OutputBuffer(limits.max_output_chars),
+        "stderr": OutputBuffer(limits.max_output_chars),
+    }
+
+    async def pump(name: str, stream: asyncio.StreamReader) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        buffer = buffers[name]
+        while chunk := await stream.read(_READ_SIZE):
+            text = decoder.decode(chunk)
+            streamed = buffer.total
+            buffer.write(text)
+            if on_output and text and streamed < limits.max_output_chars:
+                await on_output(name, text[: limits.max_output_chars - streamed])
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                pump("stdout", process.stdout),
+                pump("stderr", process.stderr),
+                process.wait(),
+            ),
+            limits.timeout,
+        )
+    except asyncio.TimeoutError:
+        # A background job holding the pipes open is not a timeout of the
+        # command itself.
+        timed_out = process.returncode is None
+    finally:
+        # Also stops anything the command left running in the background.
+        _kill_group(process.pid)
+        await process.wait()
+    return CommandResult(
+        process.returncode,
+        buffers["stdout"].getvalue(),
+        buffers["stderr"].getvalue(),
+        timed_out,
+    )
+
+
+def _kill_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class WorkdirPool:
+    """Per-workflow working directories, created ahead of time.
+
+    `acquire(key)` returns the directory of a workflow, taking a ready one
+    on first use. Directories of released workflows are deleted; beyond
+    `max_active`, the least recently used workflow is released.
+    """
+
+    def __init__(self, root: str = "", size: int = 4, max_active: int = 64):
+        self._temporary = not root
+        self.root = root or tempfile.mkdtemp(prefix="langmanus-sandbox-")
+        os.makedirs(self.root, exist_ok=True)
+        self.size = size
+        self.max_active = max_active
+        self._ready: list[str] = []
+        self._active: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fill()
+
+    def acquire(self, key: str) -> str:
+        with self._lock:
+            path = self._active.get(key)
+            if path is not None:
+                self._active.move_to_end(key)
+                return path
+            path = self._ready.pop() if self._ready else self._create()
+            self._active[key] = path
+            evicted = []
+            while len(self._active) > self.max_active:
+                evicted.append(self._active.popitem(last=False)[1])
+        for old in evicted:
+            shutil.rmtree(old, ignore_errors=True)
+        self._fill()
+        return path
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            path = self._active.pop(key, None)
+        if path is not None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def close(self) -> None:
+        with self._lock:
+            paths = [*self._ready, *self._active.values()]
+            self._ready.clear()
+            self._active.clear()
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+        if self._temporary:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _fill(self) -> None:
+        with self._lock:
+            while len(self._ready) < self.size:
+                self._ready.append(self._create())
+
+    def _create(self) -> str:
+        return tempfile.mkdtemp(prefix="workflow-", dir=self.root)
+
+
+@functools.cache
+def get_workdir_pool() -> WorkdirPool:
+    """The working directories shared by the coder's tools."""
+    pool = WorkdirPool(SANDBOX_ROOT, SANDBOX_POOL_SIZE)
+    atexit.register(pool.close)
+    return pool
@@ -1,10 +1,62 @@
 import logging
+from typing import Annotated
+
 from langchain_community.tools.tavily_search import TavilySearchResults
-from src.config import TAVILY_MAX_RESULTS
-from .decorators import create_logged_tool
+from langchain_core.tools import StructuredTool
+
+from src.config import SEARCH_MAX_QUERIES, TAVILY_MAX_RESULTS
+from src.search import get_multi_search
+from .decorators import create_logged_tool, log_io
 
 logger = logging.getLogger(__name__)
 
 # Initialize Tavily search tool with logging
 LoggedTavilySearch = create_logged_tool(TavilySearchResults)
 tavily_tool = LoggedTavilySearch(name="tavily_search", max_results=TAVILY_MAX_RESULTS)
+
+
+def _search_error(queries: list[str], error: BaseException) -> str:
+    error_msg = f"Failed to search {queries}. Error: {repr(error)}"
+    logger.error(error_msg)
+    return error_msg
+
+
+# The model is told how many queries are used; extra ones are dropped.
+Queries = Annotated[
+    list[str],
+    f"Several different phrasings of the search, at most {SEARCH_MAX_QUERIES}.",
+]
+
+
+def _limit(queries: list[str]) -> list[str]:
+    if len(queries) > SEARCH_MAX_QUERIES:
+        logger.warning(
+            f"Searching the first {SEARCH_MAX_QUERIES} of {len(queries)} queries, "
+            f"dropped: {queries[SEARCH_MAX_QUERIES:]}"
+        )
+    return queries[:SEARCH_MAX_QUERIES]
+
+
+@log_io
+def multi_search_tool(queries: Queries) -> list[dict] | str:
+    """Use this to search the web with several queries at once. Results are merged and deduplicated; each lists the queries that found it."""
+    queries = _limit(queries)
+    try:
+        return get_multi_search().search(queries)
+    except Exception as e:
+        return _search_error(queries, e)
+
+
+@log_io
+async def amulti_search_tool(queries: Queries) -> list[dict] | str:
+    """Async counterpart of `multi_search_tool`, which gives the tool's description."""
+    queries = _limit(queries)
+    try:
+        return await get_multi_search().asearch(queries)
+    except Exception as e:
+        return _search_error(queries, e)
+
+
+multi_search_tool = StructuredTool.from_function(
+    func=multi_search_tool, coroutine=amulti_search_tool, name="multi_search_tool"
+)
@@ -1,3 +1,4 @@
+import functools
 import logging
 from src.config import TEAM_MEMBERS
 from src.graph import build_graph
@@ -16,8 +17,11 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
+
+@functools.cache
+def get_graph():
+    """Compile the graph on first use."""
+    return build_graph()
 
 
 def run_agent_workflow(user_input: str, debug: bool = False):
@@ -37,7 +41,7 @@ def run_agent_workflow(user_input: str, debug: bool = False):
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input}")
-    result = graph.invoke(
+    result = get_graph().invoke(
         {
             # Constants
             "TEAM_MEMBERS": TEAM_MEMBERS,
@@ -53,4 +57,4 @@ def run_agent_workflow(user_input: str, debug: bool = False):
 
 
 if __name__ == "__main__":
-    print(graph.get_graph().draw_mermaid())
+    print(get_graph().get_graph().draw_mermaid())
@@ -1,7 +1,11 @@
+import asyncio
+import time
 import unittest
+import uuid
 import subprocess
 from unittest.mock import patch
 from src.tools.bash_tool import bash_tool
+from src.tools.sandbox import SandboxLimits, WorkdirPool, run_command
 
 
 class TestBashTool(unittest.TestCase):
@@ -10,19 +14,13 @@ class TestBashTool(unittest.TestCase):
         result = bash_tool.invoke("echo 'Hello World'")
         self.assertEqual(result.strip(), "Hello World")
 
-    @patch("subprocess.run")
-    def test_command_with_error(self, mock_run):
+    def test_command_with_error(self):
         """Test bash tool when command fails"""
-        # Configure mock to raise CalledProcessError
-        mock_run.side_effect = subprocess.CalledProcessError(
-            returncode=1, cmd="invalid_command", output="", stderr="Command not found"
-        )
-
-        result = bash_tool.invoke("invalid_command")
+        result = bash_tool.invoke("echo 'Command not found' >&2; exit 1")
         self.assertIn("Command failed with exit code 1", result)
         self.assertIn("Command not found", result)
 
-    @patch("subprocess.run")
+    @patch("src.tools.bash_tool.run_command")
     def test_command_with_exception(self, mock_run):
         """Test bash tool when an unexpected exception occurs"""
         # Configure mock to raise a generic exception
@@ -39,6 +37,69 @@ class TestBashTool(unittest.TestCase):
         )
         self.assertEqual(result.strip(), "test content")
 
+    def test_async_command_streams_and_truncates_output(self):
+        """Test the async executor streams output and keeps its head and tail"""
+        streamed = []
+
+        async def on_output(stream, text):
+            streamed.append((stream, text))
+
+        limits = SandboxLimits(max_output_chars=100)
+        result = asyncio.run(
+            run_command("echo start; seq 100000; echo oops >&2", ".", limits, on_output)
+        )
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(result.stdout.startswith("start\n1\n2\n"))
+        self.assertTrue(result.stdout.endswith("99999\n100000\n"))
+        self.assertIn("characters truncated", result.stdout)
+        self.assertEqual(result.stderr, "oops\n")
+        self.assertIn(("stderr", "oops\n"), streamed)
+        self.assertLessEqual(sum(len(t) for s, t in streamed if s == "stdout"), 100)
+
+    def test_async_command_limits(self):
+        """Test the wall-clock timeout kills background jobs and rlimits apply"""
+        start = time.monotonic()
+        result = asyncio.run(
+            run_command("sleep 30 & sleep 30", ".", SandboxLimits(timeout=0.5))
+        )
+        self.assertTrue(result.timed_out)
+        self.assertLess(time.monotonic() - start, 5)
+
+        result = asyncio.run(
+            run_command("ulimit -t; ulimit -v", ".", SandboxLimits(cpu_seconds=7))
+        )
+        self.assertEqual(result.stdout.split()[0], "7")
+
+    @patch("src.tools.bash_tool.SandboxLimits", lambda: SandboxLimits(timeout=0.5))
+    def test_sync_timeout_kills_background_jobs(self):
+        """Test the sync tool kills the whole command and keeps its output"""
+        # A duration no other process is running, so pgrep finds only ours.
+        sleep = f"sleep 27.{uuid.uuid4().int % 10**6}"
+        result = bash_tool.invoke(f"echo started; {sleep} & {sleep}")
+        self.assertIn("timed out after 0.5s", result)
+        self.assertIn("started", result)
+        # SIGKILL is delivered asynchronously; give the kernel a moment.
+        for _ in range(20):
+            survivors = subprocess.run(
+                ["pgrep", "-f", sleep], capture_output=True, text=True
+            )
+            if not survivors.stdout:
+                break
+            time.sleep(0.1)
+        self.assertEqual(survivors.stdout, "")
+
+    def test_workflows_get_separate_directories(self):
+        """Test each workflow runs commands in its own working directory"""
+        pool = WorkdirPool(size=1)
+        try:
+            first, second = pool.acquire("a"), pool.acquire("b")
+            self.assertNotEqual(first, second)
+            self.assertEqual(pool.acquire("a"), first)
+            pool.release("a")
+            self.assertNotEqual(pool.acquire("a"), first)
+        finally:
+            pool.close()
+
 
 if __name__ == "__main__":
     unittest.main()
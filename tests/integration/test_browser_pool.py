@@ -0,0 +1,72 @@
+import functools
+import http.server
+import threading
+
+import pytest
+
+from src.tools.browser_pool import BrowserSessionPool
+
+PAGE = "<html><head><title>Local site</title></head><body>ok</body></html>"
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "index.html").write_text(PAGE)
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=str(tmp_path)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/index.html"
+    server.shutdown()
+
+
+@pytest.fixture
+def pool():
+    pool = BrowserSessionPool(max_contexts=2, warm=1, idle_seconds=60)
+    try:
+        pool.run("probe", _noop)
+    except Exception as e:
+        pool.shutdown()
+        pytest.skip(f"Chromium cannot be launched here: {e!r}")
+    pool.release("probe")
+    yield pool
+    pool.shutdown()
+
+
+async def _noop(context):
+    await context.get_current_page()
+
+
+def test_sessions_are_reused_per_workflow_and_isolated(pool, site):
+    async def visit(context):
+        page = await context.get_current_page()
+        await page.goto(site)
+        await page.evaluate("localStorage.setItem('user', 'a')")
+        await page.context.add_cookies([{"name": "session", "value": "a", "url": site}])
+        return await page.title()
+
+    async def storage(context):
+        page = await context.get_current_page()
+        cookies = await page.context.cookies()
+        if page.url != site:
+            await page.goto(site)
+        return (
+            page.url,
+            len(cookies),
+            await page.evaluate("localStorage.getItem('user')"),
+        )
+
+    assert pool.run("a", visit) == "Local site"
+    # The same workflow continues where it left off.
+    assert pool.run("a", storage) == (site, 1, "a")
+    # Another workflow sees none of its cookies or storage.
+    assert pool.run("b", storage) == (site, 0, None)
+
+    # At capacity, the idle workflow "a" gives up its context.
+    pool.run("c", _noop)
+    stats = pool.stats()
+    assert stats["launches"] == 1 and stats["evicted"] == 1
+    assert stats["reuses"] == 1 and stats["active"] == 2
+    assert stats["warm_leases"] + stats["cold_leases"] == 4
+    assert stats["avg_reuse_ms"] < stats["avg_launch_ms"]
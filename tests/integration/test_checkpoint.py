@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.graph import START, MessagesState, StateGraph
+
+from src.graph.checkpoint import SqliteCheckpointSaver
+from src.service import workflow_service
+from src.service.workflow_service import run_agent_workflow
+
+
+def _build(saver, calls: dict):
+    """coordinator -> planner -> reporter; the reporter fails on its first run."""
+
+    def node(name):
+        def run(state):
+            calls[name] = calls.get(name, 0) + 1
+            if name == "reporter" and calls[name] == 1:
+                raise ConnectionError("worker restarted")
+            return {"messages": [AIMessage(content=f"{name} done", name=name)]}
+
+        return run
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("coordinator", node("coordinator"))
+    builder.add_node("planner", node("planner"))
+    builder.add_node("reporter", node("reporter"))
+    builder.add_edge(START, "coordinator")
+    builder.add_edge("coordinator", "planner")
+    builder.add_edge("planner", "reporter")
+    return builder.compile(checkpointer=saver)
+
+
+def _use_graph(monkeypatch, saver, calls):
+    graph = _build(saver, calls)
+    monkeypatch.setattr(workflow_service, "checkpointer", saver)
+    monkeypatch.setattr(workflow_service, "graph", graph)
+    monkeypatch.setattr(workflow_service, "parallel_graph", graph)
+
+
+def test_workflow_resumes_from_last_completed_node(monkeypatch, tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    calls = {}
+    user_input = [{"role": "user", "content": "write a report"}]
+
+    async def collect(**kwargs) -> list[dict]:
+        return [e async for e in run_agent_workflow(user_input, **kwargs)]
+
+    _use_graph(monkeypatch, SqliteCheckpointSaver(path), calls)
+    with pytest.raises(ConnectionError):
+        asyncio.run(collect(workflow_id="wf-1"))
+
+    # A fresh saver on the same file stands in for a restarted worker.
+    _use_graph(monkeypatch, SqliteCheckpointSaver(path), calls)
+    events = asyncio.run(collect(workflow_id="wf-1"))
+
+    assert calls == {"coordinator": 1, "planner": 1, "reporter": 2}
+    assert [e["event"] for e in events] == [
+        "start_of_workflow",
+        "start_of_agent",
+        "end_of_agent",
+        "end_of_workflow",
+    ]
+    assert events[1]["data"]["agent_name"] == "reporter"
+    contents = [m["content"] for m in events[-1]["data"]["messages"]]
+    assert contents == [
+        "write a report",
+        "coordinator done",
+        "planner done",
+        "reporter done",
+    ]
+
+    # Reconnecting to a finished workflow replays its result without rerunning.
+    replay = asyncio.run(collect(workflow_id="wf-1"))
+    assert calls["reporter"] == 2
+    assert replay[-1] == events[-1]
@@ -0,0 +1,103 @@
+import asyncio
+import gc
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.prompts.compaction import compact_messages, estimate_tokens, track_compaction
+from src.service import workflow_service
+
+
+def _response(agent: str, index: int) -> HumanMessage:
+    body = "\n\n".join(
+        f"## Finding {index}.{n}\n" + "Detailed evidence and numbers. " * 40
+        for n in range(5)
+    )
+    return HumanMessage(content=body, name=agent)
+
+
+def _history() -> list:
+    messages = [
+        HumanMessage(content="Research the history of the transistor."),
+        HumanMessage(content='{"steps": []}', name="planner"),
+    ]
+    for index in range(6):
+        messages.append(_response("researcher", index))
+    messages += [
+        AIMessage(
+            content="",
+            tool_calls=[{"id": "call_1", "name": "tavily_search", "args": {"q": "x"}}],
+        ),
+        ToolMessage(content="raw result " * 500, tool_call_id="call_1", name="search"),
+        AIMessage(content="Summary of the search."),
+        AIMessage(
+            content="",
+            tool_calls=[{"id": "call_2", "name": "crawl_tool", "args": {"url": "y"}}],
+        ),
+        ToolMessage(content="fresh page " * 500, tool_call_id="call_2", name="crawl"),
+    ]
+    return messages
+
+
+def _tokens(messages: list) -> int:
+    return sum(estimate_tokens(message.content) for message in messages)
+
+
+def test_history_under_budget_is_untouched():
+    messages = _history()
+    assert compact_messages(messages, 10**6) == messages
+    assert compact_messages(messages, None) is messages
+
+
+def test_compaction_fits_budget_and_keeps_structure():
+    messages = _history()
+    with track_compaction() as stats:
+        compacted = compact_messages(messages, 4000)
+
+    assert _tokens(compacted) <= 4000 < _tokens(messages)
+    assert stats.calls == 1 and stats.tokens_saved > 0
+    # The user request, the plan and the latest agent response survive verbatim.
+    assert compacted[:2] == messages[:2]
+    assert messages[7] in compacted
+    # Consumed tool output is dropped, the pending one is kept, and every
+    # tool result still follows its tool call.
+    tool_messages = [m for m in compacted if isinstance(m, ToolMessage)]
+    assert "dropped after use" in tool_messages[0].content
+    assert tool_messages[1] == messages[-1]
+    for index, message in enumerate(compacted):
+        if isinstance(message, ToolMessage):
+            assert compacted[index - 1].tool_calls[0]["id"] == message.tool_call_id
+    # The input history is not mutated.
+    assert messages[9].content.startswith("raw result")
+
+
+class _PlanStepGraph:
+    async def astream_events(self, inputs, config=None, *, version):
+        for index in range(5):
+            await asyncio.sleep(0)
+            yield {"event": "on_custom_event", "name": "plan_step", "metadata": {}}
+
+
+def test_abandoned_workflow_stream_is_finalized_cleanly(monkeypatch):
+    """A consumer may stop reading the stream without closing it."""
+    monkeypatch.setattr(workflow_service, "graph", _PlanStepGraph())
+    monkeypatch.setattr(workflow_service, "checkpointer", None)
+    errors = []
+
+    async def consume():
+        stream = workflow_service.run_agent_workflow([{"role": "user", "content": "q"}])
+        async for event in stream:
+            if event["event"] == "plan_step":
+                break
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context)
+        )
+        await asyncio.create_task(consume())
+        # The generator is finalized by the loop, outside the consumer task.
+        gc.collect()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert errors == []
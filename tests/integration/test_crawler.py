@@ -1,5 +1,13 @@
+import asyncio
+
+import httpx
 import pytest
-from src.crawler import Crawler
+
+from benchmarks.fake_openai import serve
+from src.crawler import Article, Crawler
+from src.crawler.cache import CrawlCache, normalize_url
+from src.crawler.jina_client import JinaClient
+from src.crawler.readability_extractor import ReadabilityExtractor
 
 
 def test_crawler_initialization():
@@ -25,3 +33,270 @@ def test_crawler_markdown_output():
     markdown = result.to_markdown()
     assert isinstance(markdown, str)
     assert len(markdown) > 0
+
+
+def _reader_app(latency: float = 0.1):
+    """Stand-in for the Jina reader: renders a tiny article for each URL."""
+    import asyncio
+    from collections import Counter
+
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+
+    app = FastAPI()
+    app.state.in_flight = Counter()
+    app.state.max_in_flight = Counter()
+    app.state.client_ports = set()
+    app.state.requests = 0
+    app.state.not_modified = 0
+
+    @app.post("/")
+    async def read(request: Request):
+        url = (await request.json())["url"]
+        app.state.requests += 1
+        host = url.split("/")[2]
+        app.state.client_ports.add(request.client.port)
+        app.state.in_flight[host] += 1
+        app.state.max_in_flight[host] = max(
+            app.state.max_in_flight[host], app.state.in_flight[host]
+        )
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            app.state.in_flight[host] -= 1
+        if url.endswith("/missing"):
+            return PlainTextResponse("not found", status_code=404)
+        etag = f'"{len(url)}"'
+        if request.headers.get("if-none-match") == etag:
+            app.state.not_modified += 1
+            return Response(status_code=304, headers={"etag": etag})
+        return HTMLResponse(
+            f"<html><head><title>{url}</title></head><body><article>"
+            f"<h1>{url}</h1><p>{'Article text about crawling. ' * 20}</p>"
+            "</article></body></html>",
+            headers={"etag": etag},
+        )
+
+    return app
+
+
+class _PageExtractor(ReadabilityExtractor):
+    # Readability.js needs node packages that are installed on first use.
+    def extract_article(self, html: str) -> Article:
+        return Article(title="page", html_content=html)
+
+    async def aextract_article(self, html: str) -> Article:
+        return self.extract_article(html)
+
+
+def test_crawl_many_pools_connections_and_limits_each_host(tmp_path):
+    import asyncio
+    import time
+
+    app = _reader_app()
+    urls = [f"https://a.example/{i}" for i in range(6)] + [
+        "https://b.example/1",
+        "https://b.example/missing",
+    ]
+    with serve(app) as base_url:
+        client = JinaClient(reader_url=base_url[: -len("v1")], per_host_concurrency=2)
+        # Nothing is fresh, so both batches go to the reader.
+        cache = CrawlCache(str(tmp_path), ttl=0)
+        crawler = Crawler(client=client, extractor=_PageExtractor(), cache=cache)
+
+        async def crawl_twice():
+            start = time.perf_counter()
+            first = await crawler.crawl_many(urls)
+            elapsed = time.perf_counter() - start
+            await crawler.crawl_many(urls)
+            await client.aclose()
+            return first, elapsed
+
+        results, elapsed = asyncio.run(crawl_twice())
+        # The sync path shares the same limits.
+        sync_results = crawler.crawl_many_sync(urls[:3])
+        client.close()
+
+    assert [article.url for article in results[:7]] == urls[:7]
+    assert "Article text about crawling" in results[0].to_markdown()
+    assert isinstance(results[7], httpx.HTTPStatusError)
+    assert [article.url for article in sync_results] == urls[:3]
+    assert app.state.max_in_flight == {"a.example": 2, "b.example": 2}
+    # Six a.example pages, two at a time, at 0.1s each.
+    assert elapsed < 0.5
+    # Keep-alive: the second batch reuses the first batch's connections.
+    assert len(app.state.client_ports) <= 4 + 2
+
+
+def test_crawl_cache_serves_revalidates_and_evicts(tmp_path):
+    app = _reader_app(latency=0)
+    cache = CrawlCache(str(tmp_path), ttl=60)
+    url = "https://a.example/news?id=1&utm_source=feed"
+    with serve(app) as base_url:
+        client = JinaClient(reader_url=base_url[: -len("v1")])
+        crawler = Crawler(client=client, extractor=_PageExtractor(), cache=cache)
+        first = crawler.crawl(url)
+        # Same page under another spelling of the URL: a local read.
+        second = crawler.crawl("HTTPS://A.example:443/news?id=1#comments")
+        assert app.state.requests == 1
+        assert second.to_markdown() == first.to_markdown()
+
+        cache.ttl = 0
+        assert crawler.crawl(url).to_markdown() == first.to_markdown()
+        assert (app.state.requests, app.state.not_modified) == (2, 1)
+
+        cache.max_bytes = 3000
+        for index in range(3):
+            crawler.crawl(f"https://b.example/{index}")
+        client.close()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["revalidated"]) == (1, 4, 1)
+    assert stats["evictions"] >= 2 and stats["size_bytes"] <= 3000
+    assert cache.lookup(url)[0] is None
+    assert len(list(tmp_path.glob("pages/*/*.json"))) == stats["entries"]
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://A.example:443/x?b=2&a=1&utm_medium=z#top") == (
+        "https://a.example/x?a=1&b=2"
+    )
+    assert normalize_url("http://a.example:8080") == "http://a.example:8080/"
+
+
+def test_extraction_pool_offloads_large_pages():
+    import asyncio
+
+    import pytest
+
+    from src.crawler.extraction import ExtractionPool, ExtractionQueueFull
+
+    paragraph = "<p>Readable text about the subject of the page.</p>"
+
+    def page(paragraphs: int) -> str:
+        body = paragraph * paragraphs
+        return f"<html><head><title>T</title></head><body>{body}</body></html>"
+
+    small, large = page(2), page(2000)
+    pool = ExtractionPool(
+        max_workers=1, max_queue=0, inline_chars=1000, use_readability=False
+    )
+    try:
+        # Small pages are extracted in process, large ones by the workers.
+        assert pool.extract(small).title == "T"
+        assert pool._executor is None
+        article = pool.extract(large)
+        assert pool._executor is not None
+        assert article.title == "T"
+        assert article.markdown.count("Readable text") == 2000
+
+        async def extract_concurrently():
+            return await asyncio.gather(
+                pool.aextract(large), pool.aextract(large), return_exceptions=True
+            )
+
+        results = asyncio.run(extract_concurrently())
+        assert results[0].title == "T"
+        assert isinstance(results[1], ExtractionQueueFull)
+
+        pool.timeout = 0.001
+        with pytest.raises(TimeoutError):
+            pool.extract(page(20000))
+    finally:
+        pool.shutdown()
+
+
+def _slow_extract(html: str, use_readability: bool) -> tuple:
+    """Worker stand-in that hangs on pages marked as pathological."""
+    import time
+
+    from src.crawler.extraction import extract_html
+
+    if "pathological" in html:
+        time.sleep(60)
+    return extract_html(html, use_readability)
+
+
+def test_extraction_pool_recycles_workers_stuck_on_a_page():
+    import time
+
+    import pytest
+
+    from src.crawler.extraction import ExtractionPool
+
+    class SlowPool(ExtractionPool):
+        _worker = staticmethod(_slow_extract)
+
+    body = "<p>Readable text about the subject of the page.</p>" * 200
+    page = f"<html><head><title>T</title></head><body>{body}</body></html>"
+    pool = SlowPool(
+        max_workers=1,
+        max_queue=1,
+        timeout=30,
+        inline_chars=1000,
+        use_readability=False,
+    )
+    try:
+        # Start the worker, so the short timeout below is spent on the page.
+        assert pool.extract(page).title == "T"
+        pool.timeout = 1
+        with pytest.raises(TimeoutError):
+            pool.extract(page.replace("<p>", "<p>pathological ", 1))
+
+        # The only worker was stuck for a minute; the next page gets a new one.
+        pool.timeout = 30
+        started = time.monotonic()
+        assert pool.extract(page).title == "T"
+        assert time.monotonic() - started < 20
+    finally:
+        pool.shutdown()
+
+
+def test_article_renderer_keeps_relevant_sections_within_budget():
+    from src.crawler.renderer import ArticleRenderer, split_chunks
+    from src.prompts.compaction import estimate_tokens
+
+    filler = "Unrelated boilerplate about the website and its sponsors. " * 10
+    markdown = "\n\n".join(
+        [
+            "Intro paragraph.",
+            "## Navigation",
+            filler,
+            "![logo](/logo.png)",
+            "## Quarterly revenue",
+            "Nvidia revenue grew 94% to $35 billion in the quarter.",
+            "![chart](/chart.png) ![logo](/logo.png)",
+            "## Footer",
+            filler,
+            filler,
+        ]
+    )
+    article = Article(title="Results", html_content="", markdown=markdown)
+    article.url = "https://example.com/news/q3"
+
+    chunks = split_chunks(markdown, chunk_tokens=200)
+    assert all(chunk.tokens <= 200 + 85 for chunk in chunks)
+    assert [c.text.split("\n")[0] for c in chunks].count("## Footer") == 2
+
+    renderer = ArticleRenderer(max_tokens=300, chunk_tokens=200, max_images=1)
+    blocks = renderer.render(article, query="nvidia revenue")
+    text = "\n".join(b["text"] for b in blocks if b["type"] == "text")
+    assert "grew 94%" in text and "sponsors" not in text
+    assert "omitted to fit the context budget" in text
+    assert estimate_tokens(blocks) <= 300 + 85
+    assert [b["image_url"]["url"] for b in blocks if b["type"] == "image_url"] == [
+        "https://example.com/chart.png"
+    ]
+
+    # Everything fits: the page is rendered whole, duplicate images once.
+    blocks = ArticleRenderer(max_tokens=None).render(article)
+    images = [b["image_url"]["url"] for b in blocks if b["type"] == "image_url"]
+    assert images == ["https://example.com/logo.png", "https://example.com/chart.png"]
+
+
+def test_crawl_many_tool_with_no_urls():
+    from src.tools.crawl import crawl_many_tool
+
+    message = "No urls to crawl. Pass at least one url."
+    assert crawl_many_tool.invoke({"urls": []}) == message
+    assert asyncio.run(crawl_many_tool.ainvoke({"urls": []})) == message
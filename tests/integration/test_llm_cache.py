@@ -0,0 +1,96 @@
+import time
+import uuid
+
+import pytest
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import Generation
+from langchain_openai import ChatOpenAI
+
+from benchmarks.fake_openai import create_app, serve
+from src.agents.cache import (
+    InMemoryLLMCache,
+    LLMResponseCache,
+    SqliteLLMCache,
+    no_llm_cache,
+)
+from src.service.event_translator import WorkflowEventTranslator
+
+
+def _messages(clock: str) -> list:
+    return [
+        SystemMessage(
+            content=f"You are Langmanus. CURRENT_TIME: Mon Mar 10 2025 {clock}"
+        ),
+        HumanMessage(content="hello", id=str(uuid.uuid4())),
+    ]
+
+
+def test_identical_prompts_are_served_from_cache():
+    app = create_app()
+    cache = InMemoryLLMCache()
+    with serve(app) as base_url:
+
+        def llm(**kwargs):
+            return ChatOpenAI(
+                model="fake", base_url=base_url, api_key="fake", cache=cache, **kwargs
+            )
+
+        first = llm(temperature=0).invoke(_messages("10:00:00"))
+        # Message ids and the time of day do not change the key.
+        second = llm(temperature=0).invoke(_messages("10:05:42"))
+        assert second.content == first.content and second.id != first.id
+        assert app.state.requests == 1
+
+        with no_llm_cache():
+            llm(temperature=0).invoke(_messages("10:00:00"))
+        llm(temperature=0.7).invoke(_messages("10:00:00"))
+        assert app.state.requests == 3
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 2)
+    assert stats["size"] == 1
+
+
+def test_incomplete_cache_backend_fails_on_creation():
+    class GetOnlyCache(LLMResponseCache):
+        def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="_set"):
+        GetOnlyCache()
+
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = SqliteLLMCache(path, max_entries=2, ttl=60)
+    for index in range(3):
+        cache.update(f'"prompt {index}"', "model", [Generation(text=f"answer {index}")])
+        time.sleep(0.01)
+
+    reopened = SqliteLLMCache(path, max_entries=2, ttl=60)
+    assert reopened.lookup('"prompt 0"', "model") is None
+    assert reopened.lookup('"prompt 2"', "model")[0].text == "answer 2"
+    assert cache.stats()["evictions"] == 1
+
+    reopened.ttl = 0
+    assert reopened.lookup('"prompt 2"', "model") is None
+    assert reopened.stats()["size"] == 1
+
+
+def test_cached_coordinator_answer_reaches_the_client():
+    translator = WorkflowEventTranslator("wf", [])
+    event = {
+        "event": "on_chat_model_end",
+        "name": "ChatOpenAI",
+        "run_id": "run-1",
+        "metadata": {"checkpoint_ns": "coordinator:1", "langgraph_step": 1},
+        "data": {"output": AIMessage(content="Hello!")},
+    }
+    assert translator.translate(event) == [
+        {
+            "event": "message",
+            "data": {"message_id": "run-run-1", "delta": {"content": "Hello!"}},
+        },
+        {"event": "end_of_llm", "data": {"agent_name": "coordinator"}},
+    ]
@@ -0,0 +1,93 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_openai import ChatOpenAI
+
+from benchmarks.fake_openai import create_app, serve
+from src.agents.gateway import (
+    BACKGROUND,
+    AsyncGatewayClient,
+    GatewayClient,
+    ModelLimiter,
+    TokenBucket,
+    llm_priority,
+)
+
+
+def _llm(base_url: str, limiter: ModelLimiter) -> ChatOpenAI:
+    return ChatOpenAI(
+        model="fake",
+        base_url=base_url,
+        api_key="fake",
+        http_client=GatewayClient(limiter),
+        http_async_client=AsyncGatewayClient(limiter),
+    )
+
+
+def test_concurrency_is_capped_for_sync_and_async_callers():
+    app = create_app(latency=0.1)
+    limiter = ModelLimiter("fake", max_concurrency=2)
+    with serve(app) as base_url:
+        llm = _llm(base_url, limiter)
+
+        async def burst():
+            await asyncio.gather(*(llm.ainvoke("hi") for _ in range(6)))
+
+        asyncio.run(burst())
+        with ThreadPoolExecutor(6) as pool:
+            list(pool.map(lambda _: llm.invoke("hi"), range(6)))
+
+    stats = limiter.stats()
+    assert app.state.max_in_flight == 2
+    assert stats["requests"] == 12
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] >= 4
+
+
+def test_rate_limited_requests_back_off_and_succeed():
+    app = create_app(rate_limited=1)
+    limiter = ModelLimiter("fake", max_concurrency=4)
+    with serve(app) as base_url:
+        response = _llm(base_url, limiter).invoke("hi")
+
+    assert response.content
+    assert limiter.stats()["throttled"] == 1
+    assert limiter.stats()["requests"] == 2
+
+
+def test_interactive_lane_is_served_before_background():
+    limiter = ModelLimiter("fake", max_concurrency=1)
+    order = []
+
+    async def request(name: str):
+        permit = await limiter.aacquire()
+        order.append(name)
+        permit.release()
+
+    async def background(name: str):
+        with llm_priority(BACKGROUND):
+            await request(name)
+
+    async def main():
+        held = await limiter.aacquire()
+        tasks = [asyncio.create_task(background("job-1"))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("chat")))
+        tasks.append(asyncio.create_task(background("job-2")))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == {"interactive": 1, "background": 2}
+        held.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["chat", "job-1", "job-2"]
+
+
+def test_token_bucket_meters_per_minute_budget():
+    bucket = TokenBucket(per_minute=600)
+    start = bucket.updated
+    bucket.take(600, now=start)
+    assert bucket.wait_time(100, now=start) == 10.0
+    # Requests larger than the whole budget wait for a full bucket only.
+    assert bucket.wait_time(10**6, now=start) == 60.0
+    assert bucket.wait_time(100, now=start + 10) == 0.0
@@ -0,0 +1,74 @@
+import json
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.agents import cascade, llm
+from src.config import TEAM_MEMBERS
+from src.graph.nodes import coordinator_node, planner_node
+
+PLAN = {
+    "thought": "t",
+    "title": "Plan",
+    "steps": [
+        {"agent_name": "reporter", "title": "Report", "description": "Write it."}
+    ],
+}
+
+
+def _use_models(monkeypatch, **responses):
+    monkeypatch.setattr(cascade, "LLM_CASCADE", True)
+    monkeypatch.setattr(cascade, "cascade_stats", cascade.CascadeStats())
+    monkeypatch.setattr(cascade, "llm_model_name", lambda llm_type: llm_type)
+    for llm_type, replies in responses.items():
+        monkeypatch.setitem(
+            llm._llm_cache, llm_type, FakeListChatModel(responses=replies)
+        )
+
+
+def _state(**kwargs):
+    return {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [HumanMessage(content="Compare two libraries.")],
+        "deep_thinking_mode": False,
+        "search_before_planning": False,
+        **kwargs,
+    }
+
+
+def test_cheap_answer_is_kept_when_it_passes_the_check(monkeypatch):
+    _use_models(
+        monkeypatch,
+        small=["handoff_to_planner()", "Sure! handoff_to_planner()"],
+        basic=["handoff_to_planner()"],
+    )
+    assert coordinator_node(_state()).goto == "planner"
+    # A handoff inside an answer would reach the user; ask the next model.
+    assert coordinator_node(_state()).goto == "planner"
+
+    stats = cascade.cascade_stats.stats()["coordinator"]
+    assert stats["calls"] == 2
+    assert stats["escalated_calls"] == 1
+    assert stats["escalation_rate"] == 0.5
+    assert stats["tiers"]["small"]["attempts"] == 2
+    assert stats["tiers"]["small"]["rejected"] == 1
+    assert stats["tiers"]["basic"]["attempts"] == 1
+
+
+def test_planner_escalates_on_invalid_plan_only_in_deep_thinking(monkeypatch):
+    _use_models(
+        monkeypatch,
+        basic=["I would start by searching.", json.dumps(PLAN)],
+        reasoning=[json.dumps(PLAN)],
+    )
+    # Plan steps are dispatched as events, which needs a parent run.
+    planner = RunnableLambda(planner_node)
+    command = planner.invoke(_state(deep_thinking_mode=True))
+    assert command.goto == "supervisor"
+    assert command.update["plan_steps"] == PLAN["steps"]
+    assert cascade.cascade_stats.stats()["planner"]["escalated_calls"] == 1
+
+    # Without deep thinking the planner already uses the cheapest model.
+    assert cascade.cascade_tiers("planner", "basic") == ["basic"]
+    assert planner.invoke(_state()).goto == "supervisor"
@@ -0,0 +1,43 @@
+from langgraph.types import Send
+
+from src.graph.nodes import parallel_supervisor_node
+
+STEPS = [
+    {"agent_name": "researcher", "title": "A", "description": "a", "depends_on": []},
+    {"agent_name": "browser", "title": "B", "description": "b", "depends_on": []},
+    {"agent_name": "coder", "title": "C", "description": "c", "depends_on": [1]},
+    {"agent_name": "reporter", "title": "R", "description": "r"},
+]
+
+
+def _state(**kwargs):
+    return {"messages": [], "plan_steps": STEPS, **kwargs}
+
+
+def test_independent_steps_are_sent_together():
+    command = parallel_supervisor_node(_state())
+    assert [(send.node, send.arg["current_step"]) for send in command.goto] == [
+        ("researcher", 0),
+        ("browser", 1),
+    ]
+
+
+def test_results_are_merged_in_plan_order():
+    """Whatever order workers finish in, messages follow the plan."""
+    command = parallel_supervisor_node(
+        _state(step_results={1: "from browser", 0: "from researcher"})
+    )
+    assert [m.name for m in command.update["messages"]] == ["researcher", "browser"]
+    assert command.update["merged_steps"] == [0, 1]
+    (send,) = command.goto
+    assert isinstance(send, Send) and send.node == "coder"
+    assert [m.name for m in send.arg["messages"]] == ["researcher", "browser"]
+
+
+def test_workflow_ends_when_every_step_is_done():
+    results = {0: "a", 1: "b", 2: "c", 3: "report"}
+    command = parallel_supervisor_node(
+        _state(step_results=results, merged_steps=[0, 1, 2])
+    )
+    assert command.goto == "__end__"
+    assert [m.name for m in command.update["messages"]] == ["reporter"]
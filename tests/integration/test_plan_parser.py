@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from src.graph.plan_parser import PlanParseError, StreamingPlanParser
+
+PLAN = {
+    "thought": 'Compare "a" and b',
+    "title": "Plan",
+    "steps": [
+        {"agent_name": "researcher", "title": "Search", "description": "Find it."},
+        {"agent_name": "reporter", "title": "Report", "description": "Write it."},
+    ],
+}
+
+
+def test_steps_are_surfaced_as_soon_as_they_close():
+    """Each step is returned by the chunk that closes it, fences are tolerated."""
+    text = "```json\n" + json.dumps(PLAN) + "\n```"
+    split = text.index('"reporter"')
+    parser = StreamingPlanParser()
+    early = [
+        s for i in range(0, split, 3) for s in parser.feed(text[i : min(i + 3, split)])
+    ]
+    assert [step["agent_name"] for step in early] == ["researcher"]
+    assert [step["agent_name"] for step in parser.feed(text[split:])] == ["reporter"]
+    assert parser.close() == PLAN
+    assert json.loads(parser.text) == PLAN
+
+
+def test_invalid_output_fails_before_generation_ends():
+    parser = StreamingPlanParser()
+    parser.feed('{"thought": "x", "steps": [')
+    with pytest.raises(PlanParseError):
+        parser.feed("oops")
+
+
+def test_unknown_agent_is_rejected():
+    parser = StreamingPlanParser()
+    with pytest.raises(PlanParseError):
+        parser.feed(
+            '{"steps": [{"agent_name": "hacker", "title": "t", "description": "d"}'
+        )
+
+
+def test_truncated_plan_is_rejected_on_close():
+    parser = StreamingPlanParser()
+    parser.feed(json.dumps(PLAN)[:-5])
+    with pytest.raises(PlanParseError):
+        parser.close()
@@ -0,0 +1,115 @@
+import json
+import os
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from src.config import TEAM_MEMBERS
+from src.prompts.template import PromptRegistry, prompt_registry
+
+
+def test_render_matches_prompt_template_format():
+    variables = {"CURRENT_TIME": "Mon Mar 10 2025", "TEAM_MEMBERS": TEAM_MEMBERS}
+    for name in ("coordinator", "planner", "supervisor", "researcher", "reporter"):
+        template = prompt_registry.get(name)
+        assert prompt_registry.render(name, **variables) == template.format(**variables)
+        assert "{{" not in prompt_registry.render(name, **variables)
+
+
+def test_registry_reloads_edited_prompts_only_in_reload_mode(tmp_path):
+    path = tmp_path / "greeter.md"
+    path.write_text("Hello <<NAME>>, it is <<CURRENT_TIME>>. {json}")
+    cached = PromptRegistry(str(tmp_path))
+    live = PromptRegistry(str(tmp_path), reload=True)
+    assert cached.render("greeter", NAME="Ada", CURRENT_TIME="now") == (
+        "Hello Ada, it is now. {json}"
+    )
+    assert live.get("greeter") is live.get("greeter")
+
+    path.write_text("Bye <<NAME>>")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cached.render("greeter", NAME="Ada", CURRENT_TIME="now").startswith("Hello")
+    assert live.render("greeter", NAME="Ada") == "Bye Ada"
+    assert isinstance(live.get("greeter"), PromptTemplate)
+
+
+def test_cache_layout_keeps_system_prompt_stable(monkeypatch):
+    from src.prompts import template
+
+    monkeypatch.setattr(template, "PROMPT_CACHE_LAYOUT", True)
+    state = {
+        "messages": [{"role": "user", "content": "hi"}],
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+    }
+    first = template.apply_prompt_template("researcher", state)
+    monkeypatch.setattr(
+        template, "datetime", type("later", (), {"now": lambda: _Later()})
+    )
+    second = template.apply_prompt_template("researcher", state)
+
+    assert first[0] == second[0]
+    assert "CURRENT_TIME" not in first[0]["content"]
+    assert not first[0]["content"].startswith("---")
+    assert first[1] == state["messages"][0]
+    assert first[-1].content.startswith("CURRENT_TIME: ")
+    assert second[-1].content == "CURRENT_TIME: later"
+
+
+class _RecordingPlanner:
+    """Chat model stand-in that records its prompt and streams a plan."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def stream(self, messages):
+        self.prompts.append(messages)
+        plan = {
+            "thought": "t",
+            "title": "Plan",
+            "steps": [{"agent_name": "reporter", "title": "R", "description": "r"}],
+        }
+        yield AIMessageChunk(content=json.dumps(plan))
+
+
+class _Search:
+    def search(self, queries):
+        return [{"title": "LangGraph", "content": "graph runtime"}]
+
+
+def test_cache_layout_adds_search_results_to_the_user_turn(monkeypatch):
+    from src.agents import llm
+    from src.graph import nodes
+    from src.prompts import template
+
+    monkeypatch.setattr(template, "PROMPT_CACHE_LAYOUT", True)
+    planner = _RecordingPlanner()
+    monkeypatch.setitem(llm._llm_cache, "basic", planner)
+    monkeypatch.setattr(
+        nodes, "_search_before_planning", lambda state: (_Search(), ["q"])
+    )
+    state = {
+        "messages": [HumanMessage(content="What is LangGraph?")],
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "deep_thinking_mode": False,
+        "search_before_planning": True,
+    }
+    command = RunnableLambda(nodes.planner_node).invoke(state)
+
+    assert command.goto == "supervisor"
+    (prompt,) = planner.prompts
+    user_turn, trailer = prompt[-2:]
+    assert user_turn.type == "human"
+    assert user_turn.content.startswith("What is LangGraph?")
+    assert "# Relative Search Results" in user_turn.content
+    assert trailer.type == "system"
+    assert trailer.content.startswith("CURRENT_TIME: ")
+    # The state's message is not changed.
+    assert state["messages"][0].content == "What is LangGraph?"
+
+
+class _Later:
+    def strftime(self, _):
+        return "later"
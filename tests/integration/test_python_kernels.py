@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from src.tools.kernels import KernelManager, KernelTimeout
+
+
+@pytest.fixture
+def manager():
+    manager = KernelManager(warm=1, preload="json", timeout=2, idle_seconds=60)
+    yield manager
+    manager.shutdown()
+
+
+def test_workflows_get_isolated_persistent_kernels(manager):
+    assert manager.execute("a", "x = 41") == ("", False)
+    assert manager.execute("a", "print(x + 1)") == ("42\n", False)
+    output, error = manager.execute("b", "print(x)")
+    assert error and "NameError" in output and "kernel_worker" not in output
+
+    # Output of subprocesses is captured too, in the workflow's directory.
+    output, _ = manager.execute("b", "import os; os.system('echo $PWD')")
+    assert "workflow-" in output
+
+    stats = manager.stats()
+    assert stats["acquisitions"] == 2 and stats["active"] == 2
+    assert stats["cold_starts"] + stats["warm_starts"] == 2
+
+
+def test_warm_kernels_are_preloaded_and_reaped(manager):
+    manager.execute("a", "pass")
+    deadline = time.monotonic() + 30
+    while not manager.stats()["warm_ready"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert manager.execute("b", "import sys; print('json' in sys.modules)")[0] == (
+        "True\n"
+    )
+    assert manager.stats()["warm_starts"] == 1
+
+    manager.idle_seconds = 0
+    assert manager.reap() == 2
+    assert manager.stats()["active"] == 0
+
+
+def test_timeout_restarts_the_kernel(manager):
+    manager.execute("a", "x = 1")
+    with pytest.raises(KernelTimeout):
+        manager.execute("a", "while True: pass")
+    output, error = manager.execute("a", "print(x)")
+    assert error and "NameError" in output
+    assert manager.stats()["timeouts"] == 1
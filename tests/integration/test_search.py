@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from src.search import FixtureBackend, MultiSearch, SearchBackend, reformulate
+
+DOCUMENTS = [
+    {
+        "title": "Nvidia quarterly revenue",
+        "url": "https://example.com/nvidia?utm_source=feed",
+        "content": "Nvidia revenue grew 94% in the third quarter.",
+    },
+    {
+        "title": "Nvidia results (syndicated)",
+        "url": "https://mirror.example.org/nvidia-results",
+        "content": "Nvidia revenue grew   94% in the third quarter.",
+    },
+    {
+        "title": "Data center GPUs",
+        "url": "https://example.com/gpus",
+        "content": "Data center GPU demand drives Nvidia growth.",
+    },
+    {
+        "title": "Cooking pasta",
+        "url": "https://example.com/pasta",
+        "content": "Boil the water before adding salt.",
+    },
+]
+
+
+class _SlowBackend(FixtureBackend):
+    """Fixture search that takes 0.2s per query and counts the calls."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.calls = 0
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.2)
+        with self._lock:
+            self.in_flight -= 1
+        return super().search(query, max_results)
+
+
+def test_multi_search_merges_dedups_and_caches(tmp_path):
+    fixture = tmp_path / "search.json"
+    fixture.write_text(json.dumps(DOCUMENTS))
+    backend = _SlowBackend(str(fixture))
+    search = MultiSearch(backend, max_results=5, ttl=60)
+    queries = ["nvidia revenue", "nvidia data center", "Nvidia  revenue"]
+
+    results = search.search(queries)
+    assert backend.calls == 2 and backend.max_in_flight == 2
+    # The mirror and the tracking-parameter URL are the same result.
+    urls = [result["url"] for result in results]
+    assert urls == [
+        "https://example.com/nvidia?utm_source=feed",
+        "https://example.com/gpus",
+    ]
+    assert results[0]["queries"] == ["nvidia revenue", "nvidia data center"]
+
+    # Served from the per-query cache, in the async path too.
+    assert asyncio.run(search.asearch(queries)) == results
+    assert backend.calls == 2
+    stats = search.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+
+    search.ttl = 0
+    time.sleep(0.01)
+    search.search(["nvidia revenue"])
+    assert backend.calls == 3
+
+
+def test_multi_search_survives_failed_queries():
+    class FlakyBackend(SearchBackend):
+        def search(self, query: str, max_results: int) -> list[dict]:
+            if "fail" in query:
+                raise ConnectionError("search engine unavailable")
+            return FixtureBackend(documents=DOCUMENTS).search(query, max_results)
+
+    search = MultiSearch(FlakyBackend())
+    assert search.search(["fail", "pasta water"])[0]["title"] == "Cooking pasta"
+    assert search.stats()["errors"] == 1
+    with pytest.raises(ConnectionError):
+        asyncio.run(search.asearch(["fail again"]))
+
+
+def test_search_backend_requires_search():
+    class NoSearchBackend(SearchBackend):
+        name = "none"
+
+    with pytest.raises(TypeError, match="search"):
+        NoSearchBackend()
+
+
+def test_reformulate():
+    assert reformulate("What is the revenue of Nvidia? How fast is it growing?") == [
+        "What is the revenue of Nvidia? How fast is it growing?",
+        "revenue Nvidia fast growing",
+        "What is the revenue of Nvidia?",
+    ]
+
+
+def test_search_tool_announces_and_logs_its_query_limit(monkeypatch, caplog):
+    monkeypatch.setenv("TAVILY_API_KEY", "unused")
+    from src.config import SEARCH_MAX_QUERIES
+    from src.tools import search
+
+    searched = []
+
+    class _Search:
+        def search(self, queries):
+            searched.append(queries)
+            return []
+
+    monkeypatch.setattr(search, "get_multi_search", _Search)
+    tool = search.multi_search_tool
+    limit = f"at most {SEARCH_MAX_QUERIES}."
+    assert tool.args["queries"]["description"].endswith(limit)
+
+    queries = [f"query {n}" for n in range(SEARCH_MAX_QUERIES + 2)]
+    assert tool.invoke({"queries": queries}) == []
+    assert searched == [queries[:SEARCH_MAX_QUERIES]]
+    assert f"dropped: {queries[SEARCH_MAX_QUERIES:]}" in caplog.text
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from src.service.sse import coalesce_deltas, dumps
+
+
+def _delta(message_id, text, field="content"):
+    return {
+        "event": "message",
+        "data": {"message_id": message_id, "delta": {field: text}},
+    }
+
+
+async def _stream(events, pause_after=None):
+    for i, event in enumerate(events):
+        yield event
+        if i == pause_after:
+            await asyncio.sleep(0.1)
+
+
+async def _collect(events, **kwargs):
+    return [event async for event in coalesce_deltas(events, **kwargs)]
+
+
+def test_consecutive_deltas_are_merged_in_order():
+    tool = {"event": "tool_call", "data": {"tool_name": "crawl_tool"}}
+    events = [
+        _delta("a", "Hel"),
+        _delta("a", "lo"),
+        _delta("a", "think", "reasoning_content"),
+        _delta("b", "x"),
+        tool,
+        _delta("b", "yz"),
+        *[_delta("c", "0123") for _ in range(3)],
+    ]
+    merged = asyncio.run(_collect(_stream(events), window=10, max_chars=8))
+    assert merged == [
+        _delta("a", "Hello"),
+        _delta("a", "think", "reasoning_content"),
+        _delta("b", "x"),
+        tool,
+        _delta("b", "yz"),
+        # The text budget sends the merged delta early.
+        _delta("c", "01230123"),
+        _delta("c", "0123"),
+    ]
+
+
+def test_window_sends_deltas_while_the_stream_waits():
+    events = [_delta("a", "one "), _delta("a", "two "), _delta("a", "three")]
+    merged = asyncio.run(_collect(_stream(events, pause_after=1), window=0.02))
+    assert merged == [_delta("a", "one two "), _delta("a", "three")]
+
+
+def test_dumps_matches_json():
+    data = {"message_id": "m", "delta": {"content": '你好 "x"\n'}, "n": [1, 2.5]}
+    assert json.loads(dumps(data)) == data
+    assert "你好" in dumps(data)
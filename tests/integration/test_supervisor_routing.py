@@ -0,0 +1,41 @@
+from langchain_core.messages import HumanMessage
+
+from src.graph.routing import SupervisorRouter
+
+STEPS = [
+    {"agent_name": "researcher", "title": "A", "description": "a"},
+    {"agent_name": "coder", "title": "B", "description": "b"},
+    {"agent_name": "reporter", "title": "R", "description": "r"},
+]
+
+
+def _state(*names):
+    messages = [HumanMessage(content="question")]
+    messages += [HumanMessage(content=f"from {name}", name=name) for name in names]
+    return {"messages": messages, "plan_steps": STEPS}
+
+
+def test_plan_is_followed_without_llm():
+    router = SupervisorRouter()
+    assert router.route(_state("planner")) == "researcher"
+    assert router.route(_state("planner", "researcher")) == "coder"
+    assert router.route(_state("planner", "researcher", "coder")) == "reporter"
+    assert (
+        router.route(_state("planner", "researcher", "coder", "reporter")) == "FINISH"
+    )
+    assert router.stats()["plan_routes"] == 4
+
+
+def test_deviation_falls_back_to_memoized_llm_decision():
+    router = SupervisorRouter()
+    state = _state("planner", "coder")
+    assert router.route(state) is None
+    router.remember(state, "researcher")
+    assert router.route(_state("planner", "coder")) == "researcher"
+    assert router.stats() == {
+        "plan_routes": 0,
+        "cache_hits": 1,
+        "llm_calls": 1,
+        "cache_size": 1,
+        "llm_calls_avoided": 1,
+    }
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+
+from langchain_core.tools import BaseTool
+
+from src.tools.decorators import ToolMetrics, create_logged_tool, log_io, tool_metrics
+
+
+def test_log_io_truncates_payloads_and_counts_calls(caplog):
+    @log_io
+    def crawl_page(url: str) -> str:
+        return "x" * 100_000
+
+    with caplog.at_level(logging.DEBUG, logger="src.tools.decorators"):
+        crawl_page("https://example.com")
+
+    called, returned = [record.getMessage() for record in caplog.records]
+    assert called == "Tool crawl_page called with parameters: 'https://example.com'"
+    assert len(returned) < 1000 and returned.endswith("(100000 chars)")
+    stats = tool_metrics.stats()["crawl_page"]
+    assert (stats["calls"], stats["chars_in"], stats["chars_out"]) == (1, 19, 100_000)
+    assert stats["latency_buckets"]["0.01"] == 1
+
+
+def test_logged_tool_counts_async_calls_once():
+    class EchoTool(BaseTool):
+        name: str = "echo"
+        description: str = "Echo the input."
+
+        def _run(self, text: str) -> str:
+            if not text:
+                raise ValueError("empty")
+            return text
+
+    tool = create_logged_tool(EchoTool)()
+    tool.invoke({"text": "hi"})
+    asyncio.run(tool.ainvoke({"text": "hello"}))
+    try:
+        tool.invoke({"text": ""})
+    except ValueError:
+        pass
+
+    stats = tool_metrics.stats()["EchoTool"]
+    assert (stats["calls"], stats["errors"], stats["chars_out"]) == (3, 1, 7)
+    assert sum(stats["latency_buckets"].values()) == 3
+
+
+def test_latency_histogram_buckets():
+    metrics = ToolMetrics()
+    for seconds in (0.001, 0.01, 0.2, 120):
+        metrics.record("search", seconds, 0, 0)
+    buckets = metrics.stats()["search"]["latency_buckets"]
+    assert (buckets["0.01"], buckets["0.5"], buckets["+Inf"]) == (2, 1, 1)
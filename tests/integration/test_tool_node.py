@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agents.tool_node import BoundedToolNode
+
+events = []
+
+
+@tool
+def fetch(n: int) -> str:
+    """Fetch page n."""
+    events.append(("start", n))
+    time.sleep(0.3)
+    events.append(("end", n))
+    return f"page {n}"
+
+
+@tool
+def step(n: int) -> str:
+    """Run step n."""
+    events.append(("step", n))
+    time.sleep(0.05)
+    return f"step {n}"
+
+
+@tool
+def hang() -> str:
+    """Never returns in time."""
+    time.sleep(2)
+    return "late"
+
+
+def _turn(*calls):
+    tool_calls = [
+        {"name": name, "args": args, "id": f"call_{i}", "type": "tool_call"}
+        for i, (name, args) in enumerate(calls)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+def _node(**kwargs):
+    return BoundedToolNode(
+        [fetch, step, hang],
+        limits={"fetch": 2, "step": 1},
+        timeouts={"hang": 0.2},
+        **kwargs,
+    )
+
+
+def test_calls_run_concurrently_within_limits_in_order():
+    events.clear()
+    turn = _turn(*[("fetch", {"n": n}) for n in range(4)])
+    start = time.perf_counter()
+    messages = _node().invoke(turn)["messages"]
+    elapsed = time.perf_counter() - start
+
+    assert [m.content for m in messages] == [f"page {n}" for n in range(4)]
+    # Two at a time: two rounds of 0.3s rather than four.
+    assert 0.55 < elapsed < 1.0
+    running = peak = 0
+    for kind, _ in events:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_sequential_group_keeps_call_order_and_times_out():
+    events.clear()
+    turn = _turn(
+        ("step", {"n": 1}), ("hang", {}), ("step", {"n": 2}), ("step", {"n": 3})
+    )
+    messages = asyncio.run(_node().ainvoke(turn))["messages"]
+    assert [m.tool_call_id for m in messages] == [f"call_{i}" for i in range(4)]
+    assert events == [("step", 1), ("step", 2), ("step", 3)]
+    assert messages[1].status == "error" and "0.2s" in messages[1].content
+
+    start = time.perf_counter()
+    messages = _node().invoke(_turn(("hang", {})))["messages"]
+    assert time.perf_counter() - start < 1
+    assert messages[0].status == "error"
@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+
+from langchain_core.tools import tool
+from langchain_openai import ChatOpenAI
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from benchmarks.fake_openai import create_app, serve
+from src.agents.gateway import AsyncGatewayClient, GatewayClient, ModelLimiter
+from src.service.tracing import TraceCallbackHandler, WorkflowTrace
+
+
+@tool
+def word_count(text: str) -> int:
+    """Count the words in a text."""
+    return len(text.split())
+
+
+def test_spans_cover_nodes_llm_calls_and_tools():
+    app = create_app(latency=0.1)
+    limiter = ModelLimiter("fake", max_concurrency=1)
+    with serve(app) as base_url:
+        llm = ChatOpenAI(
+            model="fake",
+            base_url=base_url,
+            api_key="fake",
+            streaming=True,
+            stream_usage=True,
+            http_client=GatewayClient(limiter),
+            http_async_client=AsyncGatewayClient(limiter),
+        )
+
+        async def researcher(state: MessagesState):
+            # Two calls against one slot: the second waits in the gateway.
+            first, second = await asyncio.gather(
+                llm.ainvoke(state["messages"]), llm.ainvoke(state["messages"])
+            )
+            await word_count.ainvoke({"text": first.content})
+            return {"messages": [first, second]}
+
+        builder = StateGraph(MessagesState)
+        builder.add_node("researcher", researcher)
+        builder.add_edge(START, "researcher")
+        builder.add_edge("researcher", END)
+        trace = WorkflowTrace("wf-1")
+        asyncio.run(
+            builder.compile().ainvoke(
+                {"messages": [("user", "hello")]},
+                {"callbacks": [TraceCallbackHandler(trace)]},
+            )
+        )
+
+    spans = {span.span_id: span for span in trace.spans()}
+    kinds = [span.kind for span in spans.values()]
+    assert kinds.count("workflow") == 1 and kinds.count("node") == 1
+    assert kinds.count("llm") == 2 and kinds.count("tool") == 1
+    node = next(span for span in spans.values() if span.kind == "node")
+    assert node.name == "researcher" and node.input_bytes > 0
+    assert spans[node.parent_id].kind == "workflow"
+
+    llm_spans = [span for span in spans.values() if span.kind == "llm"]
+    for span in llm_spans:
+        assert span.parent_id == node.span_id
+        assert span.ttft_ms is not None and span.ttft_ms <= span.duration_ms
+        assert (span.input_tokens, span.output_tokens) == (100, 20)
+        assert span.attributes["model"] == "fake"
+    waits = sorted(span.queue_wait_ms for span in llm_spans)
+    assert waits[0] < 50 and waits[1] >= 50
+
+    tool_span = next(span for span in spans.values() if span.kind == "tool")
+    assert tool_span.name == "word_count" and tool_span.output_bytes > 0
+
+    chrome = trace.to_chrome_trace()["traceEvents"]
+    assert sum(event["ph"] == "X" for event in chrome) == len(spans)
+    otlp = trace.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len({span["spanId"] for span in otlp}) == len(spans)
+    assert all(len(span["traceId"]) == 32 for span in otlp)
+    summary = trace.as_dict()["summary"]
+    assert summary["kinds"]["llm"]["input_tokens"] == 200
+    assert summary["nodes"]["researcher"]["count"] == 1
+
+
+def test_token_usage_reads_provider_prompt_cache_hits():
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+
+    from src.agents.usage import PromptCacheCallbackHandler, token_usage
+
+    openai = LLMResult(
+        generations=[
+            [
+                ChatGeneration(
+                    message=AIMessage(
+                        content="hi",
+                        usage_metadata={
+                            "input_tokens": 1000,
+                            "output_tokens": 10,
+                            "total_tokens": 1010,
+                            "input_token_details": {"cache_read": 768},
+                        },
+                        response_metadata={"model_name": "gpt-4o"},
+                    )
+                )
+            ]
+        ]
+    )
+    deepseek = LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="hi"))]],
+        llm_output={
+            "model_name": "deepseek-chat",
+            "token_usage": {
+                "prompt_tokens": 500,
+                "completion_tokens": 5,
+                "prompt_cache_hit_tokens": 0,
+            },
+        },
+    )
+    assert token_usage(openai) == {"input": 1000, "output": 10, "cached": 768}
+    assert token_usage(deepseek) == {"input": 500, "output": 5, "cached": 0}
+
+    handler = PromptCacheCallbackHandler()
+    handler.on_llm_end(openai, run_id=uuid.uuid4())
+    handler.on_llm_end(deepseek, run_id=uuid.uuid4())
+    assert handler.requests == [("gpt-4o", 1000, 768), ("deepseek-chat", 500, 0)]
+    assert handler.cached_token_ratio == 768 / 1500
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import random
+import uuid
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.agents import get_agent, llm
+from src.graph import build_graph
+from src.service import workflow_service
+from src.service.workflow_service import run_agent_workflow
+
+
+def _chunk_event(node: str, message_id: str, content: str) -> dict:
+    return {
+        "event": "on_chat_model_stream",
+        "name": "ChatOpenAI",
+        "run_id": uuid.uuid4(),
+        "metadata": {"checkpoint_ns": f"{node}:{uuid.uuid4()}", "langgraph_step": 1},
+        "data": {"chunk": AIMessageChunk(content=content, id=message_id)},
+    }
+
+
+def _chain_event(kind: str, name: str, step: int, data: dict | None = None) -> dict:
+    return {
+        "event": kind,
+        "name": name,
+        "run_id": uuid.uuid4(),
+        "metadata": {"langgraph_step": step},
+        "data": data or {},
+    }
+
+
+def _script(index: int) -> list[dict]:
+    """Graph events for one fake-LLM workflow, tagged with its index."""
+    if index % 2:
+        # Greeting: the coordinator answers directly.
+        return [
+            _chain_event("on_chain_start", "coordinator", 1),
+            _chunk_event("coordinator", f"coord-{index}", "Hel"),
+            _chunk_event("coordinator", f"coord-{index}", "lo "),
+            _chunk_event("coordinator", f"coord-{index}", f"#{index}"),
+            _chain_event("on_chain_end", "coordinator", 1),
+        ]
+    # Handoff: coordinator output is swallowed and the planner streams.
+    return [
+        _chain_event("on_chain_start", "coordinator", 1),
+        _chunk_event("coordinator", f"coord-{index}", "hand"),
+        _chunk_event("coordinator", f"coord-{index}", "off_to_planner()"),
+        _chunk_event("coordinator", f"coord-{index}", " trailing"),
+        _chain_event("on_chain_end", "coordinator", 1),
+        _chain_event("on_chain_start", "planner", 2),
+        _chunk_event("planner", f"plan-{index}", '{"plan": '),
+        _chunk_event("planner", f"plan-{index}", f"{index}}}"),
+        _chain_event("on_chain_end", "planner", 2),
+        _chain_event(
+            "on_chain_end",
+            "LangGraph",
+            3,
+            {"output": {"messages": [AIMessage(content=f"done {index}")]}},
+        ),
+    ]
+
+
+def _expected(index: int, workflow_id: str) -> list[dict]:
+    if index % 2:
+        agent = {
+            "agent_name": "coordinator",
+            "agent_id": f"{workflow_id}_coordinator_1",
+        }
+        return [
+            {"event": "start_of_agent", "data": agent},
+            {
+                "event": "message",
+                "data": {
+                    "message_id": f"coord-{index}",
+                    "delta": {"content": "Hello "},
+                },
+            },
+            {
+                "event": "message",
+                "data": {
+                    "message_id": f"coord-{index}",
+                    "delta": {"content": f"#{index}"},
+                },
+            },
+            {"event": "end_of_agent", "data": agent},
+        ]
+    coordinator = {
+        "agent_name": "coordinator",
+        "agent_id": f"{workflow_id}_coordinator_1",
+    }
+    planner = {"agent_name": "planner", "agent_id": f"{workflow_id}_planner_2"}
+    return [
+        {"event": "start_of_agent", "data": coordinator},
+        {"event": "end_of_agent", "data": coordinator},
+        {
+            "event": "start_of_workflow",
+            "data": {"workflow_id": workflow_id, "input": [_input(index)]},
+        },
+        {"event": "start_of_agent", "data": planner},
+        {
+            "event": "message",
+            "data": {"message_id": f"plan-{index}", "delta": {"content": '{"plan": '}},
+        },
+        {
+            "event": "message",
+            "data": {"message_id": f"plan-{index}", "delta": {"content": f"{index}}}"}},
+        },
+        {"event": "end_of_agent", "data": planner},
+        {
+            "event": "end_of_workflow",
+            "data": {
+                "workflow_id": workflow_id,
+                "messages": [{"role": "assistant", "content": f"done {index}"}],
+            },
+        },
+    ]
+
+
+def _input(index: int) -> dict:
+    return {"role": "user", "content": f"request {index}"}
+
+
+class FakeGraph:
+    """Replays the scripted events, yielding to the loop at random points."""
+
+    async def astream_events(self, inputs, config=None, *, version):
+        index = int(inputs["messages"][0]["content"].split()[-1])
+        for event in _script(index):
+            for _ in range(random.randint(0, 3)):
+                await asyncio.sleep(0)
+            yield event
+
+
+def test_concurrent_workflows_do_not_share_stream_state(monkeypatch):
+    """Hundreds of interleaved workflows each get exactly their own events."""
+    monkeypatch.setattr(workflow_service, "graph", FakeGraph())
+    monkeypatch.setattr(workflow_service, "checkpointer", None)
+    random.seed(0)
+
+    async def collect(index: int) -> list[dict]:
+        return [event async for event in run_agent_workflow([_input(index)])]
+
+    async def run_all():
+        return await asyncio.gather(*(collect(index) for index in range(400)))
+
+    for index, events in enumerate(asyncio.run(run_all())):
+        workflow_id = events[0]["data"]["agent_id"].split("_coordinator_")[0]
+        assert events == _expected(index, workflow_id)
+
+
+PLAN = {
+    "thought": "Research, then report.",
+    "title": "Plan",
+    "steps": [
+        {"agent_name": "researcher", "title": "Research", "description": "Look."},
+        {"agent_name": "reporter", "title": "Report", "description": "Write."},
+    ],
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Answers every agent of the real graph, tagging replies with the request.
+
+    Odd requests are greetings the coordinator answers; even ones are handed
+    to the planner, whose plan runs the researcher and then the reporter.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @staticmethod
+    def reply(messages) -> str:
+        system = messages[0].content
+        request = next(m.content for m in messages if m.type == "human")
+        index = int(request.split()[-1])
+        if "You are Langmanus" in system:
+            return f"Hello #{index}" if index % 2 else "handoff_to_planner()"
+        if "professional Deep Researcher" in system:
+            return json.dumps(PLAN)
+        return f"Answer for request {index}."
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content=self.reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self.reply(messages)
+        for start in range(0, len(text), 8):
+            for _ in range(random.randint(0, 2)):
+                await asyncio.sleep(0)
+            chunk = ChatGenerationChunk(
+                message=AIMessageChunk(content=text[start : start + 8])
+            )
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def _by_agent(events: list[dict]) -> dict[str, str]:
+    """Streamed text of each agent, from a workflow that runs them in turn."""
+    texts, agent = {}, None
+    for event in events:
+        if event["event"] == "start_of_agent":
+            agent = event["data"]["agent_name"]
+        elif event["event"] == "message":
+            texts[agent] = texts.get(agent, "") + event["data"]["delta"]["content"]
+    return texts
+
+
+def test_concurrent_real_graph_workflows_get_their_own_events(monkeypatch):
+    """Interleaved runs of the real graph, every LLM replaced by a fake model."""
+    model = ScriptedChatModel()
+    for llm_type in ("basic", "reasoning"):
+        monkeypatch.setitem(llm._llm_cache, llm_type, model)
+    # The researcher's tools are built, though the fake model never calls them.
+    monkeypatch.setenv("TAVILY_API_KEY", "unused")
+    monkeypatch.setattr(workflow_service, "checkpointer", None)
+    monkeypatch.setattr(workflow_service, "graph", build_graph())
+    # The react agents are cached with the model they were built with.
+    get_agent.cache_clear()
+    random.seed(0)
+
+    async def collect(index: int) -> list[dict]:
+        return [event async for event in run_agent_workflow([_input(index)])]
+
+    async def run_all():
+        return await asyncio.gather(*(collect(index) for index in range(200)))
+
+    try:
+        results = asyncio.run(run_all())
+    finally:
+        get_agent.cache_clear()
+
+    for index, events in enumerate(results):
+        workflow_id = events[0]["data"]["agent_id"].split("_coordinator_")[0]
+        for event in events:
+            data = event["data"]
+            assert data.get("agent_id", workflow_id).startswith(workflow_id)
+            assert data.get("workflow_id", workflow_id) == workflow_id
+        agents = [
+            e["data"]["agent_name"] for e in events if e["event"] == "start_of_agent"
+        ]
+        if index % 2:
+            assert agents == ["coordinator"]
+            assert _by_agent(events) == {"coordinator": f"Hello #{index}"}
+            continue
+        assert agents == ["coordinator", "planner", "researcher", "reporter"]
+        assert _by_agent(events) == {
+            "planner": json.dumps(PLAN),
+            "researcher": f"Answer for request {index}.",
+            "reporter": f"Answer for request {index}.",
+        }
+        assert [e["event"] for e in events].count("plan_step") == 2
+        (end,) = [e for e in events if e["event"] == "end_of_workflow"]
+        assert end["data"]["messages"][0]["content"] == f"request {index}"